@@ -0,0 +1,44 @@
+# 1337Jury - Query Budgets
+# This file is for: ADMIRAL (Backend Dev 1) & ZERO (Backend Dev 2)
+# Description: Per-endpoint caps on SQL queries and fetched rows
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    """Most queries / rows one request to the endpoint may use.
+
+    Budgets must not depend on dataset size: a list endpoint that grows a
+    query per row is exactly what they exist to catch. `rows` is only
+    checked on paginated requests (limit or cursor given), since the
+    compatibility mode of the list endpoints returns every row by design,
+    and only when the driver let every row be counted.
+    """
+
+    queries: int
+    rows: Optional[int] = None
+
+    def violations(self, stats) -> list[str]:
+        found = []
+        if stats.queries > self.queries:
+            found.append(f"{stats.queries} queries > {self.queries}")
+        if self.rows is not None and stats.paged and stats.rows_counted and stats.rows > self.rows:
+            found.append(f"{stats.rows} rows > {self.rows}")
+        return found
+
+
+def query_budget(queries: int, rows: Optional[int] = None):
+    """Declare an endpoint's budget; goes under the @router decorator:
+
+        @router.get("")
+        @query_budget(queries=2, rows=MAX_LIMIT + 1)
+        async def list_things(...):
+    """
+
+    def decorate(endpoint):
+        endpoint.query_budget = QueryBudget(queries, rows)
+        return endpoint
+
+    return decorate
@@ -0,0 +1,63 @@
+# 1337Jury - Conditional GET
+# This file is for: ADMIRAL (Backend Dev 1) & ZERO (Backend Dev 2)
+# Description: ETags and If-None-Match (304 Not Modified) for the read endpoints
+
+import hashlib
+from fastapi import Header
+from fastapi.responses import Response
+from app.services.cache import content_etag, encode_json, json_response
+
+
+def version_etag(*parts) -> str:
+    """Validator built from row versions (xmin) and whatever else shapes the
+    body, so it can be checked without loading or encoding the rows"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+class Conditional:
+    """Endpoint dependency: `conditional: Conditional = Depends()`.
+
+    Detail endpoints check `requested` and, when the client sent
+    If-None-Match, run a version query and answer not_modified() on a
+    match. Everything else goes through respond()/json(), which attach the
+    ETag and turn a matching response into a 304.
+    """
+
+    def __init__(self, if_none_match: str | None = Header(None)):
+        self.candidates = set()
+        for tag in (if_none_match or "").split(","):
+            tag = tag.strip()
+            # Weak comparison, as RFC 9110 requires for If-None-Match
+            self.candidates.add(tag[2:] if tag.startswith("W/") else tag)
+        self.candidates.discard("")
+
+    @property
+    def requested(self) -> bool:
+        return bool(self.candidates)
+
+    def matches(self, etag: str | None) -> bool:
+        return etag is not None and ("*" in self.candidates or etag in self.candidates)
+
+    def not_modified(self, etag: str, private: bool = False) -> Response:
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache" if private else "no-cache"},
+        )
+
+    def respond(self, response: Response) -> Response:
+        """A response carrying an ETag (cache hit or put), or its 304"""
+        etag = response.headers.get("etag")
+        if self.matches(etag):
+            return self.not_modified(etag, private="private" in response.headers.get("cache-control", ""))
+        return response
+
+    def json(self, value, etag: str | None = None, private: bool = False) -> Response:
+        """Encode value once, hashing the body unless a version ETag is given"""
+        if etag and self.matches(etag):
+            return self.not_modified(etag, private)
+        body = encode_json(value)
+        etag = etag or content_etag(body)
+        if self.matches(etag):
+            return self.not_modified(etag, private)
+        return json_response(body, etag, private)
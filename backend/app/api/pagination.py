@@ -0,0 +1,105 @@
+# 1337Jury - Keyset Pagination
+# This file is for: ADMIRAL (Backend Dev 1) & ZERO (Backend Dev 2)
+# Description: Opaque-cursor pagination shared by the list endpoints
+
+import base64
+import json
+import math
+from datetime import datetime
+from fastapi import HTTPException, Query
+from sqlalchemy import BigInteger, tuple_
+from app.middleware.query_stats import current_stats
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def encode_cursor(values: tuple) -> str:
+    raw = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode().rstrip("=")
+
+
+# Range of a Postgres INTEGER, beyond which the driver would refuse the value
+INT4 = (-2**31, 2**31 - 1)
+
+
+def _coerce(column, value):
+    """A decoded cursor value as the column's Python type, or ValueError.
+    The cursor is client input: a wrong type would otherwise reach the
+    driver (or compare as text) and fail as a 500."""
+    if value is None:
+        return None
+    kind = column.type.python_type
+    if kind is datetime and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if kind is int and isinstance(value, int) and not isinstance(value, bool):
+        if not isinstance(column.type, BigInteger) and not INT4[0] <= value <= INT4[1]:
+            raise ValueError("cursor value out of range")
+        return value
+    if kind is float and isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return float(value)
+    if kind is str and isinstance(value, str):
+        return value
+    raise ValueError(f"cursor value does not fit {column}")
+
+
+def decode_cursor(cursor: str, columns: tuple) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(raw, list) or len(raw) != len(columns):
+            raise ValueError("cursor does not match this listing")
+        return tuple(_coerce(col, v) for col, v in zip(columns, raw))
+    except (ValueError, TypeError, NotImplementedError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class Page:
+    """List endpoint dependency: `page: Page = Depends()`.
+
+    Without `limit` or `cursor` the endpoint keeps returning a plain list
+    (compatibility mode). With either, it returns
+    {"items": [...], "next_cursor": "..."} and pages by the keyset columns.
+    """
+
+    def __init__(
+        self,
+        limit: int | None = Query(None, ge=1, le=MAX_LIMIT),
+        cursor: str | None = None,
+    ):
+        self.limit = limit or (DEFAULT_LIMIT if cursor else None)
+        self.cursor = cursor
+        self.next_cursor = None
+        stats = current_stats()
+        if stats is not None and self.enabled:
+            # Row budgets only hold for bounded pages
+            stats.paged = True
+
+    @property
+    def enabled(self) -> bool:
+        return self.limit is not None
+
+    def apply(self, query, *columns, descending: bool = True):
+        """Order by the keyset columns (last one must be unique) and seek past the cursor"""
+        query = query.order_by(*(c.desc() if descending else c.asc() for c in columns))
+        if not self.enabled:
+            return query
+        if self.cursor:
+            after = tuple_(*decode_cursor(self.cursor, columns))
+            key = tuple_(*columns)
+            query = query.where(key < after if descending else key > after)
+        # One extra row tells whether there is a next page
+        return query.limit(self.limit + 1)
+
+    def trim(self, rows, key) -> list:
+        """Drop the look-ahead row and remember the cursor for the next page"""
+        rows = list(rows)
+        if self.enabled and len(rows) > self.limit:
+            rows = rows[:self.limit]
+            self.next_cursor = encode_cursor(key(rows[-1]))
+        return rows
+
+    def respond(self, items: list):
+        if not self.enabled:
+            return items
+        return {"items": items, "next_cursor": self.next_cursor}
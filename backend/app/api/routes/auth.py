@@ -6,21 +6,27 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from app.api.budgets import query_budget
 from app.config import settings
 from app.database import get_db
 from app.models.user import User
+from app.middleware.auth import get_current_user
 from app.services.ft_api import ft_api
 from app.services.jwt_service import create_access_token, verify_token
+from app.services.auth_cache import auth_cache
+from app.services import stream_tickets
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.get("/login")
+@query_budget(queries=0)
 async def login():
     return RedirectResponse(url=ft_api.get_authorization_url())
 
 
 @router.get("/callback")
+@query_budget(queries=3)
 async def callback(code: str = Query(...), db: AsyncSession = Depends(get_db)):
     # Code to token
     token_data = await ft_api.exchange_code_for_token(code)
@@ -41,6 +47,8 @@ async def callback(code: str = Query(...), db: AsyncSession = Depends(get_db)):
     avatar_url = image.get("link") if isinstance(image, dict) else None
     is_staff = user_info.get("staff?", False)
 
+    # Lookup, then INSERT or UPDATE (a first login or a changed profile),
+    # then the refresh: 3 queries
     result = await db.execute(select(User).where(User.ft_id == ft_id))
     user = result.scalar_one_or_none()
 
@@ -58,6 +66,8 @@ async def callback(code: str = Query(...), db: AsyncSession = Depends(get_db)):
 
     await db.commit()
     await db.refresh(user)
+    # Profile was refreshed, drop the cached copy on every worker
+    auth_cache.evict(user.id)
 
     # JWT Token generator
     jwt_token = create_access_token(data={
@@ -70,6 +80,7 @@ async def callback(code: str = Query(...), db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/me")
+@query_budget(queries=1)
 async def get_me(token: str = Query(...), db: AsyncSession = Depends(get_db)):
     payload = verify_token(token)
     if not payload:
@@ -84,8 +95,19 @@ async def get_me(token: str = Query(...), db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/verify")
+@query_budget(queries=0)
 async def verify(token: str = Query(...)):
     payload = verify_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid token")
-    return {"valid": True, "user_id": payload.get("sub"), "login": payload.get("login"), "is_staff": payload.get("is_staff")}
\ No newline at end of file
+    return {"valid": True, "user_id": payload.get("sub"), "login": payload.get("login"), "is_staff": payload.get("is_staff")}
+
+
+@router.post("/stream-ticket")
+@query_budget(queries=2)
+async def stream_ticket(db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+    """One-time ticket for an EventSource URL (?ticket=), valid for
+    STREAM_TICKET_TTL seconds"""
+    ticket = await stream_tickets.issue(db, user.id)
+    await db.commit()
+    return {"ticket": ticket, "expires_in": settings.STREAM_TICKET_TTL}
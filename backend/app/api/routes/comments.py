@@ -1,16 +1,53 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.database import get_db
+from sqlalchemy import select, update, func, or_
+from app.database import get_db, get_read_db
 from app.models.comment import Comment
+from app.models.subject_vote import SubjectVote
+from app.models.dispute import Dispute
+from app.models.archive import archived_disputes, archived_subject_votes
 from app.models.user import User
 from app.middleware.auth import get_current_user
+from app.api.budgets import query_budget
+from app.api.conditional import Conditional
+from app.api.pagination import Page, MAX_LIMIT
+from app.services.cache import response_cache
 from pydantic import BaseModel
 from typing import Optional
 
 router = APIRouter(prefix="/comments", tags=["Comments"])
 
 
+async def _bump(db: AsyncSession, table, parent_id: int, delta: int) -> bool:
+    result = await db.execute(
+        update(table)
+        .where(table.c.id == parent_id)
+        .values(comment_count=func.coalesce(table.c.comment_count, 0) + delta)
+    )
+    return result.rowcount > 0
+
+
+async def _bump_comment_counts(db: AsyncSession, comment: Comment, delta: int) -> bool:
+    """Keep the denormalized comment_count columns in the caller's transaction.
+
+    Returns False when the vote/dispute is not in the hot tables: it does
+    not exist or it was archived. Archived threads are read-only, but a
+    comment deleted from one still comes off the archived count.
+    """
+    parents = []
+    if comment.vote_id:
+        parents.append((SubjectVote.__table__, archived_subject_votes, comment.vote_id))
+    if comment.dispute_id:
+        parents.append((Dispute.__table__, archived_disputes, comment.dispute_id))
+    hot = True
+    for table, archive, parent_id in parents:
+        if not await _bump(db, table, parent_id, delta):
+            hot = False
+            if delta < 0:
+                await _bump(db, archive, parent_id, delta)
+    return hot
+
+
 class CommentCreate(BaseModel):
     content: str
     vote_id: Optional[int] = None
@@ -23,10 +60,13 @@ class CommentUpdate(BaseModel):
 
 
 @router.get("")
+@query_budget(queries=1, rows=MAX_LIMIT + 1)
 async def list_comments(
     vote_id: Optional[int] = None,
     dispute_id: Optional[int] = None,
-    db: AsyncSession = Depends(get_db)
+    page: Page = Depends(),
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List comments for a vote or dispute"""
     query = select(Comment, User.login, User.avatar_url).join(User, Comment.user_id == User.id)
@@ -35,13 +75,17 @@ async def list_comments(
         query = query.where(Comment.vote_id == vote_id)
     elif dispute_id:
         query = query.where(Comment.dispute_id == dispute_id)
+    
+    if vote_id or dispute_id:
+        # Threads read oldest first
+        query = page.apply(query, Comment.created_at, Comment.id, descending=False)
     else:
         # Return recent comments
-        query = query.order_by(Comment.created_at.desc()).limit(100)
-    
-    query = query.order_by(Comment.created_at.asc())
+        query = page.apply(query, Comment.created_at, Comment.id)
+        if not page.enabled:
+            query = query.limit(100)
     result = await db.execute(query)
-    rows = result.all()
+    rows = page.trim(result.all(), lambda row: (row[0].created_at, row[0].id))
     
     comments = []
     for comment, user_login, avatar_url in rows:
@@ -50,10 +94,11 @@ async def list_comments(
         c["avatar_url"] = avatar_url
         comments.append(c)
     
-    return comments
+    return conditional.json(page.respond(comments))
 
 
 @router.post("")
+@query_budget(queries=4)
 async def create_comment(
     data: CommentCreate,
     db: AsyncSession = Depends(get_db),
@@ -71,8 +116,12 @@ async def create_comment(
         parent_id=data.parent_id
     )
     db.add(comment)
+    if not await _bump_comment_counts(db, comment, 1):
+        raise HTTPException(status_code=404, detail="Vote or dispute not found (or archived)")
     await db.commit()
     await db.refresh(comment)
+    if comment.vote_id:
+        response_cache.invalidate("votes", f"vote:{comment.vote_id}")
     
     result = comment.to_dict()
     result["user_login"] = current_user.login
@@ -81,6 +130,7 @@ async def create_comment(
 
 
 @router.delete("/{comment_id}")
+@query_budget(queries=4)
 async def delete_comment(
     comment_id: int,
     db: AsyncSession = Depends(get_db),
@@ -97,35 +147,39 @@ async def delete_comment(
         raise HTTPException(status_code=403, detail="Not authorized")
     
     await db.delete(comment)
+    await _bump_comment_counts(db, comment, -1)
     await db.commit()
+    if comment.vote_id:
+        response_cache.invalidate("votes", f"vote:{comment.vote_id}")
     return {"message": "Comment deleted"}
 
 
 @router.get("/count")
+@query_budget(queries=1)
 async def get_comment_counts(
     vote_ids: Optional[str] = None,
     dispute_ids: Optional[str] = None,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get comment counts for multiple votes/disputes"""
-    from sqlalchemy import func
-    
-    counts = {}
-    
-    if vote_ids:
-        ids = [int(x) for x in vote_ids.split(",") if x]
-        for vid in ids:
-            result = await db.execute(
-                select(func.count(Comment.id)).where(Comment.vote_id == vid)
-            )
-            counts[f"vote-{vid}"] = result.scalar() or 0
-    
-    if dispute_ids:
-        ids = [int(x) for x in dispute_ids.split(",") if x]
-        for did in ids:
-            result = await db.execute(
-                select(func.count(Comment.id)).where(Comment.dispute_id == did)
-            )
-            counts[f"dispute-{did}"] = result.scalar() or 0
+    vids = [int(x) for x in vote_ids.split(",") if x] if vote_ids else []
+    dids = [int(x) for x in dispute_ids.split(",") if x] if dispute_ids else []
+
+    counts = {f"vote-{vid}": 0 for vid in vids}
+    counts.update({f"dispute-{did}": 0 for did in dids})
+    if not counts:
+        return counts
+
+    # One grouped query answers every requested id
+    result = await db.execute(
+        select(Comment.vote_id, Comment.dispute_id, func.count(Comment.id))
+        .where(or_(Comment.vote_id.in_(vids), Comment.dispute_id.in_(dids)))
+        .group_by(Comment.vote_id, Comment.dispute_id)
+    )
+    for vote_id, dispute_id, count in result.all():
+        if f"vote-{vote_id}" in counts:
+            counts[f"vote-{vote_id}"] += count
+        if f"dispute-{dispute_id}" in counts:
+            counts[f"dispute-{dispute_id}"] += count
     
-    return counts
\ No newline at end of file
+    return counts
@@ -6,11 +6,18 @@ from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime, timezone
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.dispute import Dispute, DisputeStatus, DisputeWinner
-from app.models.dispute_vote import DisputeVote
 from app.models.user import User
-from app.middleware.auth import get_current_user, get_staff_user
+from app.models.archive import AnyDispute
+from app.middleware.auth import get_current_user, get_staff_user, get_stream_user
+from app.services import ballot_service
+from app.services.tally_hub import tally_hub, open_stream
+from app.services.archiver import lock_either, purge
+from app.api.budgets import query_budget
+from app.api.conditional import Conditional, version_etag
+from app.api.pagination import Page, MAX_LIMIT
+from app.services.user_loader import UserLoader, get_read_user_loader, get_user_loader
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/disputes", tags=["Disputes"])
@@ -33,88 +40,134 @@ class StaffDecision(BaseModel):
     reason: str | None = None
 
 
+def _with_usernames(dispute: Dispute, users: dict, viewer: User) -> dict:
+    """Usernames are only revealed to the participant they belong to"""
+    dispute_dict = dispute.to_dict()
+    corrector = users.get(dispute.corrector_id) if dispute.corrector_id == viewer.id else None
+    corrected = users.get(dispute.corrected_id) if dispute.corrected_id == viewer.id else None
+    dispute_dict["corrector_username"] = corrector.login if corrector else None
+    dispute_dict["corrected_username"] = corrected.login if corrected else None
+    return dispute_dict
+
+
+def _visible_user_ids(dispute: Dispute, viewer: User) -> list[int]:
+    return [uid for uid in (dispute.corrector_id, dispute.corrected_id) if uid == viewer.id]
+
+
+def _dispute_etag(xmin: int, corrector_id: int, corrected_id: int, viewer: User) -> str:
+    # Viewers only see different bodies through their own username
+    shown = viewer.login if viewer.id in (corrector_id, corrected_id) else None
+    return version_etag("dispute", xmin, shown)
+
+
+async def _dispute_tally(db: AsyncSession, dispute_id: int) -> dict | None:
+    """Live tally: status, winner and both vote counts (no usernames),
+    archived disputes included"""
+    result = await db.execute(
+        select(AnyDispute.status, AnyDispute.winner, AnyDispute.corrector_votes, AnyDispute.corrected_votes)
+        .where(AnyDispute.id == dispute_id)
+    )
+    row = result.first()
+    if not row:
+        return None
+    return {
+        "id": dispute_id,
+        "status": row.status.value,
+        "winner": row.winner.value if row.winner else None,
+        "corrector_votes": row.corrector_votes,
+        "corrected_votes": row.corrected_votes,
+    }
+
+
+tally_hub.register("dispute", _dispute_tally)
+
+
 @router.get("")
+@query_budget(queries=3, rows=MAX_LIMIT + 3)
 async def list_disputes(
     project_id: int | None = None,
     status: str | None = None,
-    db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    page: Page = Depends(),
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+    user: User = Depends(get_current_user),
+    loader: UserLoader = Depends(get_read_user_loader)
 ):
-    query = select(Dispute)
+    # Only open disputes are always hot; anything else may have been archived
+    dispute = Dispute if status == DisputeStatus.OPEN.value else AnyDispute
+    query = select(dispute)
     if project_id:
-        query = query.where(Dispute.project_id == project_id)
+        query = query.where(dispute.project_id == project_id)
     if status:
-        query = query.where(Dispute.status == DisputeStatus(status))
-    query = query.order_by(Dispute.created_at.desc())
+        query = query.where(dispute.status == DisputeStatus(status))
+    query = page.apply(query, dispute.created_at, dispute.id)
     result = await db.execute(query)
-    disputes = result.scalars().all()
+    disputes = page.trim(result.scalars().all(), lambda d: (d.created_at, d.id))
 
-    output = []
+    # Resolve every username the page needs in one batch
+    loader.prime(user)
     for d in disputes:
-        dispute_dict = d.to_dict()
-        if d.corrector_id == user.id:
-            corrector_result = await db.execute(select(User).where(User.id == d.corrector_id))
-            corrector = corrector_result.scalar_one_or_none()
-            dispute_dict["corrector_username"] = corrector.login if corrector else None
-        else:
-            dispute_dict["corrector_username"] = None
-        
-        if d.corrected_id == user.id:
-            corrected_result = await db.execute(select(User).where(User.id == d.corrected_id))
-            corrected = corrected_result.scalar_one_or_none()
-            dispute_dict["corrected_username"] = corrected.login if corrected else None
-        else:
-            dispute_dict["corrected_username"] = None
-        
-        output.append(dispute_dict)
-    
-    return output
+        loader.want(*_visible_user_ids(d, user))
+    users = await loader.load_many()
+
+    return conditional.json(page.respond([_with_usernames(d, users, user) for d in disputes]), private=True)
 
 
 @router.get("/{dispute_id}")
+@query_budget(queries=3)
 async def get_dispute(
     dispute_id: int,
-    db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+    user: User = Depends(get_current_user),
+    loader: UserLoader = Depends(get_read_user_loader)
 ):
-    result = await db.execute(select(Dispute).where(Dispute.id == dispute_id))
+    if conditional.requested:
+        result = await db.execute(
+            select(AnyDispute.xmin, AnyDispute.corrector_id, AnyDispute.corrected_id).where(AnyDispute.id == dispute_id)
+        )
+        version = result.one_or_none()
+        if not version:
+            raise HTTPException(status_code=404, detail="Dispute not found")
+        etag = _dispute_etag(*version, user)
+        if conditional.matches(etag):
+            return conditional.not_modified(etag, private=True)
+
+    # Closed disputes may have moved to the archive tables: same query count
+    result = await db.execute(select(AnyDispute).where(AnyDispute.id == dispute_id))
     dispute = result.scalar_one_or_none()
     if not dispute:
         raise HTTPException(status_code=404, detail="Dispute not found")
-    
-    dispute_dict = dispute.to_dict()
 
-    if dispute.corrector_id == user.id:
-        corrector_result = await db.execute(select(User).where(User.id == dispute.corrector_id))
-        corrector = corrector_result.scalar_one_or_none()
-        dispute_dict["corrector_username"] = corrector.login if corrector else None
-    else:
-        dispute_dict["corrector_username"] = None
-    
-    if dispute.corrected_id == user.id:
-        corrected_result = await db.execute(select(User).where(User.id == dispute.corrected_id))
-        corrected = corrected_result.scalar_one_or_none()
-        dispute_dict["corrected_username"] = corrected.login if corrected else None
-    else:
-        dispute_dict["corrected_username"] = None
-    
-    return dispute_dict
+    loader.prime(user)
+    users = await loader.load_many(_visible_user_ids(dispute, user))
+    etag = _dispute_etag(dispute.xmin, dispute.corrector_id, dispute.corrected_id, user)
+    return conditional.json(_with_usernames(dispute, users, user), etag, private=True)
+
+
+@router.get("/{dispute_id}/stream")
+@query_budget(queries=2)
+async def stream_dispute(dispute_id: int, user: User = Depends(get_stream_user)):
+    """Server-Sent Events: a `tally` frame now and after every change,
+    ending with the one that closes the dispute (or `gone` if it is deleted)"""
+    return await open_stream(f"dispute:{dispute_id}", "Dispute not found")
 
 
 @router.post("")
+@query_budget(queries=4)
 async def create_dispute(
     data: DisputeCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: User = Depends(get_current_user),
+    loader: UserLoader = Depends(get_user_loader)
 ):
     # Resolve usernames to IDs
-    corrector_result = await db.execute(select(User).where(User.login == data.corrector_username))
-    corrector = corrector_result.scalar_one_or_none()
+    loader.prime(user)
+    users = await loader.load_by_logins([data.corrector_username, data.corrected_username])
+    corrector = users.get(data.corrector_username)
     if not corrector:
         raise HTTPException(status_code=404, detail=f"Corrector user '{data.corrector_username}' not found")
-    
-    corrected_result = await db.execute(select(User).where(User.login == data.corrected_username))
-    corrected = corrected_result.scalar_one_or_none()
+    corrected = users.get(data.corrected_username)
     if not corrected:
         raise HTTPException(status_code=404, detail=f"Corrected user '{data.corrected_username}' not found")
     
@@ -130,62 +183,39 @@ async def create_dispute(
     await db.commit()
     await db.refresh(dispute)
     
-    dispute_dict = dispute.to_dict()
     # Show usernames to the creator (they just entered them)
-    dispute_dict["corrector_username"] = corrector.login if corrector.id == user.id else None
-    dispute_dict["corrected_username"] = corrected.login if corrected.id == user.id else None
-    
-    return dispute_dict
+    return _with_usernames(dispute, {corrector.id: corrector, corrected.id: corrected}, user)
 
 
 @router.post("/{dispute_id}/vote")
+@query_budget(queries=3)
 async def vote_dispute(
     dispute_id: int,
     data: DisputeVoteRequest,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
+    vote_for = DisputeWinner(data.vote_for)
+
+    # Ballot upsert and tally changes happen in one statement
+    dispute = await ballot_service.cast_dispute_vote(db, dispute_id, user.id, vote_for)
+    if dispute:
+        await db.commit()
+        tally_hub.publish(f"dispute:{dispute_id}")
+        return dispute.to_dict()
+
+    # Nothing was cast, look up why
     result = await db.execute(select(Dispute).where(Dispute.id == dispute_id))
     dispute = result.scalar_one_or_none()
     if not dispute:
         raise HTTPException(status_code=404, detail="Dispute not found")
     if dispute.status != DisputeStatus.OPEN:
         raise HTTPException(status_code=400, detail="Dispute is closed")
-
-    vote_for = DisputeWinner(data.vote_for)
-
-    # Check existing vote
-    result = await db.execute(
-        select(DisputeVote).where(DisputeVote.dispute_id == dispute_id, DisputeVote.user_id == user.id)
-    )
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        if existing.vote_for == vote_for:
-            raise HTTPException(status_code=400, detail="Already voted for this option")
-        # Change vote
-        if existing.vote_for == DisputeWinner.CORRECTOR:
-            dispute.corrector_votes -= 1
-            dispute.corrected_votes += 1
-        else:
-            dispute.corrected_votes -= 1
-            dispute.corrector_votes += 1
-        existing.vote_for = vote_for
-    else:
-        # New vote
-        vote = DisputeVote(dispute_id=dispute_id, user_id=user.id, vote_for=vote_for)
-        db.add(vote)
-        if vote_for == DisputeWinner.CORRECTOR:
-            dispute.corrector_votes += 1
-        else:
-            dispute.corrected_votes += 1
-
-    await db.commit()
-    await db.refresh(dispute)
-    return dispute.to_dict()
+    raise HTTPException(status_code=400, detail="Already voted for this option")
 
 
 @router.post("/{dispute_id}/staff-decision")
+@query_budget(queries=3)
 async def staff_decision(
     dispute_id: int,
     data: StaffDecision,
@@ -205,10 +235,12 @@ async def staff_decision(
     dispute.closed_at = datetime.now(timezone.utc)
 
     await db.commit()
+    tally_hub.publish(f"dispute:{dispute_id}")
     return {"message": "Staff decision applied - THIS IS FINAL", "winner": data.winner}
 
 
 @router.post("/{dispute_id}/close")
+@query_budget(queries=3)
 async def close_dispute(
     dispute_id: int,
     db: AsyncSession = Depends(get_db),
@@ -231,6 +263,7 @@ async def close_dispute(
     dispute.status = DisputeStatus.CLOSED
     dispute.closed_at = datetime.now(timezone.utc)
     await db.commit()
+    tally_hub.publish(f"dispute:{dispute_id}")
     return {"message": "Dispute closed", "winner": dispute.winner.value if dispute.winner else None}
 
 
@@ -240,6 +273,7 @@ class DisputeUpdate(BaseModel):
 
 
 @router.put("/{dispute_id}")
+@query_budget(queries=4)
 async def update_dispute(
     dispute_id: int,
     data: DisputeUpdate,
@@ -267,20 +301,18 @@ async def update_dispute(
 
 
 @router.delete("/{dispute_id}")
+@query_budget(queries=3)
 async def delete_dispute(
     dispute_id: int,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_staff_user)
 ):
-    """Delete a dispute - STAFF ONLY"""
-    result = await db.execute(select(Dispute).where(Dispute.id == dispute_id))
-    dispute = result.scalar_one_or_none()
-    if not dispute:
+    """Delete a dispute, hot or archived, with its ballots and comments - STAFF ONLY"""
+    hot_id, archived_id = (await db.execute(lock_either("disputes", dispute_id))).one()
+    if hot_id is None and archived_id is None:
         raise HTTPException(status_code=404, detail="Dispute not found")
 
-    # Delete associated votes first
-    from sqlalchemy import delete
-    await db.execute(delete(DisputeVote).where(DisputeVote.dispute_id == dispute_id))
-    await db.delete(dispute)
+    await db.execute(purge("disputes", dispute_id, archived=hot_id is None))
     await db.commit()
+    tally_hub.publish(f"dispute:{dispute_id}")
     return {"message": "Dispute deleted"}
\ No newline at end of file
@@ -0,0 +1,51 @@
+# 1337Jury - Export Routes
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Staff-only bulk exports of votes, disputes, comments and recodes
+
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.models.user import User
+from app.middleware.auth import get_staff_user, get_streaming_staff_user
+from app.api.budgets import query_budget
+from app.exports import EXPORTS, FORMATS, export_chunks
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+
+@router.get("")
+@query_budget(queries=1)
+async def list_exports(user: User = Depends(get_staff_user)):
+    return {name: export.fieldnames for name, export in EXPORTS.items()}
+
+
+@router.get("/{kind}")
+@query_budget(queries=2)
+async def export_table(
+    kind: str,
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    after: int | None = Query(None, ge=0),
+    compress: bool = Query(True, alias="gzip"),
+    user: User = Depends(get_streaming_staff_user)
+):
+    """Streams every row in id order. Rows are read in batches from a
+    server-side cursor, so a large table is never held in memory. A cut-off
+    download resumes with ?after=<last id received>."""
+    export = EXPORTS.get(kind)
+    if export is None:
+        raise HTTPException(status_code=404, detail="Unknown export")
+
+    async def body():
+        async for chunk, _, _ in export_chunks(export, fmt, after, compress):
+            yield chunk
+
+    filename = f"{kind}.{fmt}.gz" if compress else f"{kind}.{fmt}"
+    return StreamingResponse(
+        body(),
+        media_type="application/gzip" if compress else FORMATS[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no",
+        },
+    )
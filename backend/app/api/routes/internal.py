@@ -0,0 +1,72 @@
+# 1337Jury - Internal Routes
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Staff-only operational endpoints (cache, pool, slow-query, counter, stream and archive stats)
+
+from fastapi import APIRouter, Depends
+from app.database import pool_stats
+from app.models.user import User
+from app.middleware.auth import get_staff_user
+from app.api.budgets import query_budget
+from app.services.cache import response_cache
+from app.services.cache_bus import cache_bus
+from app.services.archiver import archiver
+from app.services.auth_cache import auth_cache
+from app.services.counters import download_counter
+from app.services.slow_queries import slow_query_log
+from app.services.tally_hub import tally_hub
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+
+@router.get("/cache")
+@query_budget(queries=1)
+async def cache_stats(user: User = Depends(get_staff_user)):
+    stats = response_cache.stats()
+    stats["auth"] = auth_cache.stats()
+    stats["bus"] = cache_bus.stats()
+    return stats
+
+
+@router.post("/cache/clear")
+@query_budget(queries=1)
+async def clear_cache(user: User = Depends(get_staff_user)):
+    response_cache.clear()
+    auth_cache.clear()
+    return {"message": "Cache cleared"}
+
+
+@router.get("/pool")
+@query_budget(queries=1)
+async def pool_metrics(user: User = Depends(get_staff_user)):
+    return {"pools": pool_stats()}
+
+
+@router.get("/slow-queries")
+@query_budget(queries=1)
+async def slow_queries(user: User = Depends(get_staff_user)):
+    return slow_query_log.stats()
+
+
+@router.post("/slow-queries/clear")
+@query_budget(queries=1)
+async def clear_slow_queries(user: User = Depends(get_staff_user)):
+    slow_query_log.clear()
+    return {"message": "Slow-query log cleared"}
+
+
+@router.get("/counters")
+@query_budget(queries=1)
+async def counter_stats(user: User = Depends(get_staff_user)):
+    return {"downloads": download_counter.stats()}
+
+
+@router.get("/streams")
+@query_budget(queries=1)
+async def stream_stats(user: User = Depends(get_staff_user)):
+    return tally_hub.stats()
+
+
+@router.get("/archive")
+@query_budget(queries=1)
+async def archive_stats(user: User = Depends(get_staff_user)):
+    return archiver.stats()
@@ -0,0 +1,22 @@
+# 1337Jury - Metrics Route
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Prometheus scrape endpoint
+
+import secrets
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.config import settings
+from app.api.budgets import query_budget
+from app.services.metrics import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+@query_budget(queries=0)
+async def scrape(authorization: str | None = Header(None)):
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not authorization or not secrets.compare_digest(authorization, expected):
+            raise HTTPException(status_code=401, detail="Not authenticated")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -4,10 +4,14 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.project import Project
 from app.middleware.auth import get_current_user, get_staff_user
 from app.models.user import User
+from app.api.budgets import query_budget
+from app.api.conditional import Conditional, version_etag
+from app.api.pagination import Page, MAX_LIMIT
+from app.services.cache import response_cache, cache_key
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
@@ -20,22 +24,53 @@ class ProjectCreate(BaseModel):
 
 
 @router.get("")
-async def list_projects(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Project))
-    projects = result.scalars().all()
-    return [p.to_dict() for p in projects]
+@query_budget(queries=1, rows=MAX_LIMIT + 1)
+async def list_projects(
+    page: Page = Depends(),
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_read_db)
+):
+    key = cache_key("projects", page.limit, page.cursor)
+    cached = response_cache.get(key)
+    if cached:
+        return conditional.respond(cached)
+
+    query = page.apply(select(Project), Project.id, descending=False)
+    result = await db.execute(query)
+    projects = page.trim(result.scalars().all(), lambda p: (p.id,))
+    return conditional.respond(response_cache.put(key, page.respond([p.to_dict() for p in projects]), tags=["projects"]))
 
 
 @router.get("/{project_id}")
-async def get_project(project_id: int, db: AsyncSession = Depends(get_db)):
+@query_budget(queries=2)
+async def get_project(
+    project_id: int,
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_read_db)
+):
+    key = cache_key("project", project_id)
+    cached = response_cache.get(key)
+    if cached:
+        return conditional.respond(cached)
+
+    if conditional.requested:
+        version = await db.scalar(select(Project.xmin).where(Project.id == project_id))
+        if version is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        etag = version_etag("project", version)
+        if conditional.matches(etag):
+            return conditional.not_modified(etag)
+
     result = await db.execute(select(Project).where(Project.id == project_id))
     project = result.scalar_one_or_none()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project.to_dict()
+    etag = version_etag("project", project.xmin)
+    return conditional.respond(response_cache.put(key, project.to_dict(), tags=[f"project:{project_id}"], etag=etag))
 
 
 @router.post("")
+@query_budget(queries=3)
 async def create_project(
     data: ProjectCreate,
     db: AsyncSession = Depends(get_db),
@@ -45,4 +80,5 @@ async def create_project(
     db.add(project)
     await db.commit()
     await db.refresh(project)
+    response_cache.invalidate("projects")
     return project.to_dict()
\ No newline at end of file
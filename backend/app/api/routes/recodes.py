@@ -2,15 +2,49 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.database import get_db
+from sqlalchemy.orm import aliased
+from app.database import get_db, get_read_db
 from app.models.recode_request import RecodeRequest
 from app.models.user import User
 from app.models.project import Project
 from app.middleware.auth import get_current_user, get_staff_user
+from app.api.budgets import query_budget
+from app.api.conditional import Conditional, version_etag
+from app.api.pagination import Page, MAX_LIMIT
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/recodes", tags=["Recode Requests"])
 
+Requester = aliased(User)
+Matcher = aliased(User)
+
+# Static lookup lists, served without touching the database
+CAMPUSES = [
+    {"id": "khouribga", "name": "1337 Khouribga"},
+    {"id": "benguerir", "name": "1337 Ben Guerir"},
+    {"id": "tetouan", "name": "1337 Tetouan"},
+    {"id": "med", "name": "1337 MED"},
+    {"id": "rabat", "name": "1337 Rabat"},
+    {"id": "paris", "name": "42 Paris"},
+    {"id": "lyon", "name": "42 Lyon"},
+    {"id": "nice", "name": "42 Nice"},
+    {"id": "berlin", "name": "42 Berlin"},
+    {"id": "london", "name": "42 London"},
+    {"id": "tokyo", "name": "42 Tokyo"},
+    {"id": "seoul", "name": "42 Seoul"},
+    {"id": "other", "name": "Other"},
+]
+
+PLATFORMS = [
+    {"id": "discord", "name": "Discord", "icon": "🎮"},
+    {"id": "google_meet", "name": "Google Meet", "icon": "📹"},
+    {"id": "zoom", "name": "Zoom", "icon": "💻"},
+    {"id": "teams", "name": "Microsoft Teams", "icon": "👥"},
+    {"id": "slack", "name": "Slack Huddle", "icon": "💬"},
+    {"id": "in_person", "name": "In Person", "icon": "🏫"},
+    {"id": "other", "name": "Other", "icon": "🔗"},
+]
+
 class RecodeCreate(BaseModel):
     project_id: int
     campus: str
@@ -26,15 +60,42 @@ class RecodeUpdate(BaseModel):
     description: str | None = None
 
 
+def _enriched_query(*columns):
+    """Recode requests joined with requester, project and matched user in one query"""
+    return (
+        select(*columns or (RecodeRequest, Requester.login, Requester.avatar_url, Project.name, Matcher.login))
+        .outerjoin(Requester, Requester.id == RecodeRequest.user_id)
+        .outerjoin(Project, Project.id == RecodeRequest.project_id)
+        .outerjoin(Matcher, Matcher.id == RecodeRequest.matched_user_id)
+    )
+
+
+# Every row a recode response is built from
+VERSION_COLUMNS = (RecodeRequest.xmin, Requester.xmin, Project.xmin, Matcher.xmin)
+
+
+def _enriched_dict(row) -> dict:
+    recode, user_login, user_image, project_name, matched_login = row
+    data = recode.to_dict()
+    data["user_login"] = user_login or "Unknown"
+    data["user_image"] = user_image
+    data["project_name"] = project_name or "Unknown Project"
+    data["matched_user_login"] = matched_login
+    return data
+
+
 @router.get("")
+@query_budget(queries=1, rows=MAX_LIMIT + 1)
 async def list_recodes(
     project_id: int | None = None,
     campus: str | None = None,
     status: str | None = None,
-    db: AsyncSession = Depends(get_db)
+    page: Page = Depends(),
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List all recode requests with optional filters"""
-    query = select(RecodeRequest).order_by(RecodeRequest.created_at.desc())
+    query = _enriched_query()
     
     if project_id:
         query = query.where(RecodeRequest.project_id == project_id)
@@ -47,94 +108,43 @@ async def list_recodes(
         query = query.where(RecodeRequest.status == "open")
     # If status == "all", don't filter by status
     
+    query = page.apply(query, RecodeRequest.created_at, RecodeRequest.id)
     result = await db.execute(query)
-    recodes = result.scalars().all()
-    
-    # Enrich with user and project info
-    enriched = []
-    for r in recodes:
-        data = r.to_dict()
-        # Get user info
-        user_result = await db.execute(select(User).where(User.id == r.user_id))
-        user = user_result.scalar_one_or_none()
-        data["user_login"] = user.login if user else "Unknown"
-        data["user_image"] = user.avatar_url if user else None
-        
-        # Get project info
-        project_result = await db.execute(select(Project).where(Project.id == r.project_id))
-        project = project_result.scalar_one_or_none()
-        data["project_name"] = project.name if project else "Unknown Project"
-        
-        # Get matched user info if exists
-        if r.matched_user_id:
-            matched_result = await db.execute(select(User).where(User.id == r.matched_user_id))
-            matched = matched_result.scalar_one_or_none()
-            data["matched_user_login"] = matched.login if matched else None
-        
-        enriched.append(data)
-    
-    return enriched
+    rows = page.trim(result.all(), lambda row: (row[0].created_at, row[0].id))
+    return conditional.json(page.respond([_enriched_dict(row) for row in rows]))
 
 
 @router.get("/my")
+@query_budget(queries=2)
 async def list_my_recodes(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     user: User = Depends(get_current_user)
 ):
     """List current user's recode requests"""
     result = await db.execute(
-        select(RecodeRequest)
+        _enriched_query()
         .where(RecodeRequest.user_id == user.id)
         .order_by(RecodeRequest.created_at.desc())
     )
-    recodes = result.scalars().all()
-    
-    enriched = []
-    for r in recodes:
-        data = r.to_dict()
-        project_result = await db.execute(select(Project).where(Project.id == r.project_id))
-        project = project_result.scalar_one_or_none()
-        data["project_name"] = project.name if project else "Unknown Project"
-        enriched.append(data)
-    
-    return enriched
+    return [_enriched_dict(row) for row in result.all()]
 
 
 @router.get("/campuses")
+@query_budget(queries=0)
 async def list_campuses():
     """List available 42/1337 campuses"""
-    return [
-        {"id": "khouribga", "name": "1337 Khouribga"},
-        {"id": "benguerir", "name": "1337 Ben Guerir"},
-        {"id": "tetouan", "name": "1337 Tetouan"},
-        {"id": "med", "name": "1337 MED"},
-        {"id": "rabat", "name": "1337 Rabat"},
-        {"id": "paris", "name": "42 Paris"},
-        {"id": "lyon", "name": "42 Lyon"},
-        {"id": "nice", "name": "42 Nice"},
-        {"id": "berlin", "name": "42 Berlin"},
-        {"id": "london", "name": "42 London"},
-        {"id": "tokyo", "name": "42 Tokyo"},
-        {"id": "seoul", "name": "42 Seoul"},
-        {"id": "other", "name": "Other"},
-    ]
+    return CAMPUSES
 
 
 @router.get("/platforms")
+@query_budget(queries=0)
 async def list_platforms():
     """List available meeting platforms"""
-    return [
-        {"id": "discord", "name": "Discord", "icon": "🎮"},
-        {"id": "google_meet", "name": "Google Meet", "icon": "📹"},
-        {"id": "zoom", "name": "Zoom", "icon": "💻"},
-        {"id": "teams", "name": "Microsoft Teams", "icon": "👥"},
-        {"id": "slack", "name": "Slack Huddle", "icon": "💬"},
-        {"id": "in_person", "name": "In Person", "icon": "🏫"},
-        {"id": "other", "name": "Other", "icon": "🔗"},
-    ]
+    return PLATFORMS
 
 
 @router.post("")
+@query_budget(queries=4)
 async def create_recode(
     data: RecodeCreate,
     db: AsyncSession = Depends(get_db),
@@ -162,25 +172,35 @@ async def create_recode(
 
 
 @router.get("/{recode_id}")
-async def get_recode(recode_id: int, db: AsyncSession = Depends(get_db)):
+@query_budget(queries=2)
+async def get_recode(
+    recode_id: int,
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_read_db)
+):
     """Get a single recode request"""
-    result = await db.execute(select(RecodeRequest).where(RecodeRequest.id == recode_id))
-    recode = result.scalar_one_or_none()
-    if not recode:
+    if conditional.requested:
+        result = await db.execute(_enriched_query(*VERSION_COLUMNS).where(RecodeRequest.id == recode_id))
+        version = result.one_or_none()
+        if not version:
+            raise HTTPException(status_code=404, detail="Recode request not found")
+        etag = version_etag("recode", *version)
+        if conditional.matches(etag):
+            return conditional.not_modified(etag)
+
+    result = await db.execute(
+        _enriched_query().add_columns(*VERSION_COLUMNS[1:]).where(RecodeRequest.id == recode_id)
+    )
+    row = result.one_or_none()
+    if not row:
         raise HTTPException(status_code=404, detail="Recode request not found")
     
-    data = recode.to_dict()
-    
-    # Enrich with user info
-    user_result = await db.execute(select(User).where(User.id == recode.user_id))
-    user = user_result.scalar_one_or_none()
-    data["user_login"] = user.login if user else "Unknown"
-    data["user_image"] = user.avatar_url if user else None
-    
-    return data
+    etag = version_etag("recode", row[0].xmin, *row[5:])
+    return conditional.json(_enriched_dict(row[:5]), etag)
 
 
 @router.put("/{recode_id}")
+@query_budget(queries=4)
 async def update_recode(
     recode_id: int,
     data: RecodeUpdate,
@@ -212,6 +232,7 @@ async def update_recode(
 
 
 @router.post("/{recode_id}/accept")
+@query_budget(queries=4)
 async def accept_recode(
     recode_id: int,
     db: AsyncSession = Depends(get_db),
@@ -230,11 +251,14 @@ async def accept_recode(
     recode.status = "matched"
     recode.matched_user_id = user.id
     await db.commit()
-    
+    # updated_at was set by the UPDATE, reload it rather than lazy-load it
+    await db.refresh(recode)
+
     return {"message": "You've accepted to recode!", "recode": recode.to_dict()}
 
 
 @router.post("/{recode_id}/complete")
+@query_budget(queries=3)
 async def complete_recode(
     recode_id: int,
     db: AsyncSession = Depends(get_db),
@@ -254,6 +278,7 @@ async def complete_recode(
 
 
 @router.post("/{recode_id}/cancel")
+@query_budget(queries=3)
 async def cancel_recode(
     recode_id: int,
     db: AsyncSession = Depends(get_db),
@@ -273,6 +298,7 @@ async def cancel_recode(
 
 
 @router.delete("/{recode_id}")
+@query_budget(queries=3)
 async def delete_recode(
     recode_id: int,
     db: AsyncSession = Depends(get_db),
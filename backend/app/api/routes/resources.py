@@ -2,14 +2,22 @@
 # This file is for: ZERO (Backend Dev 2)
 # Description: Learning resources hub with upvote/downvote system
 
+from typing import Literal
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.database import get_db
+from sqlalchemy import select, update, delete
+from sqlalchemy.sql import func
+from app.database import get_db, get_read_db
 from app.models.resource import Resource, ResourceType
 from app.models.resource_vote import ResourceVote
 from app.models.user import User
 from app.middleware.auth import get_current_user, get_current_user_optional
+from app.api.budgets import query_budget
+from app.api.conditional import Conditional
+from app.api.pagination import Page, MAX_LIMIT
+from app.schemas.rows import ResourceRow
+from app.services.cache import response_cache, cache_key
+from app.services.ranking import hot_rank
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/resources", tags=["Resources"])
@@ -28,15 +36,34 @@ class VoteRequest(BaseModel):
 
 
 @router.get("")
-async def list_resources(project_id: int | None = None, db: AsyncSession = Depends(get_db)):
-    query = select(Resource)
+@query_budget(queries=1, rows=MAX_LIMIT + 1)
+async def list_resources(
+    project_id: int | None = None,
+    sort: Literal["top", "hot"] = "top",
+    page: Page = Depends(),
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_read_db)
+):
+    key = cache_key("resources", project_id, sort, page.limit, page.cursor)
+    cached = response_cache.get(key)
+    if cached:
+        return conditional.respond(cached)
+
+    rank = Resource.hot_rank if sort == "hot" else Resource.score
+    query = ResourceRow.select()
+    if sort == "hot":
+        # Not part of the body, but the next page's cursor is built from it
+        query = query.add_columns(Resource.hot_rank)
     if project_id:
         query = query.where(Resource.project_id == project_id)
-    query = query.order_by((Resource.upvotes - Resource.downvotes).desc())
+    query = page.apply(query, rank, Resource.id)
     result = await db.execute(query)
-    return [r.to_dict() for r in result.scalars().all()]
+    rows = page.trim(result, lambda values: (getattr(values, rank.key), values.id))
+    resources = ResourceRow.from_result(rows)
+    return conditional.respond(response_cache.put(key, page.respond([r.to_dict() for r in resources]), tags=["resources"]))
 
 @router.post("")
+@query_budget(queries=3)
 async def create_resource(
     data: ResourceCreate,
     db: AsyncSession = Depends(get_db),
@@ -49,13 +76,16 @@ async def create_resource(
         resource_type=ResourceType(data.resource_type),
         project_id=data.project_id,
         user_id=user.id,
+        hot_rank=hot_rank(0, func.now()),
     )
     db.add(resource)
     await db.commit()
     await db.refresh(resource)
+    response_cache.invalidate("resources")
     return resource.to_dict()
 
 @router.post("/{resource_id}/vote")
+@query_budget(queries=6)
 async def vote_resource(
     resource_id: int,
     data: VoteRequest,
@@ -75,35 +105,37 @@ async def vote_resource(
     )
     existing_vote = result.scalar_one_or_none()
 
+    up = 1 if data.is_upvote else 0
+    down = 1 - up
     if existing_vote:
         if existing_vote.is_upvote == data.is_upvote:
-            if existing_vote.is_upvote:
-                resource.upvotes -= 1
-            else:
-                resource.downvotes -= 1
+            up, down = -up, -down
             await db.delete(existing_vote)
         else:
-            if data.is_upvote:
-                resource.upvotes += 1
-                resource.downvotes -= 1
-            else:
-                resource.upvotes -= 1
-                resource.downvotes += 1
+            up, down = up - down, down - up
             existing_vote.is_upvote = data.is_upvote
     else:
-        vote = ResourceVote(resource_id=resource_id, user_id=user.id, is_upvote=data.is_upvote)
-        db.add(vote)
-        if data.is_upvote:
-            resource.upvotes += 1
-        else:
-            resource.downvotes += 1
+        db.add(ResourceVote(resource_id=resource_id, user_id=user.id, is_upvote=data.is_upvote))
 
+    # Relative to the row's current values, so concurrent votes don't
+    # overwrite each other; SET sees the pre-update score on both sides
+    score = Resource.score + (up - down)
+    await db.execute(
+        update(Resource).where(Resource.id == resource_id).values(
+            upvotes=Resource.upvotes + up,
+            downvotes=Resource.downvotes + down,
+            score=score,
+            hot_rank=hot_rank(score, Resource.created_at),
+        )
+    )
     await db.commit()
     await db.refresh(resource)
+    response_cache.invalidate("resources")
     return resource.to_dict()
 
 
 @router.delete("/{resource_id}")
+@query_budget(queries=5)
 async def delete_resource(
     resource_id: int,
     db: AsyncSession = Depends(get_db),
@@ -115,7 +147,10 @@ async def delete_resource(
         raise HTTPException(status_code=404, detail="Resource not found")
     if resource.user_id != user.id and not user.is_staff:
         raise HTTPException(status_code=403, detail="Not authorized")
-    
+
+    # Ballots reference the resource
+    await db.execute(delete(ResourceVote).where(ResourceVote.resource_id == resource_id))
     await db.delete(resource)
     await db.commit()
+    response_cache.invalidate("resources")
     return {"message": "Deleted"}
@@ -5,10 +5,16 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.test import Test
 from app.models.user import User
 from app.middleware.auth import get_current_user, get_staff_user
+from app.api.budgets import query_budget
+from app.api.conditional import Conditional
+from app.api.pagination import Page, MAX_LIMIT
+from app.schemas.rows import TestRow
+from app.services.cache import JSONBytesResponse, response_cache, cache_key
+from app.services.counters import download_counter
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/tests", tags=["Tests"])
@@ -22,32 +28,43 @@ class TestCreate(BaseModel):
 
 
 @router.get("")
+@query_budget(queries=1, rows=MAX_LIMIT + 1)
 async def list_tests(
     project_id: int | None = None,
     approved_only: bool = True,
-    db: AsyncSession = Depends(get_db)
+    page: Page = Depends(),
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = select(Test)
+    key = cache_key("tests", project_id, approved_only, page.limit, page.cursor)
+    cached = response_cache.get(key)
+    if cached:
+        return conditional.respond(cached)
+
+    query = TestRow.select()
     if project_id:
         query = query.where(Test.project_id == project_id)
     if approved_only:
         query = query.where(Test.is_approved == True)
-    query = query.order_by(Test.downloads.desc())
+    query = page.apply(query, Test.downloads, Test.id)
     result = await db.execute(query)
-    return [t.to_dict() for t in result.scalars().all()]
+    tests = page.trim(TestRow.from_result(result), lambda t: (t.downloads, t.id))
+    return conditional.respond(response_cache.put(key, page.respond([t.to_dict() for t in tests]), tags=["tests"]))
 
 
 @router.get("/pending")
+@query_budget(queries=2)
 async def list_pending_tests(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     user: User = Depends(get_staff_user)
 ):
     """Staff only: List tests awaiting approval"""
-    result = await db.execute(select(Test).where(Test.is_approved == False))
-    return [t.to_dict() for t in result.scalars().all()]
+    result = await db.execute(TestRow.select().where(Test.is_approved == False))
+    return JSONBytesResponse([t.to_dict() for t in TestRow.from_result(result)])
 
 
 @router.post("")
+@query_budget(queries=3)
 async def create_test(
     data: TestCreate,
     db: AsyncSession = Depends(get_db),
@@ -64,10 +81,12 @@ async def create_test(
     db.add(test)
     await db.commit()
     await db.refresh(test)
+    response_cache.invalidate("tests")
     return test.to_dict()
 
 
 @router.post("/{test_id}/approve")
+@query_budget(queries=3)
 async def approve_test(
     test_id: int,
     db: AsyncSession = Depends(get_db),
@@ -81,10 +100,12 @@ async def approve_test(
     test.is_approved = True
     test.approved_by = user.id
     await db.commit()
+    response_cache.invalidate("tests")
     return {"message": "Test approved"}
 
 
 @router.post("/{test_id}/reject")
+@query_budget(queries=3)
 async def reject_test(
     test_id: int,
     db: AsyncSession = Depends(get_db),
@@ -97,10 +118,12 @@ async def reject_test(
 
     await db.delete(test)
     await db.commit()
+    response_cache.invalidate("tests")
     return {"message": "Test rejected and deleted"}
 
 @router.post("/{test_id}/download")
-async def download_test(test_id: int, db: AsyncSession = Depends(get_db)):
+@query_budget(queries=1)
+async def download_test(test_id: int, db: AsyncSession = Depends(get_read_db)):
     result = await db.execute(select(Test).where(Test.id == test_id))
     test = result.scalar_one_or_none()
     if not test:
@@ -108,12 +131,13 @@ async def download_test(test_id: int, db: AsyncSession = Depends(get_db)):
     if not test.is_approved:
         raise HTTPException(status_code=403, detail="Test not approved")
 
-    test.downloads += 1
-    await db.commit()
-    return {"github_url": test.github_url, "downloads": test.downloads}
+    # Written in batches by the counter service, which also invalidates "tests"
+    download_counter.add(test.id)
+    return {"github_url": test.github_url, "downloads": test.downloads + download_counter.pending(test.id)}
 
 
 @router.delete("/{test_id}")
+@query_budget(queries=3)
 async def delete_test(
     test_id: int,
     db: AsyncSession = Depends(get_db),
@@ -128,4 +152,5 @@ async def delete_test(
 
     await db.delete(test)
     await db.commit()
+    response_cache.invalidate("tests")
     return {"message": "Deleted"}
\ No newline at end of file
@@ -6,12 +6,20 @@ from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime, timezone
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.subject_vote import SubjectVote, VoteStatus
 from app.models.vote_option import VoteOption
-from app.models.user_vote import UserVote
 from app.models.user import User
+from app.models.archive import AnySubjectVote, AnyVoteOption
 from app.middleware.auth import get_current_user, get_staff_user
+from app.api.budgets import query_budget
+from app.api.conditional import Conditional, version_etag
+from app.api.pagination import Page, MAX_LIMIT
+from app.schemas.rows import VoteRow
+from app.services.cache import response_cache, cache_key
+from app.services import ballot_service
+from app.services.tally_hub import tally_hub, open_stream
+from app.services.archiver import lock_either, purge
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/votes", tags=["Subject Votes"])
@@ -33,34 +41,120 @@ class StaffDecision(BaseModel):
     reason: str | None = None
 
 
+async def _vote_tally(db: AsyncSession, vote_id: int) -> dict | None:
+    """Live tally: status, winner and per-option counts, in one query
+    (archived votes included: they get their final frame)"""
+    result = await db.execute(
+        select(AnySubjectVote.status, AnySubjectVote.winning_option_id, AnyVoteOption.id, AnyVoteOption.vote_count)
+        .outerjoin(AnyVoteOption, AnyVoteOption.subject_vote_id == AnySubjectVote.id)
+        .where(AnySubjectVote.id == vote_id)
+        .order_by(AnyVoteOption.id)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    status, winning_option_id = rows[0][0], rows[0][1]
+    return {
+        "id": vote_id,
+        "status": status.value,
+        "winning_option_id": winning_option_id,
+        "options": [{"id": option_id, "vote_count": count} for _, _, option_id, count in rows if option_id],
+    }
+
+
+tally_hub.register("vote", _vote_tally)
+
+
 @router.get("")
-async def list_votes(project_id: int | None = None, status: str | None = None, db: AsyncSession = Depends(get_db)):
-    query = select(SubjectVote)
+@query_budget(queries=1, rows=MAX_LIMIT + 1)
+async def list_votes(
+    project_id: int | None = None,
+    status: str | None = None,
+    page: Page = Depends(),
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_read_db)
+):
+    key = cache_key("votes", project_id, status, page.limit, page.cursor)
+    cached = response_cache.get(key)
+    if cached:
+        return conditional.respond(cached)
+
+    # Only open votes are always hot; anything else may have been archived
+    if status == VoteStatus.OPEN.value:
+        vote, query = SubjectVote, VoteRow.select()
+    else:
+        vote, query = AnySubjectVote, VoteRow.select(VoteRow.any_columns)
     if project_id:
-        query = query.where(SubjectVote.project_id == project_id)
+        query = query.where(vote.project_id == project_id)
     if status:
-        query = query.where(SubjectVote.status == VoteStatus(status))
-    query = query.order_by(SubjectVote.created_at.desc())
+        query = query.where(vote.status == VoteStatus(status))
+    query = page.apply(query, vote.created_at, vote.id)
     result = await db.execute(query)
-    return [v.to_dict() for v in result.scalars().all()]
+    votes = page.trim(VoteRow.from_result(result), lambda v: (v.created_at, v.id))
+    return conditional.respond(response_cache.put(key, page.respond([v.to_dict() for v in votes]), tags=["votes"]))
+
+
+async def _vote_version(db: AsyncSession, vote_id: int) -> tuple | None:
+    """Row versions of the vote and its options, without loading either"""
+    result = await db.execute(
+        select(AnySubjectVote.xmin, AnyVoteOption.xmin)
+        .outerjoin(AnyVoteOption, AnyVoteOption.subject_vote_id == AnySubjectVote.id)
+        .where(AnySubjectVote.id == vote_id)
+        .order_by(AnyVoteOption.id)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    return rows[0][0], tuple(option_xmin for _, option_xmin in rows if option_xmin is not None)
 
 
 @router.get("/{vote_id}")
-async def get_vote(vote_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(SubjectVote).where(SubjectVote.id == vote_id))
+@query_budget(queries=3)
+async def get_vote(
+    vote_id: int,
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_read_db)
+):
+    key = cache_key("vote", vote_id)
+    cached = response_cache.get(key)
+    if cached:
+        return conditional.respond(cached)
+
+    if conditional.requested:
+        version = await _vote_version(db, vote_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Vote not found")
+        etag = version_etag("vote", *version)
+        if conditional.matches(etag):
+            return conditional.not_modified(etag)
+
+    # Closed votes may have moved to the archive tables: same query count
+    result = await db.execute(select(AnySubjectVote).where(AnySubjectVote.id == vote_id))
     vote = result.scalar_one_or_none()
     if not vote:
         raise HTTPException(status_code=404, detail="Vote not found")
     
-    options_result = await db.execute(select(VoteOption).where(VoteOption.subject_vote_id == vote_id))
-    options = [o.to_dict() for o in options_result.scalars().all()]
+    options_result = await db.execute(
+        select(AnyVoteOption).where(AnyVoteOption.subject_vote_id == vote_id).order_by(AnyVoteOption.id)
+    )
+    options = options_result.scalars().all()
     
     vote_dict = vote.to_dict()
-    vote_dict["options"] = options
-    return vote_dict
+    vote_dict["options"] = [o.to_dict() for o in options]
+    etag = version_etag("vote", vote.xmin, tuple(o.xmin for o in options))
+    return conditional.respond(response_cache.put(key, vote_dict, tags=[f"vote:{vote_id}"], etag=etag))
+
+
+@router.get("/{vote_id}/stream")
+@query_budget(queries=1)
+async def stream_vote(vote_id: int):
+    """Server-Sent Events: a `tally` frame now and after every change,
+    ending with the one that closes the vote (or `gone` if it is deleted)"""
+    return await open_stream(f"vote:{vote_id}", "Vote not found")
 
 
 @router.post("")
+@query_budget(queries=4)
 async def create_vote(
     data: VoteCreate,
     db: AsyncSession = Depends(get_db),
@@ -84,53 +178,37 @@ async def create_vote(
 
     await db.commit()
     await db.refresh(vote)
+    response_cache.invalidate("votes")
     return vote.to_dict()
 
 
 @router.post("/{vote_id}/cast")
+@query_budget(queries=3)
 async def cast_vote(
     vote_id: int,
     data: CastVote,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
-    # Check vote exists and is open
-    result = await db.execute(select(SubjectVote).where(SubjectVote.id == vote_id))
-    vote = result.scalar_one_or_none()
-    if not vote:
+    # Ballot upsert and vote_count moves happen in one statement
+    outcome = await ballot_service.cast_subject_vote(db, vote_id, data.option_id, user.id)
+    if outcome == ballot_service.NOT_FOUND:
         raise HTTPException(status_code=404, detail="Vote not found")
-    if vote.status != VoteStatus.OPEN:
+    if outcome == ballot_service.CLOSED:
         raise HTTPException(status_code=400, detail="Vote is closed")
-
-    result = await db.execute(select(VoteOption).where(VoteOption.id == data.option_id))
-    option = result.scalar_one_or_none()
-    if not option or option.subject_vote_id != vote_id:
+    if outcome == ballot_service.INVALID_OPTION:
         raise HTTPException(status_code=400, detail="Invalid option")
-
-    # Check if user already voted
-    result = await db.execute(
-        select(UserVote).where(UserVote.subject_vote_id == vote_id, UserVote.user_id == user.id)
-    )
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        # Change vote
-        old_option = await db.execute(select(VoteOption).where(VoteOption.id == existing.option_id))
-        old_opt = old_option.scalar_one()
-        old_opt.vote_count -= 1
-        existing.option_id = data.option_id
-        option.vote_count += 1
-    else:
-        # New vote
-        user_vote = UserVote(subject_vote_id=vote_id, option_id=data.option_id, user_id=user.id)
-        db.add(user_vote)
-        option.vote_count += 1
+    if outcome == ballot_service.CONFLICT:
+        raise HTTPException(status_code=409, detail="Vote changed concurrently, try again")
 
     await db.commit()
+    response_cache.invalidate(f"vote:{vote_id}")
+    tally_hub.publish(f"vote:{vote_id}")
     return {"message": "Vote cast"}
 
 
 @router.post("/{vote_id}/staff-decision")
+@query_budget(queries=3)
 async def staff_decision(
     vote_id: int,
     data: StaffDecision,
@@ -150,10 +228,13 @@ async def staff_decision(
     vote.closed_at = datetime.now(timezone.utc)
 
     await db.commit()
+    response_cache.invalidate("votes", f"vote:{vote_id}")
+    tally_hub.publish(f"vote:{vote_id}")
     return {"message": "Staff decision applied - THIS IS FINAL"}
 
 
 @router.post("/{vote_id}/close")
+@query_budget(queries=4)
 async def close_vote(
     vote_id: int,
     db: AsyncSession = Depends(get_db),
@@ -177,6 +258,8 @@ async def close_vote(
     vote.status = VoteStatus.CLOSED
     vote.closed_at = datetime.now(timezone.utc)
     await db.commit()
+    response_cache.invalidate("votes", f"vote:{vote_id}")
+    tally_hub.publish(f"vote:{vote_id}")
     return {"message": "Vote closed"}
 
 
@@ -186,6 +269,7 @@ class VoteUpdate(BaseModel):
 
 
 @router.put("/{vote_id}")
+@query_budget(queries=4)
 async def update_vote(
     vote_id: int,
     data: VoteUpdate,
@@ -209,28 +293,24 @@ async def update_vote(
 
     await db.commit()
     await db.refresh(vote)
+    response_cache.invalidate("votes", f"vote:{vote_id}")
     return vote.to_dict()
 
 
 @router.delete("/{vote_id}")
+@query_budget(queries=3)
 async def delete_vote(
     vote_id: int,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_staff_user)
 ):
-    """Delete a vote - STAFF ONLY"""
-    result = await db.execute(select(SubjectVote).where(SubjectVote.id == vote_id))
-    vote = result.scalar_one_or_none()
-    if not vote:
+    """Delete a vote, hot or archived, with its options, ballots and comments - STAFF ONLY"""
+    hot_id, archived_id = (await db.execute(lock_either("votes", vote_id))).one()
+    if hot_id is None and archived_id is None:
         raise HTTPException(status_code=404, detail="Vote not found")
 
-    # Delete associated options and user votes first
-    await db.execute(select(UserVote).where(UserVote.subject_vote_id == vote_id))
-    await db.execute(select(VoteOption).where(VoteOption.subject_vote_id == vote_id))
-    
-    from sqlalchemy import delete
-    await db.execute(delete(UserVote).where(UserVote.subject_vote_id == vote_id))
-    await db.execute(delete(VoteOption).where(VoteOption.subject_vote_id == vote_id))
-    await db.delete(vote)
+    await db.execute(purge("votes", vote_id, archived=hot_id is None))
     await db.commit()
+    response_cache.invalidate("votes", f"vote:{vote_id}")
+    tally_hub.publish(f"vote:{vote_id}")
     return {"message": "Vote deleted"}
\ No newline at end of file
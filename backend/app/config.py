@@ -10,6 +10,35 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    # Optional read replica for read-only routes. Replica lag can outlive a
+    # cache invalidation, so keep CACHE_TTL short when this is set
+    DATABASE_READ_URL: str | None = None
+    # Connection pool (per worker, applied to the primary and the replica).
+    # Size it from GET /api/internal/pool: sustained checkout waits mean too small
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # asyncpg prepared statements kept per connection; set 0 behind pgbouncer
+    # in transaction mode
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Apply pending migrations at startup (advisory-locked, so one worker
+    # runs them). Turn off to migrate from the release step instead:
+    # python -m app.migrations upgrade
+    DB_AUTO_MIGRATE: bool = True
+    # Log a warning when one statement shape runs more often than this in a
+    # single request (X-DB-Queries / X-DB-Time-Ms headers are development only)
+    N_PLUS_ONE_THRESHOLD: int = 10
+    # Endpoints over their @query_budget are always logged; strict mode
+    # answers 500 instead (CI smoke runs and benchmarks)
+    QUERY_BUDGET_STRICT: bool = False
+    # Slow-query log (0 disables). EXPLAIN (ANALYZE, BUFFERS) re-runs a
+    # sampled share of slow reads, so it costs DB time: keep the sample small
+    SLOW_QUERY_MS: float = 200
+    SLOW_QUERY_BUFFER: int = 50
+    SLOW_QUERY_EXPLAIN: bool = False
+    SLOW_QUERY_EXPLAIN_SAMPLE: float = 0.1
     
     # 42 OAuth API
     FT_CLIENT_ID: str
@@ -19,15 +48,66 @@ class Settings(BaseSettings):
     FT_AUTH_URL: str = "https://api.intra.42.fr/oauth/authorize"
     FT_TOKEN_URL: str = "https://api.intra.42.fr/oauth/token"
     FT_API_URL: str = "https://api.intra.42.fr/v2"
+    # 42 API client: the default app quota is 2 requests/second
+    FT_API_RATE_LIMIT: float = 2.0
+    FT_API_BURST: int = 2
+    FT_API_MAX_CONCURRENCY: int = 4
+    FT_API_MAX_RETRIES: int = 3
+    FT_API_TIMEOUT: float = 30.0
     
     # JWT Settings
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION: int = 86400
+
+    # Authenticated-user cache (per worker)
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_TTL: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
     
     # Frontend URL
     FRONTEND_URL: str
 
+    # Response cache (per worker)
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    CACHE_TTL: int = 60
+    # Cross-worker invalidation over LISTEN/NOTIFY. LISTEN needs a session
+    # connection, so point CACHE_BUS_URL at a direct (non-pgbouncer) port
+    CACHE_BUS_ENABLED: bool = False
+    CACHE_BUS_URL: str | None = None
+
+    # Write-behind counters (test downloads): a crash loses at most one interval
+    COUNTER_FLUSH_INTERVAL: float = 2.0
+    COUNTER_FLUSH_THRESHOLD: int = 1000
+
+    # Live tally streams (SSE): publishes within the window share one frame
+    TALLY_COALESCE_MS: int = 250
+    TALLY_KEEPALIVE: float = 15.0
+    TALLY_MAX_SUBSCRIBERS: int = 10000
+    # EventSource cannot send headers: streams take a one-time ticket that
+    # must be redeemed within this many seconds
+    STREAM_TICKET_TTL: int = 30
+
+    # Archival: votes/disputes closed longer than this move to the archived_*
+    # tables (still served by get_vote/get_dispute). Off by default; the
+    # one-off form is python -m app.services.archiver
+    ARCHIVE_ENABLED: bool = False
+    ARCHIVE_AFTER_DAYS: int = 90
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_INTERVAL: float = 3600.0
+
+    # Bulk exports (staff): rows per server-side cursor fetch, which is also
+    # the resume granularity (one gzip member per batch)
+    EXPORT_BATCH_ROWS: int = 1000
+    EXPORT_GZIP_LEVEL: int = 6
+
+    # /metrics scrape endpoint. Optional bearer token for the scraper;
+    # METRICS_DIR (shared by the workers of one host) aggregates them
+    METRICS_TOKEN: str | None = None
+    METRICS_DIR: str | None = None
+    METRICS_FLUSH_INTERVAL: float = 5.0
+
     @property
     def is_production(self) -> bool:
         return self.ENV.lower() == "production"
@@ -1,13 +1,55 @@
 # 1337Jury - Database
+from sqlalchemy import Column, FetchedValue, Integer
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.config import settings
+from app.services.pool_metrics import PoolMetrics, metered_pool
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
+
+def _create_engine(url: str, metrics: PoolMetrics, **kwargs):
+    return create_async_engine(
+        url,
+        echo=False,
+        poolclass=metered_pool(metrics),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+        **kwargs,
+    )
+
+
+engine = _create_engine(settings.DATABASE_URL, PoolMetrics("primary"))
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
 
+def row_version() -> Column:
+    """Postgres' xmin, mapped read-only: the id of the transaction that last
+    wrote the row, so every UPDATE changes it (a physical replica sees the
+    same value). Serves as the row version behind ETags; system=True keeps
+    it out of CREATE TABLE."""
+    return Column("xmin", Integer, system=True, server_default=FetchedValue(), server_onupdate=FetchedValue())
+
+# Reads run in autocommit mode: no BEGIN/COMMIT round trips per request.
+# Without a replica they share the primary's pool.
+if settings.DATABASE_READ_URL:
+    read_engine = _create_engine(settings.DATABASE_READ_URL, PoolMetrics("replica"), isolation_level="AUTOCOMMIT")
+else:
+    read_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+ReadSessionLocal = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+
+def pool_stats() -> list[dict]:
+    engines = [engine] if read_engine.sync_engine.pool is engine.sync_engine.pool else [engine, read_engine]
+    return [e.sync_engine.pool.metrics.snapshot(e.sync_engine.pool) for e in engines]
+
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
@@ -18,6 +60,8 @@ async def get_db():
             raise
 
 
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+async def get_read_db():
+    """Session for read-only routes; writes must keep using get_db"""
+    async with ReadSessionLocal() as session:
+        yield session
+
@@ -0,0 +1,159 @@
+# 1337Jury - Bulk Exports
+# This file is for: ADMIRAL (Backend Dev 1) & ZERO (Backend Dev 2)
+# Description: Streams whole tables (with their ballots) as NDJSON or CSV, optionally gzipped
+#
+#   GET /api/exports/{kind}?format=ndjson|csv&after=<id>&gzip=true   (staff)
+#   python -m app.exports votes --out votes.ndjson.gz [--resume]
+
+import csv
+import enum
+import gzip
+import io
+from dataclasses import dataclass
+from datetime import date
+from typing import AsyncIterator
+from sqlalchemy import JSON, Enum, String, case, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from app.config import settings
+from app.database import read_engine
+from app.models.archive import AnyDispute, AnyDisputeVote, AnySubjectVote, AnyUserVote, AnyVoteOption
+from app.models.comment import Comment
+from app.models.recode_request import RecodeRequest
+from app.services.cache import encode_json
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def _json_value(column):
+    # Enums are stored by name; the API (and the top-level columns) use values
+    if isinstance(column.type, Enum) and column.type.enum_class is not None:
+        return case({m.name: m.value for m in column.type.enum_class}, value=cast(column, String))
+    return column
+
+
+def _nested(order_by, where, **fields):
+    """Child rows of one parent as a JSON array, built by Postgres"""
+    obj = func.json_build_object(*(part for name, column in fields.items() for part in (name, _json_value(column))))
+    agg = func.coalesce(func.json_agg(aggregate_order_by(obj, order_by)), literal_column("'[]'::json"))
+    return select(agg).where(where).scalar_subquery().cast(JSON)
+
+
+@dataclass
+class Export:
+    """A table read in primary key order; `after` resumes past a key.
+    Votes and disputes read through the archive views, so an export also
+    covers what the archiver has moved."""
+
+    name: str
+    key: object
+    columns: tuple
+
+    @property
+    def fieldnames(self) -> list[str]:
+        return [column.key for column in self.columns]
+
+    def query(self, after: int | None = None):
+        query = select(*self.columns).order_by(self.key)
+        if after is not None:
+            query = query.where(self.key > after)
+        return query
+
+
+EXPORTS = {
+    export.name: export for export in [
+        Export("votes", AnySubjectVote.id, (
+            AnySubjectVote.id, AnySubjectVote.title, AnySubjectVote.description, AnySubjectVote.project_id,
+            AnySubjectVote.user_id, AnySubjectVote.status, AnySubjectVote.winning_option_id,
+            AnySubjectVote.staff_decision_by, AnySubjectVote.staff_decision_reason,
+            AnySubjectVote.comment_count, AnySubjectVote.created_at, AnySubjectVote.closed_at,
+            _nested(
+                AnyVoteOption.id, AnyVoteOption.subject_vote_id == AnySubjectVote.id,
+                id=AnyVoteOption.id, text=AnyVoteOption.text, vote_count=AnyVoteOption.vote_count,
+            ).label("options"),
+            _nested(
+                AnyUserVote.id, AnyUserVote.subject_vote_id == AnySubjectVote.id,
+                user_id=AnyUserVote.user_id, option_id=AnyUserVote.option_id, created_at=AnyUserVote.created_at,
+            ).label("ballots"),
+        )),
+        Export("disputes", AnyDispute.id, (
+            AnyDispute.id, AnyDispute.title, AnyDispute.description, AnyDispute.project_id,
+            AnyDispute.corrector_id, AnyDispute.corrected_id, AnyDispute.created_by, AnyDispute.status,
+            AnyDispute.winner, AnyDispute.corrector_votes, AnyDispute.corrected_votes,
+            AnyDispute.staff_decision_by, AnyDispute.staff_decision_reason, AnyDispute.comment_count,
+            AnyDispute.created_at, AnyDispute.closed_at,
+            _nested(
+                AnyDisputeVote.id, AnyDisputeVote.dispute_id == AnyDispute.id,
+                user_id=AnyDisputeVote.user_id, vote_for=AnyDisputeVote.vote_for, created_at=AnyDisputeVote.created_at,
+            ).label("ballots"),
+        )),
+        Export("comments", Comment.id, (
+            Comment.id, Comment.content, Comment.user_id, Comment.vote_id,
+            Comment.dispute_id, Comment.parent_id, Comment.created_at,
+        )),
+        Export("recodes", RecodeRequest.id, (
+            RecodeRequest.id, RecodeRequest.user_id, RecodeRequest.project_id, RecodeRequest.campus,
+            RecodeRequest.meeting_platform, RecodeRequest.meeting_link, RecodeRequest.description,
+            RecodeRequest.status, RecodeRequest.matched_user_id, RecodeRequest.created_at,
+            RecodeRequest.updated_at,
+        )),
+    ]
+}
+
+
+async def export_batches(export: Export, after: int | None = None) -> AsyncIterator[list]:
+    """Rows in batches of EXPORT_BATCH_ROWS from a server-side cursor, so
+    memory holds one batch however big the table is"""
+    async with read_engine.connect() as conn:
+        # One snapshot for the whole export, from the replica when there is
+        # one. Server-side cursors also need the transaction, which the
+        # autocommit read engine does not open by itself.
+        await conn.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+        result = await conn.stream(export.query(after).execution_options(yield_per=settings.EXPORT_BATCH_ROWS))
+        async for batch in result.partitions():
+            yield batch
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return encode_json(value).decode("utf-8")
+    return value
+
+
+def _compress(chunk: bytes) -> bytes:
+    return gzip.compress(chunk, compresslevel=settings.EXPORT_GZIP_LEVEL, mtime=0)
+
+
+def encode_batch(export: Export, batch: list, fmt: str, header: bool = False) -> bytes:
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out)
+        if header:
+            writer.writerow(export.fieldnames)
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        return out.getvalue().encode("utf-8")
+    return b"".join(encode_json(row._asdict()) + b"\n" for row in batch)
+
+
+async def export_chunks(
+    export: Export, fmt: str, after: int | None = None, compress: bool = False, header: bool = True
+) -> AsyncIterator[tuple[bytes, int, int]]:
+    """(chunk, rows in it, last key) per batch.
+
+    With compress every chunk is a complete gzip member. Concatenated
+    members are one valid .gz file, so a download or a CLI run cut short
+    can be truncated to its last whole chunk and continued after its key.
+    """
+    header = header and fmt == "csv"
+    async for batch in export_batches(export, after):
+        chunk = encode_batch(export, batch, fmt, header)
+        header = False
+        yield _compress(chunk) if compress else chunk, len(batch), getattr(batch[-1], export.key.key)
+    if header:
+        # Nothing past the key: still a well-formed (empty) CSV
+        chunk = encode_batch(export, [], fmt, header)
+        yield _compress(chunk) if compress else chunk, 0, after
@@ -0,0 +1,82 @@
+# 1337Jury - Bulk Export CLI
+# This file is for: ADMIRAL (Backend Dev 1)
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from app.database import engine, read_engine
+from app.exports import EXPORTS, FORMATS, export_chunks
+
+
+def _save_checkpoint(path: str, state: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+async def export(args) -> None:
+    """Writes the export to --out (or stdout).
+
+    With --out, a checkpoint next to the file records the last key and the
+    file size after every chunk that reached the disk. --resume truncates
+    the file back to that size, dropping a half-written chunk, and carries
+    on after that key.
+    """
+    compress = args.gzip or (args.out or "").endswith(".gz")
+    checkpoint = args.out + ".checkpoint" if args.out else None
+    state = {"kind": args.kind, "format": args.format, "gzip": compress, "after": args.after, "rows": 0, "offset": 0}
+    if args.resume:
+        if not checkpoint or not os.path.exists(checkpoint):
+            raise SystemExit("Nothing to resume: no checkpoint next to --out")
+        with open(checkpoint) as f:
+            saved = json.load(f)
+        if (saved["kind"], saved["format"], saved["gzip"]) != (args.kind, args.format, compress):
+            raise SystemExit(f"{checkpoint} is for a {saved['kind']} {saved['format']} export")
+        state = saved
+
+    out = open(args.out, "r+b" if args.resume else "wb") if args.out else sys.stdout.buffer
+    try:
+        if args.resume:
+            out.truncate(state["offset"])
+            out.seek(state["offset"])
+        chunks = export_chunks(EXPORTS[args.kind], args.format, state["after"], compress, header=state["offset"] == 0)
+        async for chunk, rows, key in chunks:
+            out.write(chunk)
+            state["rows"] += rows
+            state["after"] = key
+            if checkpoint:
+                out.flush()
+                os.fsync(out.fileno())
+                state["offset"] = out.tell()
+                _save_checkpoint(checkpoint, state)
+    except BaseException:
+        where = "--resume" if checkpoint else f"--after {state['after']}"
+        print(f"⚠️ Export stopped after {state['rows']} rows (key {state['after']}), continue with {where}", file=sys.stderr)
+        raise
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        await engine.dispose()
+        if read_engine.sync_engine.pool is not engine.sync_engine.pool:
+            await read_engine.dispose()
+
+    if checkpoint:
+        os.remove(checkpoint)
+    print(f"Exported {state['rows']} {args.kind} rows" + (f" to {args.out}" if args.out else ""), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.exports")
+    parser.add_argument("kind", choices=sorted(EXPORTS))
+    parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+    parser.add_argument("--out", help="file to write (default: stdout); a .gz name implies --gzip")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--after", type=int, help="start after this id")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted --out export")
+    args = parser.parse_args()
+    if args.resume and args.after is not None:
+        parser.error("--resume already knows where to start; drop --after")
+    asyncio.run(export(args))
@@ -2,26 +2,51 @@
 # This file is for: ADMIRAL (Backend Dev 1)
 # Description: FastAPI main application with CORS and route registration
 
+import sys
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.database import init_db
-from app.api.routes import auth, projects, resources, votes, disputes, tests, comments, recodes
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.api.budgets import query_budget
+from app.migrations import ensure_schema
+from app.services.archiver import archiver
+from app.services.cache_bus import cache_bus
+from app.services.counters import download_counter
+from app.services.ft_api import ft_api
+from app.services.metrics import metrics
+from app.api.routes import auth, projects, resources, votes, disputes, tests, comments, recodes, internal, exports
+from app.api.routes import metrics as metrics_routes
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     try:
-        await init_db()
-        print("✅ Database initialized")
+        await ensure_schema()
     except Exception as e:
-        print(f"⚠️ DB Error: {e}")
+        print(f"⚠️ DB Error: {e}", file=sys.stderr)
+    if settings.CACHE_BUS_ENABLED:
+        await cache_bus.start()
+    await ft_api.start()
+    await metrics.start()
+    await download_counter.start()
+    if settings.ARCHIVE_ENABLED:
+        await archiver.start()
     yield
+    await archiver.stop()
+    await download_counter.stop()
+    await metrics.stop()
+    await ft_api.close()
+    if settings.CACHE_BUS_ENABLED:
+        await cache_bus.stop()
 
 
 app = FastAPI(title="LeetJury API", version="1.0.0", lifespan=lifespan)
 
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -43,8 +68,12 @@ app.include_router(disputes.router, prefix="/api")
 app.include_router(tests.router, prefix="/api")
 app.include_router(comments.router, prefix="/api")
 app.include_router(recodes.router, prefix="/api")
+app.include_router(internal.router, prefix="/api")
+app.include_router(exports.router, prefix="/api")
+app.include_router(metrics_routes.router)
 
 
 @app.get("/")
+@query_budget(queries=0)
 async def root():
     return {"name": "LeetJury API", "status": "running"}
\ No newline at end of file
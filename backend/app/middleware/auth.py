@@ -2,13 +2,14 @@
 # This file is for: ADMIRAL (Backend Dev 1)
 # Description: JWT authentication and authorization middleware
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal
 from app.models.user import User
-from app.services.jwt_service import verify_token
+from app.services.auth_cache import auth_cache
+from app.services import stream_tickets
 
 security = HTTPBearer(auto_error=False)
 
@@ -19,8 +20,12 @@ async def get_current_user(
 ) -> User:
     if not credentials:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    
-    payload = verify_token(credentials.credentials)
+    return await _resolve_user(credentials.credentials, db)
+
+
+async def _resolve_user(token: str, db: AsyncSession) -> User:
+    # Decoded payloads are memoized per token until it expires
+    payload = auth_cache.decode(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid token")
     
@@ -28,12 +33,32 @@ async def get_current_user(
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid token")
     
+    user = auth_cache.get_user(int(user_id))
+    if user:
+        return user
+
     result = await db.execute(select(User).where(User.id == int(user_id)))
     user = result.scalar_one_or_none()
     
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="User not found or inactive")
     
+    auth_cache.put_user(user)
+    return user
+
+
+async def get_stream_user(ticket: str | None = Query(None)) -> User:
+    """For EventSource streams, which cannot send headers: ?ticket=<one-time
+    ticket> from POST /api/auth/stream-ticket, so the JWT never appears in a
+    URL (or the access logs). Uses its own short session so an open stream
+    holds no connection."""
+    if not ticket:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    async with AsyncSessionLocal() as db:
+        user = await stream_tickets.redeem(db, ticket)
+        await db.commit()
+    if not user or not user.is_active:
+        raise HTTPException(status_code=401, detail="Invalid or expired stream ticket")
     return user
 
 
@@ -52,4 +77,18 @@ async def get_current_user_optional(
 async def get_staff_user(user: User = Depends(get_current_user)) -> User:
     if not user.is_staff:
         raise HTTPException(status_code=403, detail="Staff only")
-    return user
\ No newline at end of file
+    return user
+
+
+async def get_streaming_staff_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+    """get_staff_user for long streamed responses. Dependencies are torn down
+    only after the response is sent, so get_db would hold its connection
+    idle in transaction for the whole download; this one resolves the token
+    on its own short session instead."""
+    if not credentials:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    async with AsyncSessionLocal() as db:
+        user = await _resolve_user(credentials.credentials, db)
+    if not user.is_staff:
+        raise HTTPException(status_code=403, detail="Staff only")
+    return user
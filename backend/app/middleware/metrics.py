@@ -0,0 +1,46 @@
+# 1337Jury - Metrics Middleware
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Feeds per-route request metrics from the ASGI layer
+
+import time
+from app.services.metrics import metrics, UNMATCHED
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and records it under its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_and_measure(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        metrics.started(method)
+        try:
+            await self.app(scope, receive, send_and_measure)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            route = scope.get("route")
+            metrics.finished(
+                method,
+                route.path if route is not None else UNMATCHED,
+                status,
+                time.perf_counter() - started,
+                size,
+            )
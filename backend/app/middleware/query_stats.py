@@ -0,0 +1,164 @@
+# 1337Jury - Query Stats Middleware
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Per-request SQL query counter, DB time, N+1 detection and slow-query hook
+
+import json
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql.asyncpg import AsyncAdapt_asyncpg_cursor
+from app.config import settings
+from app.database import engine, read_engine
+from app.services.slow_queries import slow_query_log
+
+# Expanded IN lists ($1, $2, $3 ...) collapse so they share one shape
+_PARAM_LIST = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*")
+
+
+class QueryStats:
+    def __init__(self, scope: dict | None = None):
+        self.scope = scope
+        self.queries = 0
+        self.rows = 0
+        # False once a SELECT's rows could not be counted (see _fetched_rows)
+        self.rows_counted = True
+        self.seconds = 0.0
+        # Set by Page when the request is paginated (row budgets apply)
+        self.paged = False
+        self.shapes: Counter[str] = Counter()
+
+    @property
+    def route(self) -> str | None:
+        """"GET /api/votes/{vote_id}" once routing has matched"""
+        if self.scope is None:
+            return None
+        route = self.scope.get("route")
+        return f"{self.scope['method']} {route.path if route is not None else self.scope['path']}"
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > threshold]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> QueryStats | None:
+    return _current.get()
+
+
+def _fetched_rows(cursor) -> int | None:
+    """How many rows a SELECT returned, or None when that is unknown.
+
+    DBAPI cursors do not say without consuming the rows (rowcount is -1 for
+    SELECTs), so this reads a private of SQLAlchemy's asyncpg adapter
+    (2.0): its plain cursor fetches the whole result into the list _rows
+    before execute() returns. Only that exact cursor type is trusted; the
+    server-side cursor buffers one batch at a time, and another driver, or
+    an adapter that changed, counts as unknown rather than as zero.
+    """
+    if type(cursor) is not AsyncAdapt_asyncpg_cursor:
+        return None
+    rows = getattr(cursor, "_rows", None)
+    return len(rows) if isinstance(rows, list) else None
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - getattr(context, "_query_started", time.perf_counter())
+    stats = _current.get()
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        slow_query_log.record(conn, statement, parameters, elapsed, stats.route if stats else None)
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.seconds += elapsed
+    stats.shapes[_PARAM_LIST.sub("?", statement)] += 1
+    if cursor.description is not None:
+        fetched = _fetched_rows(cursor)
+        if fetched is None:
+            stats.rows_counted = False
+        else:
+            stats.rows += fetched
+    elif cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+
+def install() -> None:
+    """Attach the cursor listeners to every engine the app uses"""
+    targets = [engine.sync_engine]
+    # Without a replica read_engine is an option copy that already shares
+    # the primary's listeners
+    if read_engine.sync_engine.pool is not engine.sync_engine.pool:
+        targets.append(read_engine.sync_engine)
+    for target in targets:
+        if not event.contains(target, "after_cursor_execute", _after_execute):
+            event.listen(target, "before_cursor_execute", _before_execute)
+            event.listen(target, "after_cursor_execute", _after_execute)
+
+
+def _budget_violations(scope, stats: QueryStats) -> list[str]:
+    budget = getattr(scope.get("endpoint"), "query_budget", None)
+    return budget.violations(stats) if budget is not None else []
+
+
+class QueryStatsMiddleware:
+    """Counts the queries each request runs.
+
+    In development the totals go out as X-DB-Queries / X-DB-Time-Ms headers.
+    Statements run more than N_PLUS_ONE_THRESHOLD times in one request are
+    logged, since that is almost always a query inside a Python loop.
+    Endpoints declaring a @query_budget are checked against it; with
+    QUERY_BUDGET_STRICT a breach turns the response into a 500 so smoke
+    runs and benchmarks fail loudly.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats(scope)
+        token = _current.set(stats)
+        replaced = False
+
+        async def send_with_headers(message):
+            nonlocal replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start":
+                breaches = _budget_violations(scope, stats)
+                if breaches and settings.QUERY_BUDGET_STRICT:
+                    replaced = True
+                    body = json.dumps({"detail": "Query budget exceeded", "violations": breaches}).encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                if settings.is_development:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(stats.queries).encode()))
+                    if stats.rows_counted:
+                        headers.append((b"x-db-rows", str(stats.rows).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.seconds * 1000:.1f}".encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            for breach in _budget_violations(scope, stats):
+                print(f"⚠️ Query budget exceeded: {stats.route}: {breach}")
+            for shape, count in stats.repeated(settings.N_PLUS_ONE_THRESHOLD):
+                print(f"⚠️ N+1 suspected: {stats.route} ran {count}x: {' '.join(shape.split())[:200]}")
@@ -0,0 +1,109 @@
+# 1337Jury - Schema Migrations
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Applies the checked-in revisions in versions/ and tracks them in schema_migrations
+#
+#   python -m app.migrations status
+#   python -m app.migrations upgrade
+
+import importlib
+import pkgutil
+from types import ModuleType
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.config import settings
+from app.database import engine
+
+# Arbitrary key for pg_advisory_lock: one worker migrates, the others wait
+LOCK_KEY = 1337_0001
+
+
+def revisions() -> list[ModuleType]:
+    """Revision modules ordered by their `revision` id ("0001", "0002", ...)"""
+    from app.migrations import versions
+    modules = [
+        importlib.import_module(f"{versions.__name__}.{info.name}")
+        for info in pkgutil.iter_modules(versions.__path__)
+    ]
+    return sorted(modules, key=lambda m: m.revision)
+
+
+async def applied_versions(conn: AsyncConnection) -> set[str]:
+    exists = await conn.scalar(text("SELECT to_regclass('schema_migrations') IS NOT NULL"))
+    if not exists:
+        return set()
+    return set(await conn.scalars(text("SELECT version FROM schema_migrations")))
+
+
+async def create_index_concurrently(conn: AsyncConnection, name: str, table: str, columns: str) -> None:
+    """CREATE INDEX CONCURRENTLY that can be re-run after a failed attempt.
+
+    A failed concurrent build leaves an INVALID index behind that IF NOT
+    EXISTS would happily skip, so drop that first. Needs an autocommit
+    connection (revision with transactional = False).
+    """
+    valid = await conn.scalar(
+        text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+        {"name": name},
+    )
+    if valid is False:
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    await conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+async def _apply(module: ModuleType) -> None:
+    record = text("INSERT INTO schema_migrations (version, description) VALUES (:v, :d)")
+    params = {"v": module.revision, "d": module.description}
+    if getattr(module, "transactional", True):
+        async with engine.begin() as conn:
+            await module.upgrade(conn)
+            await conn.execute(record, params)
+    else:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await module.upgrade(conn)
+            await conn.execute(record, params)
+
+
+async def upgrade() -> list[str]:
+    """Apply every pending revision in order; returns the ids applied"""
+    applied_now = []
+    async with engine.connect() as lock:
+        lock = await lock.execution_options(isolation_level="AUTOCOMMIT")
+        await lock.execute(text("SELECT pg_advisory_lock(:k)"), {"k": LOCK_KEY})
+        try:
+            await lock.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version VARCHAR(32) PRIMARY KEY, description TEXT, "
+                "applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW())"
+            ))
+            # Re-read under the lock: another worker may have just finished
+            done = await applied_versions(lock)
+            for module in revisions():
+                if module.revision in done:
+                    continue
+                print(f"Applying migration {module.revision}: {module.description}")
+                await _apply(module)
+                applied_now.append(module.revision)
+        finally:
+            await lock.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": LOCK_KEY})
+    return applied_now
+
+
+async def pending() -> list[ModuleType]:
+    async with engine.connect() as conn:
+        done = await applied_versions(conn)
+    return [m for m in revisions() if m.revision not in done]
+
+
+async def ensure_schema() -> None:
+    """Startup check: a version lookup instead of reflecting every table"""
+    todo = await pending()
+    if not todo:
+        print("✅ Database schema up to date")
+        return
+    if settings.DB_AUTO_MIGRATE:
+        await upgrade()
+        print("✅ Database migrated")
+        return
+    ids = ", ".join(m.revision for m in todo)
+    print(f"⚠️ Database schema is behind (pending: {ids}); run python -m app.migrations upgrade")
@@ -0,0 +1,28 @@
+# 1337Jury - Schema Migrations CLI
+# This file is for: ADMIRAL (Backend Dev 1)
+
+import argparse
+import asyncio
+from app.database import engine
+from app.migrations import pending, upgrade
+
+
+async def main(command: str) -> None:
+    try:
+        if command == "upgrade":
+            applied = await upgrade()
+            print(f"Applied: {', '.join(applied)}" if applied else "Nothing to apply")
+        else:
+            todo = await pending()
+            for module in todo:
+                print(f"pending  {module.revision}  {module.description}")
+            if not todo:
+                print("Schema up to date")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.migrations")
+    parser.add_argument("command", choices=["status", "upgrade"])
+    asyncio.run(main(parser.parse_args().command))
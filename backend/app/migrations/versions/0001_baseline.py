@@ -0,0 +1,192 @@
+# 1337Jury - Revision 0001
+# Tables as the app created them with create_all before migrations existed,
+# written out as DDL so the baseline stays fixed while the models move on
+# (later columns and indexes come from their own revisions). IF NOT EXISTS
+# keeps it a no-op on databases that already have them (create_all
+# deployments and database/init.sql). Enums hold the member NAMES, as
+# SQLAlchemy's Enum stores them.
+
+from sqlalchemy import text
+
+revision = "0001"
+description = "baseline tables"
+
+ENUMS = {
+    "votestatus": ["OPEN", "CLOSED", "STAFF_DECIDED"],
+    "disputestatus": ["OPEN", "CLOSED", "STAFF_DECIDED"],
+    "disputewinner": ["CORRECTOR", "CORRECTED"],
+    "resourcetype": ["VIDEO", "ARTICLE", "DOCUMENTATION", "TUTORIAL", "OTHER"],
+}
+
+TABLES = [
+    """CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        ft_id INTEGER NOT NULL,
+        login VARCHAR(50) NOT NULL,
+        email VARCHAR(255),
+        display_name VARCHAR(100),
+        avatar_url VARCHAR(500),
+        is_staff BOOLEAN,
+        is_active BOOLEAN,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    )""",
+    """CREATE TABLE IF NOT EXISTS projects (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(100) NOT NULL UNIQUE,
+        slug VARCHAR(100) NOT NULL UNIQUE,
+        description TEXT
+    )""",
+    # winning_option_id gets its foreign key once vote_options exists
+    """CREATE TABLE IF NOT EXISTS subject_votes (
+        id SERIAL PRIMARY KEY,
+        title VARCHAR(255) NOT NULL,
+        description TEXT NOT NULL,
+        project_id INTEGER NOT NULL REFERENCES projects (id),
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        status votestatus,
+        winning_option_id INTEGER,
+        staff_decision_by INTEGER REFERENCES users (id),
+        staff_decision_reason TEXT,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        closed_at TIMESTAMP WITH TIME ZONE,
+        comment_count INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS vote_options (
+        id SERIAL PRIMARY KEY,
+        subject_vote_id INTEGER NOT NULL REFERENCES subject_votes (id),
+        text VARCHAR(500) NOT NULL,
+        vote_count INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS user_votes (
+        id SERIAL PRIMARY KEY,
+        subject_vote_id INTEGER NOT NULL REFERENCES subject_votes (id),
+        option_id INTEGER NOT NULL REFERENCES vote_options (id),
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        CONSTRAINT unique_user_vote UNIQUE (subject_vote_id, user_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS disputes (
+        id SERIAL PRIMARY KEY,
+        title VARCHAR(255) NOT NULL,
+        description TEXT NOT NULL,
+        project_id INTEGER NOT NULL REFERENCES projects (id),
+        corrector_id INTEGER NOT NULL REFERENCES users (id),
+        corrected_id INTEGER NOT NULL REFERENCES users (id),
+        created_by INTEGER NOT NULL REFERENCES users (id),
+        status disputestatus,
+        winner disputewinner,
+        corrector_votes INTEGER,
+        corrected_votes INTEGER,
+        staff_decision_by INTEGER REFERENCES users (id),
+        staff_decision_reason TEXT,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        closed_at TIMESTAMP WITH TIME ZONE,
+        comment_count INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS dispute_votes (
+        id SERIAL PRIMARY KEY,
+        dispute_id INTEGER NOT NULL REFERENCES disputes (id),
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        vote_for disputewinner NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        CONSTRAINT unique_dispute_vote UNIQUE (dispute_id, user_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS comments (
+        id SERIAL PRIMARY KEY,
+        content TEXT NOT NULL,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        vote_id INTEGER REFERENCES subject_votes (id),
+        dispute_id INTEGER REFERENCES disputes (id),
+        parent_id INTEGER REFERENCES comments (id),
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    )""",
+    """CREATE TABLE IF NOT EXISTS resources (
+        id SERIAL PRIMARY KEY,
+        title VARCHAR(255) NOT NULL,
+        url VARCHAR(500) NOT NULL,
+        description TEXT,
+        resource_type resourcetype,
+        project_id INTEGER NOT NULL REFERENCES projects (id),
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        upvotes INTEGER,
+        downvotes INTEGER,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    )""",
+    """CREATE TABLE IF NOT EXISTS resource_votes (
+        id SERIAL PRIMARY KEY,
+        resource_id INTEGER NOT NULL REFERENCES resources (id),
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        is_upvote BOOLEAN NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        CONSTRAINT unique_resource_vote UNIQUE (resource_id, user_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS tests (
+        id SERIAL PRIMARY KEY,
+        title VARCHAR(255) NOT NULL,
+        description TEXT,
+        github_url VARCHAR(500) NOT NULL,
+        project_id INTEGER NOT NULL REFERENCES projects (id),
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        is_approved BOOLEAN,
+        approved_by INTEGER REFERENCES users (id),
+        downloads INTEGER,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    )""",
+    """CREATE TABLE IF NOT EXISTS recode_requests (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        project_id INTEGER NOT NULL REFERENCES projects (id),
+        campus VARCHAR(100) NOT NULL,
+        meeting_platform VARCHAR(100) NOT NULL,
+        meeting_link VARCHAR(500),
+        description TEXT,
+        status VARCHAR(20),
+        matched_user_id INTEGER REFERENCES users (id),
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE
+    )""",
+]
+
+# (name, table, columns, unique)
+INDEXES = [
+    ("ix_users_id", "users", "id", False),
+    ("ix_users_ft_id", "users", "ft_id", True),
+    ("ix_users_login", "users", "login", True),
+    ("ix_projects_id", "projects", "id", False),
+    ("ix_subject_votes_id", "subject_votes", "id", False),
+    ("ix_vote_options_id", "vote_options", "id", False),
+    ("ix_user_votes_id", "user_votes", "id", False),
+    ("ix_disputes_id", "disputes", "id", False),
+    ("ix_dispute_votes_id", "dispute_votes", "id", False),
+    ("ix_comments_id", "comments", "id", False),
+    ("ix_resources_id", "resources", "id", False),
+    ("ix_resource_votes_id", "resource_votes", "id", False),
+    ("ix_tests_id", "tests", "id", False),
+    ("ix_recode_requests_id", "recode_requests", "id", False),
+]
+
+
+async def upgrade(conn):
+    for name, labels in ENUMS.items():
+        values = ", ".join(f"'{label}'" for label in labels)
+        await conn.execute(text(
+            f"DO $$ BEGIN CREATE TYPE {name} AS ENUM ({values}); "
+            f"EXCEPTION WHEN duplicate_object THEN NULL; END $$"
+        ))
+    for ddl in TABLES:
+        await conn.execute(text(ddl))
+    # Under any name: database/init.sql calls it fk_winning_option
+    await conn.execute(text("""
+        DO $$ BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conrelid = 'subject_votes'::regclass AND confrelid = 'vote_options'::regclass AND contype = 'f'
+            ) THEN
+                ALTER TABLE subject_votes ADD CONSTRAINT subject_votes_winning_option_id_fkey
+                    FOREIGN KEY (winning_option_id) REFERENCES vote_options (id);
+            END IF;
+        END $$
+    """))
+    for name, table, columns, unique in INDEXES:
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        await conn.execute(text(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({columns})"))
@@ -0,0 +1,22 @@
+# 1337Jury - Revision 0002
+# Denormalized comment_count on subject votes and disputes, backfilled once.
+
+from sqlalchemy import text
+
+revision = "0002"
+description = "comment_count columns on subject_votes and disputes"
+
+
+async def upgrade(conn):
+    await conn.execute(text("ALTER TABLE subject_votes ADD COLUMN IF NOT EXISTS comment_count INTEGER DEFAULT 0"))
+    await conn.execute(text("ALTER TABLE disputes ADD COLUMN IF NOT EXISTS comment_count INTEGER DEFAULT 0"))
+    await conn.execute(text("""
+        UPDATE subject_votes v SET comment_count = c.n
+        FROM (SELECT vote_id, COUNT(*) AS n FROM comments WHERE vote_id IS NOT NULL GROUP BY vote_id) c
+        WHERE c.vote_id = v.id AND v.comment_count IS DISTINCT FROM c.n
+    """))
+    await conn.execute(text("""
+        UPDATE disputes d SET comment_count = c.n
+        FROM (SELECT dispute_id, COUNT(*) AS n FROM comments WHERE dispute_id IS NOT NULL GROUP BY dispute_id) c
+        WHERE c.dispute_id = d.id AND d.comment_count IS DISTINCT FROM c.n
+    """))
@@ -0,0 +1,29 @@
+# 1337Jury - Revision 0003
+# Composite indexes behind the list filters, built without locking writes.
+# The single-column project indexes from database/init.sql are prefixes of
+# the new ones and only cost write time, so they go.
+
+from sqlalchemy import text
+from app.migrations import create_index_concurrently
+
+revision = "0003"
+description = "indexes for the list endpoint filters"
+transactional = False
+
+INDEXES = [
+    ("ix_subject_votes_project_status_created", "subject_votes", "project_id, status, created_at"),
+    ("ix_disputes_project_status_created", "disputes", "project_id, status, created_at"),
+    ("ix_comments_vote_id", "comments", "vote_id"),
+    ("ix_comments_dispute_id", "comments", "dispute_id"),
+    ("ix_resources_project_id", "resources", "project_id"),
+    ("ix_tests_project_approved_downloads", "tests", "project_id, is_approved, downloads"),
+    ("ix_recode_requests_status_campus_project_created", "recode_requests", "status, campus, project_id, created_at"),
+]
+REDUNDANT = ["idx_resources_project", "idx_tests_project", "idx_subject_votes_project", "idx_disputes_project"]
+
+
+async def upgrade(conn):
+    for name, table, columns in INDEXES:
+        await create_index_concurrently(conn, name, table, columns)
+    for name in REDUNDANT:
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
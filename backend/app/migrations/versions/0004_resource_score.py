@@ -0,0 +1,34 @@
+# 1337Jury - Revision 0004
+# Stored resource score and hot rank, backfilled once, with the indexes the
+# two listing orders walk. (project_id, score, id) starts with project_id, so
+# the plain project index from 0003 goes.
+
+from sqlalchemy import column, table, text, update
+from app.migrations import create_index_concurrently
+from app.services.ranking import hot_rank
+
+revision = "0004"
+description = "resources.score and resources.hot_rank"
+transactional = False
+
+INDEXES = [
+    ("ix_resources_project_score", "resources", "project_id, score, id"),
+    ("ix_resources_score", "resources", "score, id"),
+    ("ix_resources_project_hot", "resources", "project_id, hot_rank, id"),
+    ("ix_resources_hot", "resources", "hot_rank, id"),
+]
+
+resources = table(
+    "resources",
+    column("upvotes"), column("downvotes"), column("score"), column("hot_rank"), column("created_at"),
+)
+
+
+async def upgrade(conn):
+    await conn.execute(text("ALTER TABLE resources ADD COLUMN IF NOT EXISTS score INTEGER NOT NULL DEFAULT 0"))
+    await conn.execute(text("ALTER TABLE resources ADD COLUMN IF NOT EXISTS hot_rank DOUBLE PRECISION NOT NULL DEFAULT 0"))
+    score = resources.c.upvotes - resources.c.downvotes
+    await conn.execute(update(resources).values(score=score, hot_rank=hot_rank(score, resources.c.created_at)))
+    for name, table_name, columns in INDEXES:
+        await create_index_concurrently(conn, name, table_name, columns)
+    await conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS ix_resources_project_id"))
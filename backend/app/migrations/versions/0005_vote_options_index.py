@@ -0,0 +1,13 @@
+# 1337Jury - Revision 0005
+# get_vote, its ETag version query and the live tally all fetch a vote's
+# options by subject_vote_id, which had no index.
+
+from app.migrations import create_index_concurrently
+
+revision = "0005"
+description = "index on vote_options.subject_vote_id"
+transactional = False
+
+
+async def upgrade(conn):
+    await create_index_concurrently(conn, "ix_vote_options_subject_vote_id", "vote_options", "subject_vote_id")
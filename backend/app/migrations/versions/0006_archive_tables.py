@@ -0,0 +1,41 @@
+# 1337Jury - Revision 0006
+# Archive tables for closed votes and disputes (app.services.archiver). LIKE
+# copies the live column types, whichever way the database was created.
+# Comments stay in place when their vote/dispute moves, so their foreign keys
+# to the hot tables go. closed_at is indexed for the archiver's sweep, and
+# user_votes.option_id for the foreign key checks when options are moved.
+
+from sqlalchemy import text
+from app.migrations import create_index_concurrently
+
+revision = "0006"
+description = "archive tables for closed votes and disputes"
+transactional = False
+
+TABLES = ["subject_votes", "vote_options", "user_votes", "disputes", "dispute_votes"]
+ARCHIVE_INDEXES = [
+    ("ix_archived_vote_options_subject_vote_id", "archived_vote_options", "subject_vote_id"),
+    ("ix_archived_user_votes_subject_vote_id", "archived_user_votes", "subject_vote_id"),
+    ("ix_archived_dispute_votes_dispute_id", "archived_dispute_votes", "dispute_id"),
+]
+INDEXES = [
+    ("ix_subject_votes_closed_at", "subject_votes", "closed_at"),
+    ("ix_disputes_closed_at", "disputes", "closed_at"),
+    ("ix_user_votes_option_id", "user_votes", "option_id"),
+]
+
+
+async def upgrade(conn):
+    result = await conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE contype = 'f' AND conrelid = 'comments'::regclass "
+        "AND confrelid IN ('subject_votes'::regclass, 'disputes'::regclass)"
+    ))
+    for name in result.scalars().all():
+        await conn.execute(text(f'ALTER TABLE comments DROP CONSTRAINT IF EXISTS "{name}"'))
+    for table in TABLES:
+        await conn.execute(text(f"CREATE TABLE IF NOT EXISTS archived_{table} (LIKE {table}, PRIMARY KEY (id))"))
+    # New and empty, so a plain build does not block anything
+    for name, table, columns in ARCHIVE_INDEXES:
+        await conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+    for name, table, columns in INDEXES:
+        await create_index_concurrently(conn, name, table, columns)
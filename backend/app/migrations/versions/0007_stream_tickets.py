@@ -0,0 +1,18 @@
+# 1337Jury - Revision 0007
+# One-time stream tickets (app.services.stream_tickets): EventSource URLs
+# carry a ticket instead of the JWT, which used to end up in access logs.
+
+from sqlalchemy import text
+
+revision = "0007"
+description = "stream_tickets table"
+
+
+async def upgrade(conn):
+    await conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS stream_tickets ("
+        " id VARCHAR(64) PRIMARY KEY,"
+        " user_id INTEGER NOT NULL REFERENCES users (id),"
+        " expires_at TIMESTAMP WITH TIME ZONE NOT NULL)"
+    ))
+    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_stream_tickets_expires_at ON stream_tickets (expires_at)"))
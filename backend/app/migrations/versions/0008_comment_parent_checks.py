@@ -0,0 +1,71 @@
+# 1337Jury - Revision 0008
+# Comments lost their foreign keys in 0006 (a parent may live in either the
+# hot or the archive table), so nothing stopped a deleted vote or dispute
+# from leaving its comments behind. Constraint triggers put the check back:
+# a comment's vote/dispute must exist in one of the two tables, and a
+# parent row can only go (deleted, or moved by the archiver) if it still
+# exists in the other table or has no comments left. Like a foreign key,
+# the child side takes KEY SHARE locks, so a concurrent delete waits or
+# fails, and violations raise foreign_key_violation. Comments orphaned
+# before this revision are removed first.
+
+from sqlalchemy import text
+
+revision = "0008"
+description = "comment parent checks (triggers standing in for the foreign keys)"
+
+# (comment column, hot table, archive table, short name)
+PARENTS = [
+    ("vote_id", "subject_votes", "archived_subject_votes", "vote"),
+    ("dispute_id", "disputes", "archived_disputes", "dispute"),
+]
+
+
+async def upgrade(conn):
+    for column, hot, archived, name in PARENTS:
+        await conn.execute(text(
+            f"DELETE FROM comments c WHERE c.{column} IS NOT NULL "
+            f"AND NOT EXISTS (SELECT 1 FROM {hot} p WHERE p.id = c.{column}) "
+            f"AND NOT EXISTS (SELECT 1 FROM {archived} p WHERE p.id = c.{column})"
+        ))
+
+    checks = "\n".join(
+        f"""
+    IF NEW.{column} IS NOT NULL
+       AND NOT EXISTS (SELECT 1 FROM {hot} WHERE id = NEW.{column} FOR KEY SHARE)
+       AND NOT EXISTS (SELECT 1 FROM {archived} WHERE id = NEW.{column} FOR KEY SHARE) THEN
+        RAISE foreign_key_violation USING MESSAGE = format('comment %s: {name} %s does not exist', NEW.id, NEW.{column});
+    END IF;"""
+        for column, hot, archived, name in PARENTS
+    )
+    await conn.execute(text(f"""
+CREATE OR REPLACE FUNCTION comments_parent_exists() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN{checks}
+    RETURN NULL;
+END $$"""))
+    await conn.execute(text("DROP TRIGGER IF EXISTS comments_parent_exists ON comments"))
+    await conn.execute(text(
+        "CREATE CONSTRAINT TRIGGER comments_parent_exists AFTER INSERT OR UPDATE OF vote_id, dispute_id "
+        "ON comments FOR EACH ROW EXECUTE FUNCTION comments_parent_exists()"
+    ))
+
+    for column, hot, archived, name in PARENTS:
+        function = f"comments_keep_{name}"
+        await conn.execute(text(f"""
+CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM comments WHERE {column} = OLD.id)
+       AND NOT EXISTS (SELECT 1 FROM {hot} WHERE id = OLD.id)
+       AND NOT EXISTS (SELECT 1 FROM {archived} WHERE id = OLD.id) THEN
+        RAISE foreign_key_violation USING MESSAGE = format('{name} %s still has comments', OLD.id);
+    END IF;
+    RETURN NULL;
+END $$"""))
+        # Fires at the end of the statement, so the archiver's move (delete
+        # from one table, insert into the other) passes
+        for table in (hot, archived):
+            await conn.execute(text(f"DROP TRIGGER IF EXISTS {function} ON {table}"))
+            await conn.execute(text(
+                f"CREATE CONSTRAINT TRIGGER {function} AFTER DELETE ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION {function}()"
+            ))
@@ -0,0 +1,20 @@
+# 1337Jury - Revision 0009
+# list_votes and list_disputes read closed and unfiltered pages through the
+# hot+archived views, so the archive tables get the same list-filter index
+# as the hot ones (0003).
+
+from app.migrations import create_index_concurrently
+
+revision = "0009"
+description = "list filter indexes on the archive tables"
+transactional = False
+
+INDEXES = [
+    ("ix_archived_subject_votes_project_status_created", "archived_subject_votes", "project_id, status, created_at"),
+    ("ix_archived_disputes_project_status_created", "archived_disputes", "project_id, status, created_at"),
+]
+
+
+async def upgrade(conn):
+    for name, table, columns in INDEXES:
+        await create_index_concurrently(conn, name, table, columns)
@@ -0,0 +1,10 @@
+# 1337Jury - Schema Revisions
+# This file is for: ADMIRAL (Backend Dev 1)
+#
+# One module per revision, named NNNN_what.py, exposing:
+#   revision       "NNNN", applied in order
+#   description    one line, stored in schema_migrations
+#   transactional  False for statements that cannot run in a transaction
+#                  (CREATE INDEX CONCURRENTLY); defaults to True
+#   async def upgrade(conn)
+# Revisions are append-only: never edit one that has shipped.
@@ -0,0 +1,65 @@
+# 1337Jury - Archive Tables
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Cold copies of closed votes and disputes, plus hot+archived read views
+
+from sqlalchemy import Column, Index, Table, select, union_all
+from sqlalchemy.orm import aliased
+from app.database import Base
+from app.models.dispute import Dispute
+from app.models.dispute_vote import DisputeVote
+from app.models.subject_vote import SubjectVote
+from app.models.user_vote import UserVote
+from app.models.vote_option import VoteOption
+
+
+def _archive_of(model, *indexed: str | tuple) -> Table:
+    """archived_<table>: the same columns, no foreign keys or defaults.
+    Rows only get here through app.services.archiver, ids included.
+    `indexed` is a column name, or (suffix, columns) for a composite index."""
+    table = model.__table__
+    columns = [
+        Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable, system=c.system, autoincrement=False)
+        for c in table.columns
+    ]
+    name = f"archived_{table.name}"
+    indexes = [
+        Index(f"ix_{name}_{spec}", spec) if isinstance(spec, str) else Index(f"ix_{name}_{spec[0]}", *spec[1])
+        for spec in indexed
+    ]
+    return Table(name, Base.metadata, *columns, *indexes)
+
+
+# The list filters, as on the hot tables (revision 0009)
+LISTED = ("project_status_created", ("project_id", "status", "created_at"))
+
+archived_subject_votes = _archive_of(SubjectVote, LISTED)
+archived_vote_options = _archive_of(VoteOption, "subject_vote_id")
+archived_user_votes = _archive_of(UserVote, "subject_vote_id")
+archived_disputes = _archive_of(Dispute, LISTED)
+archived_dispute_votes = _archive_of(DisputeVote, "dispute_id")
+
+# Hot table first, archive second, parents before children
+ARCHIVES = {
+    SubjectVote.__table__: archived_subject_votes,
+    VoteOption.__table__: archived_vote_options,
+    UserVote.__table__: archived_user_votes,
+    Dispute.__table__: archived_disputes,
+    DisputeVote.__table__: archived_dispute_votes,
+}
+
+
+def _with_archive(model):
+    """The model over `hot UNION ALL archived`. Queries written against it
+    load ordinary model instances wherever the row lives. Postgres pushes
+    the WHERE (and an ORDER BY id) into both halves, so a lookup by id is
+    two primary key probes in the same single query."""
+    table = model.__table__
+    rows = union_all(select(table), select(ARCHIVES[table])).subquery(f"all_{table.name}")
+    return aliased(model, rows)
+
+
+AnySubjectVote = _with_archive(SubjectVote)
+AnyVoteOption = _with_archive(VoteOption)
+AnyUserVote = _with_archive(UserVote)
+AnyDispute = _with_archive(Dispute)
+AnyDisputeVote = _with_archive(DisputeVote)
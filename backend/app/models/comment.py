@@ -9,9 +9,11 @@ class Comment(Base):
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    # Can be attached for a vote or dispute
-    vote_id = Column(Integer, ForeignKey("subject_votes.id"), nullable=True)
-    dispute_id = Column(Integer, ForeignKey("disputes.id"), nullable=True)
+    # Can be attached for a vote or dispute. No foreign keys: the parent may
+    # have moved to the archive tables. Constraint triggers (revision 0008)
+    # check it exists in either, and deleting it must delete its comments
+    vote_id = Column(Integer, nullable=True, index=True)
+    dispute_id = Column(Integer, nullable=True, index=True)
     parent_id = Column(Integer, ForeignKey("comments.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -2,9 +2,9 @@
 # This file is for: ADMIRAL (Backend Dev 1)
 # Description: Correction disputes with staff override
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, row_version
 import enum
 
 
@@ -23,6 +23,7 @@ class Dispute(Base):
     __tablename__ = "disputes"
 
     id = Column(Integer, primary_key=True, index=True)
+    xmin = row_version()
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=False)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -37,6 +38,13 @@ class Dispute(Base):
     staff_decision_reason = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     closed_at = Column(DateTime(timezone=True), nullable=True)
+    # Denormalized, kept in sync by create_comment/delete_comment
+    comment_count = Column(Integer, default=0)
+
+    __table_args__ = (
+        Index("ix_disputes_project_status_created", "project_id", "status", "created_at"),
+        Index("ix_disputes_closed_at", "closed_at"),
+    )
 
     def to_dict(self):
         return {
@@ -51,5 +59,6 @@ class Dispute(Base):
             "corrector_votes": self.corrector_votes,
             "corrected_votes": self.corrected_votes,
             "staff_decision_by": self.staff_decision_by,
+            "comment_count": self.comment_count or 0,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
\ No newline at end of file
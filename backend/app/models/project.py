@@ -3,13 +3,14 @@
 # Description: Python common core projects model
 
 from sqlalchemy import Column, Integer, String, Text
-from app.database import Base
+from app.database import Base, row_version
 
 
 class Project(Base):
     __tablename__ = "projects"
 
     id = Column(Integer, primary_key=True, index=True)
+    xmin = row_version()
     name = Column(String(100), unique=True, nullable=False)
     slug = Column(String(100), unique=True, nullable=False)
     description = Column(Text, nullable=True)
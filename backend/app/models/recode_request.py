@@ -1,7 +1,7 @@
 # Recode Request Model - Mock Evaluation & Recoding
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, row_version
 import enum
 
 
@@ -16,6 +16,7 @@ class RecodeRequest(Base):
     __tablename__ = "recode_requests"
 
     id = Column(Integer, primary_key=True, index=True)
+    xmin = row_version()
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
     campus = Column(String(100), nullable=False)  # Which campus they want recoder from
@@ -27,6 +28,10 @@ class RecodeRequest(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_recode_requests_status_campus_project_created", "status", "campus", "project_id", "created_at"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -2,7 +2,7 @@
 # This file is for: ZERO (Backend Dev 2)
 # Description: Learning resources model with type classification
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, Float, String, Text, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
@@ -28,8 +28,18 @@ class Resource(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     upvotes = Column(Integer, default=0)
     downvotes = Column(Integer, default=0)
+    # upvotes - downvotes and its time-decayed hot_rank (app.services.ranking),
+    # both kept up to date by the vote endpoint so the listings sort by index
+    score = Column(Integer, nullable=False, default=0, server_default="0")
+    hot_rank = Column(Float, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_resources_project_score", "project_id", "score", "id"),
+        Index("ix_resources_score", "score", "id"),
+        Index("ix_resources_project_hot", "project_id", "hot_rank", "id"),
+        Index("ix_resources_hot", "hot_rank", "id"),
+    )
 
     def to_dict(self):
         return {
@@ -42,6 +52,6 @@ class Resource(Base):
             "user_id": self.user_id,
             "upvotes": self.upvotes,
             "downvotes": self.downvotes,
-            "score": self.upvotes - self.downvotes,
+            "score": self.score,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
\ No newline at end of file
@@ -0,0 +1,15 @@
+# 1337Jury - Stream Ticket Model
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: One-time tickets that authenticate EventSource streams
+
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from app.database import Base
+
+
+class StreamTicket(Base):
+    __tablename__ = "stream_tickets"
+
+    # SHA-256 of the ticket: the table never holds a usable credential
+    id = Column(String(64), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -2,9 +2,9 @@
 # This file is for: ADMIRAL (Backend Dev 1)
 # Description: Subject clarification voting with staff override
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Enum, Index
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, row_version
 import enum
 
 
@@ -18,6 +18,7 @@ class SubjectVote(Base):
     __tablename__ = "subject_votes"
 
     id = Column(Integer, primary_key=True, index=True)
+    xmin = row_version()
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=False)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -28,6 +29,15 @@ class SubjectVote(Base):
     staff_decision_reason = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     closed_at = Column(DateTime(timezone=True), nullable=True)
+    # Denormalized, kept in sync by create_comment/delete_comment
+    comment_count = Column(Integer, default=0)
+
+    # Serves the project/status filters of list_votes, newest first; closed_at
+    # (set when a vote closes) is how the archiver finds what to move
+    __table_args__ = (
+        Index("ix_subject_votes_project_status_created", "project_id", "status", "created_at"),
+        Index("ix_subject_votes_closed_at", "closed_at"),
+    )
 
     def to_dict(self):
         return {
@@ -39,5 +49,6 @@ class SubjectVote(Base):
             "status": self.status.value if self.status else None,
             "winning_option_id": self.winning_option_id,
             "staff_decision_by": self.staff_decision_by,
+            "comment_count": self.comment_count or 0,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
\ No newline at end of file
@@ -2,7 +2,7 @@
 # This file is for: ZERO (Backend Dev 2)
 # Description: Test cases model with staff approval system
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -22,6 +22,10 @@ class Test(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+    __table_args__ = (
+        Index("ix_tests_project_approved_downloads", "project_id", "is_approved", "downloads"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
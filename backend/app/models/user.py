@@ -4,13 +4,14 @@
 
 from sqlalchemy import Column, Integer, String, Boolean, DateTime
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, row_version
 
 
 class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
+    xmin = row_version()
     ft_id = Column(Integer, unique=True, nullable=False, index=True)
     login = Column(String(50), unique=True, nullable=False, index=True)
     email = Column(String(255), nullable=True)
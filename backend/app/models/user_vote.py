@@ -2,7 +2,7 @@
 # This file is for: ADMIRAL (Backend Dev 1)
 # Description: User's vote on subject clarification questions
 
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -16,6 +16,9 @@ class UserVote(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # option_id is indexed for its foreign key: removing an option (the
+    # archiver moves them with their vote) looks up the ballots pointing at it
     __table_args__ = (
         UniqueConstraint('subject_vote_id', 'user_id', name='unique_user_vote'),
+        Index("ix_user_votes_option_id", "option_id"),
     )
@@ -3,14 +3,15 @@
 # Description: Options for subject clarification votes
 
 from sqlalchemy import Column, Integer, String, ForeignKey
-from app.database import Base
+from app.database import Base, row_version
 
 
 class VoteOption(Base):
     __tablename__ = "vote_options"
 
     id = Column(Integer, primary_key=True, index=True)
-    subject_vote_id = Column(Integer, ForeignKey("subject_votes.id"), nullable=False)
+    xmin = row_version()
+    subject_vote_id = Column(Integer, ForeignKey("subject_votes.id"), nullable=False, index=True)
     text = Column(String(500), nullable=False)
     vote_count = Column(Integer, default=0)
 
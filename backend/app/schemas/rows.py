@@ -0,0 +1,108 @@
+# 1337Jury - Row Schemas
+# This file is for: ADMIRAL (Backend Dev 1) & ZERO (Backend Dev 2)
+# Description: Column-only reads mapped to slotted rows for the list endpoints
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import ClassVar
+from sqlalchemy import Select, func, select
+from app.models.resource import Resource, ResourceType
+from app.models.archive import AnySubjectVote
+from app.models.subject_vote import SubjectVote, VoteStatus
+from app.models.test import Test
+
+
+class Row:
+    """Base for the response rows below.
+
+    A subclass is a slotted dataclass whose fields line up with `columns`.
+    select() reads only those columns with Core, so no ORM instances,
+    identity map or attribute instrumentation are involved, and each result
+    tuple becomes a row with `Row(*values)`. to_dict() matches the model's
+    to_dict() once encoded: values are kept as the driver returns them,
+    enums are str enums and encode_json writes datetimes as isoformat().
+    """
+
+    __slots__ = ()
+    columns: ClassVar[tuple]
+
+    @classmethod
+    def select(cls, columns: tuple | None = None) -> Select:
+        """SELECT of `columns`, or of the same fields from another source
+        (e.g. VoteRow.any_columns, over hot and archived votes)"""
+        return select(*(columns or cls.columns))
+
+    @classmethod
+    def from_result(cls, result) -> list:
+        """Rows from result tuples. Columns added after `columns` (e.g. a
+        keyset value that is not in the body) are left out."""
+        width = len(cls.columns)
+        return [cls(*values[:width]) for values in result]
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _vote_columns(vote) -> tuple:
+    return (
+        vote.id, vote.title, vote.description, vote.project_id,
+        vote.user_id, vote.status, vote.winning_option_id,
+        vote.staff_decision_by, func.coalesce(vote.comment_count, 0), vote.created_at,
+    )
+
+
+@dataclass(slots=True)
+class VoteRow(Row):
+    id: int
+    title: str
+    description: str
+    project_id: int
+    user_id: int
+    status: VoteStatus | None
+    winning_option_id: int | None
+    staff_decision_by: int | None
+    comment_count: int
+    created_at: datetime | None
+
+    columns: ClassVar[tuple] = _vote_columns(SubjectVote)
+    # The same fields over hot and archived votes (list_votes for closed ones)
+    any_columns: ClassVar[tuple] = _vote_columns(AnySubjectVote)
+
+
+@dataclass(slots=True)
+class ResourceRow(Row):
+    id: int
+    title: str
+    url: str
+    description: str | None
+    resource_type: ResourceType | None
+    project_id: int
+    user_id: int
+    upvotes: int
+    downvotes: int
+    score: int
+    created_at: datetime | None
+
+    columns: ClassVar[tuple] = (
+        Resource.id, Resource.title, Resource.url, Resource.description, Resource.resource_type,
+        Resource.project_id, Resource.user_id, Resource.upvotes, Resource.downvotes, Resource.score,
+        Resource.created_at,
+    )
+
+
+@dataclass(slots=True)
+class TestRow(Row):
+    id: int
+    title: str
+    description: str | None
+    github_url: str
+    project_id: int
+    user_id: int
+    is_approved: bool
+    downloads: int
+    created_at: datetime | None
+
+    columns: ClassVar[tuple] = (
+        Test.id, Test.title, Test.description, Test.github_url, Test.project_id,
+        Test.user_id, Test.is_approved, Test.downloads, Test.created_at,
+    )
@@ -0,0 +1,185 @@
+# 1337Jury - Archiver
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Moves long-closed votes and disputes, with their options and ballots, to the archive tables
+#
+#   python -m app.services.archiver [--days 90] [--batch 500]
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, func, insert, select
+from app.config import settings
+from app.database import engine
+from app.models.archive import ARCHIVES
+from app.models.comment import Comment
+from app.models.dispute import Dispute, DisputeStatus
+from app.models.dispute_vote import DisputeVote
+from app.models.subject_vote import SubjectVote, VoteStatus
+from app.models.user_vote import UserVote
+from app.models.vote_option import VoteOption
+from app.services.cache import response_cache
+
+
+def _moved(table, where):
+    """DELETE ... RETURNING every real column (not xmin), as a CTE"""
+    columns = [c for c in table.columns if not c.system]
+    return delete(table).where(where).returning(*columns).cte(f"moved_{table.name}")
+
+
+def _copy(moved, table):
+    names = [c.name for c in table.columns if not c.system]
+    stmt = insert(ARCHIVES[table]).from_select(names, select(*(moved.c[name] for name in names)))
+    return stmt.cte(f"copied_{table.name}")
+
+
+def move_batch(parent, finished: list, children: list, cutoff: datetime, limit: int):
+    """One statement that moves up to `limit` parents closed before cutoff,
+    and their child rows, into the archive tables.
+
+    Every part is a data-modifying CTE of the same statement, so it is one
+    transaction and one snapshot: readers see each vote/dispute either hot
+    or archived, never both or neither. Foreign keys are checked at the end
+    of the statement, when parents and children are both gone, so the order
+    of the deletes does not matter (votes and options reference each other).
+    SKIP LOCKED leaves rows a request is updating for the next sweep and
+    lets several workers sweep at once.
+    """
+    table = parent.__table__
+    due = (
+        select(table.c.id)
+        .where(table.c.status.in_(finished), table.c.closed_at < cutoff)
+        .order_by(table.c.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    moved = _moved(table, table.c.id.in_(due))
+    ctes = [_copy(moved, table)]
+    for child, parent_key in children:
+        child_table = child.__table__
+        moved_children = _moved(child_table, child_table.c[parent_key].in_(select(moved.c.id)))
+        ctes.append(_copy(moved_children, child_table))
+    return select(func.count()).select_from(moved).add_cte(*ctes)
+
+
+KINDS = {
+    "votes": (SubjectVote, [VoteStatus.CLOSED, VoteStatus.STAFF_DECIDED],
+              [(VoteOption, "subject_vote_id"), (UserVote, "subject_vote_id")]),
+    "disputes": (Dispute, [DisputeStatus.CLOSED, DisputeStatus.STAFF_DECIDED],
+                 [(DisputeVote, "dispute_id")]),
+}
+# The comments column pointing at each kind (no foreign key, see revision 0008)
+COMMENT_KEYS = {"votes": Comment.vote_id, "disputes": Comment.dispute_id}
+
+
+def lock_either(kind: str, row_id: int):
+    """One row (hot id, archived id) with the vote/dispute locked FOR UPDATE
+    wherever it lives; both NULL when it does not exist. Holding the lock
+    makes concurrent comments on it wait, then fail, like a foreign key."""
+    table = KINDS[kind][0].__table__
+    found = [
+        select(t.c.id).where(t.c.id == row_id).with_for_update().cte(f"locked_{t.name}")
+        for t in (table, ARCHIVES[table])
+    ]
+    return select(*(select(cte.c.id).scalar_subquery() for cte in found))
+
+
+def purge(kind: str, row_id: int, archived: bool):
+    """One statement deleting a vote/dispute together with its options,
+    ballots and comments, from the hot or the archive tables"""
+    parent, _, children = KINDS[kind]
+    table = ARCHIVES[parent.__table__] if archived else parent.__table__
+    comment_key = COMMENT_KEYS[kind]
+    ctes = [delete(Comment).where(comment_key == row_id).returning(Comment.id).cte("purged_comments")]
+    for child, parent_key in children:
+        child_table = ARCHIVES[child.__table__] if archived else child.__table__
+        removed = delete(child_table).where(child_table.c[parent_key] == row_id).returning(child_table.c.id)
+        ctes.append(removed.cte(f"purged_{child_table.name}"))
+    return delete(table).where(table.c.id == row_id).add_cte(*ctes)
+
+
+class Archiver:
+    """Sweeps every ARCHIVE_INTERVAL seconds (when ARCHIVE_ENABLED) in
+    batches of ARCHIVE_BATCH_SIZE, one transaction each, until nothing
+    closed more than ARCHIVE_AFTER_DAYS ago is left. get_vote, get_dispute
+    and the live tallies read through the archive transparently."""
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self.moved = {kind: 0 for kind in KINDS}
+        self.sweeps = 0
+        self.failures = 0
+        self.last_sweep: datetime | None = None
+
+    async def sweep(self, days: int | None = None, batch: int | None = None) -> dict:
+        """Archive everything due; returns how many votes/disputes moved"""
+        days = settings.ARCHIVE_AFTER_DAYS if days is None else days
+        batch = batch or settings.ARCHIVE_BATCH_SIZE
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        moved = {}
+        for kind, (parent, finished, children) in KINDS.items():
+            moved[kind] = 0
+            while True:
+                async with engine.begin() as conn:
+                    n = await conn.scalar(move_batch(parent, finished, children, cutoff, batch))
+                moved[kind] += n
+                self.moved[kind] += n
+                if n and kind == "votes":
+                    # Archived votes drop out of the cached listings
+                    response_cache.invalidate("votes")
+                if n < batch:
+                    break
+        self.sweeps += 1
+        self.last_sweep = datetime.now(timezone.utc)
+        return moved
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._sweep_forever())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            try:
+                moved = await self.sweep()
+                if any(moved.values()):
+                    print(f"Archived {moved['votes']} votes and {moved['disputes']} disputes")
+            except Exception as e:
+                self.failures += 1
+                print(f"Archive sweep error: {e}")
+            await asyncio.sleep(settings.ARCHIVE_INTERVAL)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.ARCHIVE_ENABLED,
+            "after_days": settings.ARCHIVE_AFTER_DAYS,
+            "moved": self.moved,
+            "sweeps": self.sweeps,
+            "failures": self.failures,
+            "last_sweep": self.last_sweep.isoformat() if self.last_sweep else None,
+        }
+
+
+archiver = Archiver()
+
+
+async def main(days: int | None, batch: int | None) -> None:
+    try:
+        moved = await archiver.sweep(days, batch)
+        print(f"Archived {moved['votes']} votes and {moved['disputes']} disputes")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.services.archiver")
+    parser.add_argument("--days", type=int, help="closed more than this many days ago (default ARCHIVE_AFTER_DAYS)")
+    parser.add_argument("--batch", type=int, help="votes/disputes per transaction (default ARCHIVE_BATCH_SIZE)")
+    args = parser.parse_args()
+    asyncio.run(main(args.days, args.batch))
@@ -0,0 +1,95 @@
+# 1337Jury - Auth Cache
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Memoized JWT decoding and a TTL cache of active users
+
+import time
+from collections import OrderedDict
+from sqlalchemy.orm import make_transient_to_detached
+from app.config import settings
+from app.models.user import User
+from app.services.jwt_service import verify_token
+
+
+class AuthCache:
+    """Lets get_current_user skip the JWT decode and the users lookup.
+
+    Decoded payloads are kept per token until the token's own exp. Active
+    users are kept as detached snapshots for a short TTL and evicted through
+    the "user:{id}" tag whenever their profile or flags change.
+    """
+
+    def __init__(self, max_entries: int, ttl: int, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._tokens: OrderedDict[str, dict] = OrderedDict()
+        self._users: OrderedDict[int, tuple[User, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Set by the invalidation bus, same contract as ResponseCache
+        self.publisher = None
+
+    def decode(self, token: str) -> dict | None:
+        if not self.enabled:
+            return verify_token(token)
+        payload = self._tokens.get(token)
+        if payload is not None and payload.get("exp", 0) > time.time():
+            self._tokens.move_to_end(token)
+            return payload
+        payload = verify_token(token)
+        if payload is not None and "exp" in payload:
+            self._tokens[token] = payload
+            if len(self._tokens) > self.max_entries:
+                self._tokens.popitem(last=False)
+        return payload
+
+    def get_user(self, user_id: int) -> User | None:
+        if not self.enabled:
+            return None
+        entry = self._users.get(user_id)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                del self._users[user_id]
+            self.misses += 1
+            return None
+        self._users.move_to_end(user_id)
+        self.hits += 1
+        return entry[0]
+
+    def put_user(self, user: User) -> None:
+        if not self.enabled or not user.is_active:
+            return
+        # Detached copy so no request session ever owns the shared instance
+        snapshot = User(**{c.key: getattr(user, c.key) for c in User.__table__.columns})
+        make_transient_to_detached(snapshot)
+        self._users[user.id] = (snapshot, time.monotonic() + self.ttl)
+        self._users.move_to_end(user.id)
+        if len(self._users) > self.max_entries:
+            self._users.popitem(last=False)
+
+    def evict(self, user_id: int) -> None:
+        self.invalidate(f"user:{user_id}")
+
+    def invalidate(self, *tags: str, publish: bool = True) -> None:
+        if publish and self.publisher and tags:
+            self.publisher(list(tags))
+        for tag in tags:
+            if tag.startswith("user:"):
+                self._users.pop(int(tag[5:]), None)
+
+    def clear(self, publish: bool = True) -> None:
+        if publish and self.publisher:
+            self.publisher(None)
+        self._tokens.clear()
+        self._users.clear()
+
+    def stats(self) -> dict:
+        return {
+            "tokens": len(self._tokens),
+            "users": len(self._users),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+auth_cache = AuthCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL, settings.AUTH_CACHE_ENABLED)
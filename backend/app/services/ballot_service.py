@@ -0,0 +1,163 @@
+# 1337Jury - Ballot Service
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Atomic ballot casting with in-database counter updates
+
+from sqlalchemy import select, update, exists, literal, literal_column, union_all, case, Boolean
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.subject_vote import SubjectVote, VoteStatus
+from app.models.vote_option import VoteOption
+from app.models.user_vote import UserVote
+from app.models.dispute import Dispute, DisputeStatus, DisputeWinner
+from app.models.dispute_vote import DisputeVote
+
+# Outcomes returned by the cast functions
+CAST = "cast"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not_found"
+CLOSED = "closed"
+INVALID_OPTION = "invalid_option"
+CONFLICT = "conflict"
+
+# A first ballot racing another first ballot from the same user loses the
+# insert; the retry then sees the committed row and takes the update path.
+MAX_CAST_ATTEMPTS = 3
+
+
+def _subject_cast_statement(vote_id: int, option_id: int, user_id: int):
+    """One statement: lock the ballot, upsert it and move the counters."""
+    target = (
+        select(VoteOption.id.label("option_id"))
+        .join(SubjectVote, SubjectVote.id == VoteOption.subject_vote_id)
+        .where(
+            VoteOption.id == option_id,
+            SubjectVote.id == vote_id,
+            SubjectVote.status == VoteStatus.OPEN,
+        )
+        .with_for_update(read=True, of=SubjectVote)
+        .cte("target")
+    )
+    previous = (
+        select(UserVote.id, UserVote.option_id)
+        .where(UserVote.subject_vote_id == vote_id, UserVote.user_id == user_id)
+        .with_for_update()
+        .cte("previous")
+    )
+    moved = (
+        update(UserVote)
+        .where(UserVote.id == previous.c.id, previous.c.option_id != target.c.option_id)
+        .values(option_id=target.c.option_id)
+        .returning(previous.c.option_id.label("old_option_id"), UserVote.option_id.label("new_option_id"))
+        .cte("moved")
+    )
+    inserted = (
+        insert(UserVote)
+        .from_select(
+            ["subject_vote_id", "option_id", "user_id"],
+            select(literal(vote_id), target.c.option_id, literal(user_id))
+            .where(~exists(select(previous.c.id))),
+        )
+        .on_conflict_do_nothing(constraint="unique_user_vote")
+        .returning(UserVote.option_id)
+        .cte("inserted")
+    )
+    deltas = union_all(
+        select(moved.c.old_option_id.label("option_id"), literal(-1).label("delta")),
+        select(moved.c.new_option_id, literal(1)),
+        select(inserted.c.option_id, literal(1)),
+    ).cte("deltas")
+    # Lock the touched options in id order so two users swapping between the
+    # same pair of options cannot deadlock each other
+    locked = (
+        select(VoteOption.id)
+        .where(VoteOption.id.in_(select(deltas.c.option_id)))
+        .order_by(VoteOption.id)
+        .with_for_update()
+    )
+    counted = (
+        update(VoteOption)
+        .where(VoteOption.id == deltas.c.option_id, VoteOption.id.in_(locked))
+        .values(vote_count=VoteOption.vote_count + deltas.c.delta)
+        .returning(VoteOption.id)
+        .cte("counted")
+    )
+    return select(
+        select(SubjectVote.status).where(SubjectVote.id == vote_id).scalar_subquery().label("vote_status"),
+        exists(select(target.c.option_id)).label("valid"),
+        exists(select(previous.c.id)).label("had_ballot"),
+        exists(select(moved.c.new_option_id)).label("moved"),
+        exists(select(inserted.c.option_id)).label("inserted"),
+    ).add_cte(counted)
+
+
+async def cast_subject_vote(db: AsyncSession, vote_id: int, option_id: int, user_id: int) -> str:
+    """Cast or change a user's ballot on a subject vote.
+
+    The caller owns the transaction and commits on CAST or UNCHANGED.
+    """
+    for _ in range(MAX_CAST_ATTEMPTS):
+        result = await db.execute(_subject_cast_statement(vote_id, option_id, user_id))
+        row = result.one()
+        if row.vote_status is None:
+            return NOT_FOUND
+        if row.vote_status != VoteStatus.OPEN:
+            return CLOSED
+        if not row.valid:
+            return INVALID_OPTION
+        if row.moved or row.inserted:
+            return CAST
+        if row.had_ballot:
+            return UNCHANGED
+    return CONFLICT
+
+
+def _dispute_cast_statement(dispute_id: int, user_id: int, vote_for: DisputeWinner):
+    """One statement: upsert the ballot and move both tallies, returning the dispute."""
+    # Locking the dispute row first serializes ballots on it and keeps a
+    # concurrent close from landing between the status check and the tally
+    open_dispute = (
+        select(literal(dispute_id), literal(user_id), literal(vote_for, DisputeVote.vote_for.type))
+        .where(Dispute.id == dispute_id, Dispute.status == DisputeStatus.OPEN)
+        .with_for_update(key_share=True)
+    )
+    upsert = insert(DisputeVote).from_select(["dispute_id", "user_id", "vote_for"], open_dispute)
+    upserted = (
+        upsert.on_conflict_do_update(
+            constraint="unique_dispute_vote",
+            set_={"vote_for": upsert.excluded.vote_for},
+            where=DisputeVote.vote_for != upsert.excluded.vote_for,
+        )
+        # xmax is 0 only on freshly inserted rows, so this tells a new
+        # ballot from a switched one
+        .returning(literal_column("xmax = 0", Boolean).label("inserted"))
+        .cte("upserted")
+    )
+    switched = case((select(upserted.c.inserted).scalar_subquery(), 0), else_=1)
+    if vote_for == DisputeWinner.CORRECTOR:
+        tallies = {
+            "corrector_votes": Dispute.corrector_votes + 1,
+            "corrected_votes": Dispute.corrected_votes - switched,
+        }
+    else:
+        tallies = {
+            "corrector_votes": Dispute.corrector_votes - switched,
+            "corrected_votes": Dispute.corrected_votes + 1,
+        }
+    return (
+        update(Dispute)
+        .where(Dispute.id == dispute_id, exists(select(upserted.c.inserted)))
+        .values(**tallies)
+        .returning(Dispute)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def cast_dispute_vote(db: AsyncSession, dispute_id: int, user_id: int, vote_for: DisputeWinner) -> Dispute | None:
+    """Cast or switch a user's ballot on a dispute.
+
+    Returns the dispute with its new tallies, or None when nothing was cast
+    (dispute missing or closed, or the ballot already matches). The caller
+    owns the transaction.
+    """
+    result = await db.execute(_dispute_cast_statement(dispute_id, user_id, vote_for))
+    return result.scalar_one_or_none()
@@ -0,0 +1,161 @@
+# 1337Jury - Response Cache
+# This file is for: ADMIRAL (Backend Dev 1) & ZERO (Backend Dev 2)
+# Description: In-process LRU/TTL cache for read endpoints with tag invalidation
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import date
+from fastapi.responses import Response
+from app.config import settings
+
+# Rough per-entry bookkeeping cost on top of the payload and key
+ENTRY_OVERHEAD = 200
+
+
+def cache_key(*parts) -> str:
+    return ":".join("" if p is None else str(p) for p in parts)
+
+
+def _encode_default(value):
+    # Rows hand datetimes over as the driver returns them (app.schemas.rows)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_json(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_encode_default).encode("utf-8")
+
+
+def content_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+class JSONBytesResponse(Response):
+    """JSON response from an encoded body (or anything encode_json takes).
+
+    Returning a Response from a route skips FastAPI's jsonable_encoder pass,
+    which otherwise walks every value of a dict/list result in Python.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return content if isinstance(content, bytes) else encode_json(content)
+
+
+def json_response(body: bytes, etag: str, private: bool = False) -> Response:
+    """Encoded body with its validator. no-cache: clients may keep it but
+    must revalidate (If-None-Match) before every use"""
+    return JSONBytesResponse(
+        content=body,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache" if private else "no-cache"},
+    )
+
+
+class ResponseCache:
+    """Caches encoded JSON bodies, bounded by total bytes.
+
+    Entries expire after their TTL and the least recently used ones are
+    evicted when the byte budget is exceeded. Each entry carries tags
+    (e.g. "votes", "project:3"); invalidate() drops every entry with a tag.
+    Each entry also keeps its ETag, so a hit can be answered with a 304
+    without touching the body.
+    """
+
+    def __init__(self, max_bytes: int, ttl: int, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: OrderedDict[str, tuple[bytes, float, tuple[str, ...], str]] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Called with the invalidated tags (None for a full clear) so other
+        # workers can follow; set by the invalidation bus
+        self.publisher = None
+
+    def get(self, key: str) -> Response | None:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return json_response(entry[0], entry[3])
+
+    def put(self, key: str, value, tags: list[str], ttl: int | None = None, etag: str | None = None) -> Response:
+        """Store value (JSON-serializable) and return it as a response.
+
+        etag defaults to a hash of the body; routes that can answer
+        If-None-Match from a row version pass the validator built from it.
+        """
+        body = encode_json(value)
+        etag = etag or content_etag(body)
+        cost = len(body) + len(key) + ENTRY_OVERHEAD
+        if not self.enabled or cost > self.max_bytes:
+            return json_response(body, etag)
+        if key in self._entries:
+            self._drop(key)
+        expires = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        self._entries[key] = (body, expires, tuple(tags), etag)
+        self.size += cost
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+        return json_response(body, etag)
+
+    def invalidate(self, *tags: str, publish: bool = True) -> int:
+        if publish and self.publisher and tags:
+            self.publisher(list(tags))
+        dropped = 0
+        for tag in tags:
+            for key in self._tags.pop(tag, set()):
+                if key in self._entries:
+                    self._drop(key)
+                    dropped += 1
+        self.invalidations += dropped
+        return dropped
+
+    def clear(self, publish: bool = True) -> None:
+        if publish and self.publisher:
+            self.publisher(None)
+        self._entries.clear()
+        self._tags.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _drop(self, key: str) -> None:
+        body, _, tags, _ = self._entries.pop(key)
+        self.size -= len(body) + len(key) + ENTRY_OVERHEAD
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+response_cache = ResponseCache(settings.CACHE_MAX_BYTES, settings.CACHE_TTL, settings.CACHE_ENABLED)
@@ -0,0 +1,163 @@
+# 1337Jury - Cache Invalidation Bus
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Fans cache invalidations out to every worker over Postgres LISTEN/NOTIFY
+
+import asyncio
+import json
+import uuid
+import asyncpg
+from sqlalchemy import select, func
+from sqlalchemy.engine import make_url
+from app.config import settings
+from app.database import engine
+from app.services.cache import response_cache
+from app.services.auth_cache import auth_cache
+from app.services.tally_hub import tally_hub
+
+CHANNEL = "jury_cache_invalidate"
+# How often the idle listener connection is pinged to catch half-open sockets
+PING_INTERVAL = 30
+MAX_RECONNECT_DELAY = 30
+
+
+class CacheInvalidationBus:
+    """Publishes local invalidations with NOTIFY and applies the other workers'.
+
+    Every attached cache exposes invalidate(*tags, publish=...),
+    clear(publish=...) and a publisher hook. Each worker keeps one dedicated
+    listener connection. When it drops, the bus reconnects with backoff and
+    clears the local caches, because any invalidation sent while it was
+    away has been missed.
+
+    Publishes made in the same event-loop step go out as one NOTIFY: a
+    route invalidating its cached responses and then publishing its tally
+    topic after a commit sends a single message.
+    """
+
+    def __init__(self, caches: list, dsn: str):
+        self.caches = caches
+        self.dsn = dsn
+        self.worker_id = uuid.uuid4().hex[:12]
+        self._task: asyncio.Task | None = None
+        self._pending: set[asyncio.Task] = set()
+        # Tags queued for the next NOTIFY; None once a clear is queued
+        self._queued: set[str] | None = set()
+        self._flush_scheduled = False
+        self._lost = asyncio.Event()
+        self.connected = False
+        self.published = 0
+        self.received = 0
+        self.reconnects = 0
+
+    async def start(self) -> None:
+        for cache in self.caches:
+            cache.publisher = self.publish
+        self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        for cache in self.caches:
+            cache.publisher = None
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def publish(self, tags: list[str] | None) -> None:
+        """Fire-and-forget NOTIFY; the local cache is already invalidated"""
+        if tags is None:
+            # A clear covers every tag
+            self._queued = None
+        elif self._queued is not None:
+            self._queued.update(tags)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self) -> None:
+        tags = sorted(self._queued) if self._queued is not None else None
+        self._queued, self._flush_scheduled = set(), False
+        payload = json.dumps({"w": self.worker_id, "t": tags})
+        task = asyncio.create_task(self._notify(payload))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _notify(self, payload: str) -> None:
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(select(func.pg_notify(CHANNEL, payload)))
+                await conn.commit()
+            self.published += 1
+        except Exception as e:
+            print(f"Cache bus publish error: {e}")
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("w") == self.worker_id:
+            return
+        self.received += 1
+        tags = message.get("t")
+        for cache in self.caches:
+            if tags is None:
+                cache.clear(publish=False)
+            else:
+                cache.invalidate(*tags, publish=False)
+
+    def _on_termination(self, connection) -> None:
+        self._lost.set()
+
+    async def _listen_forever(self) -> None:
+        delay = 1
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                conn.add_termination_listener(self._on_termination)
+                await conn.add_listener(CHANNEL, self._on_notification)
+                if self.reconnects:
+                    for cache in self.caches:
+                        cache.clear(publish=False)
+                self._lost.clear()
+                self.connected = True
+                delay = 1
+                while not self._lost.is_set():
+                    try:
+                        await asyncio.wait_for(self._lost.wait(), timeout=PING_INTERVAL)
+                    except asyncio.TimeoutError:
+                        await asyncio.wait_for(conn.fetchval("SELECT 1"), timeout=PING_INTERVAL)
+                print("Cache bus connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Cache bus listener error: {e}")
+            finally:
+                self.connected = False
+                if conn is not None and not conn.is_closed():
+                    conn.terminate()
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "connected": self.connected,
+            "published": self.published,
+            "received": self.received,
+            "reconnects": self.reconnects,
+        }
+
+
+def _listener_dsn() -> str:
+    # asyncpg wants a plain postgresql:// URL, not the SQLAlchemy driver form
+    url = make_url(settings.CACHE_BUS_URL or settings.DATABASE_URL)
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+cache_bus = CacheInvalidationBus([response_cache, auth_cache, tally_hub], _listener_dsn())
@@ -2,51 +2,157 @@
 # This file is for: ADMIRAL (Backend Dev 1)
 # Description: 42 OAuth API integration
 
+import asyncio
+import time
 import httpx
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Optional
 from app.config import settings
 
+# Statuses worth retrying an idempotent request on
+RETRY_STATUSES = {429, 502, 503, 504}
+# The ones where the 42 API itself refused the request, so it was not
+# processed: the only retries for a request that must not run twice, like
+# the one-time code exchange (a gateway's 502/504 may have forwarded it)
+UNPROCESSED_STATUSES = {429, 503}
+MAX_RETRY_WAIT = 30.0
+
+
+class TokenBucket:
+    """Client-side rate limiter sized to the 42 API application quota"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back, e.g. after the API sent Retry-After"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
 
 class FTApiService:
     def __init__(self):
         self.client_id = settings.FT_CLIENT_ID
         self.client_secret = settings.FT_CLIENT_SECRET
         self.redirect_uri = settings.FT_REDIRECT_URI
+        self.bucket = TokenBucket(settings.FT_API_RATE_LIMIT, settings.FT_API_BURST)
+        self._slots = asyncio.Semaphore(settings.FT_API_MAX_CONCURRENCY)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        """Open the shared keep-alive client (called from the app lifespan)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=settings.FT_API_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.FT_API_MAX_CONCURRENCY,
+                    max_keepalive_connections=settings.FT_API_MAX_CONCURRENCY,
+                ),
+            )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, url: str, idempotent: bool, **kwargs) -> httpx.Response:
+        if self._client is None:
+            await self.start()
+        attempt = 0
+        retry_statuses = RETRY_STATUSES if idempotent else UNPROCESSED_STATUSES
+        while True:
+            await self.bucket.acquire()
+            try:
+                async with self._slots:
+                    response = await self._client.request(method, url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                # Nothing reached the API, safe to retry any request
+                if attempt >= settings.FT_API_MAX_RETRIES:
+                    raise
+            except httpx.TransportError:
+                if not idempotent or attempt >= settings.FT_API_MAX_RETRIES:
+                    raise
+            else:
+                if response.status_code not in retry_statuses or attempt >= settings.FT_API_MAX_RETRIES:
+                    return response
+                wait = _retry_after(response)
+                if wait is not None:
+                    # The bucket holds back this and every other caller
+                    self.bucket.pause(min(wait, MAX_RETRY_WAIT))
+                    attempt += 1
+                    continue
+            attempt += 1
+            await asyncio.sleep(min(0.5 * 2 ** attempt, MAX_RETRY_WAIT))
 
     def get_authorization_url(self) -> str:
         return settings.FT_AUTH_REDIRECT
 
     async def exchange_code_for_token(self, code: str) -> Optional[dict]:
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    settings.FT_TOKEN_URL,
-                    data={
-                        "grant_type": "authorization_code",
-                        "client_id": self.client_id,
-                        "client_secret": self.client_secret,
-                        "code": code,
-                        "redirect_uri": self.redirect_uri,
-                    },
-                    timeout=30.0,
-                )
-                return response.json() if response.status_code == 200 else None
-            except Exception as e:
-                print(f"Token exchange error: {e}")
-                return None
+        try:
+            response = await self._request(
+                "POST",
+                settings.FT_TOKEN_URL,
+                idempotent=False,
+                data={
+                    "grant_type": "authorization_code",
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                    "code": code,
+                    "redirect_uri": self.redirect_uri,
+                },
+            )
+            return response.json() if response.status_code == 200 else None
+        except Exception as e:
+            print(f"Token exchange error: {e}")
+            return None
 
     async def get_user_info(self, access_token: str) -> Optional[dict]:
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{settings.FT_API_URL}/me",
-                    headers={"Authorization": f"Bearer {access_token}"},
-                    timeout=30.0,
-                )
-                return response.json() if response.status_code == 200 else None
-            except Exception as e:
-                print(f"User info error: {e}")
-                return None
-
-
-ft_api = FTApiService()
\ No newline at end of file
+        try:
+            response = await self._request(
+                "GET",
+                f"{settings.FT_API_URL}/me",
+                idempotent=True,
+                headers={"Authorization": f"Bearer {access_token}"},
+            )
+            return response.json() if response.status_code == 200 else None
+        except Exception as e:
+            print(f"User info error: {e}")
+            return None
+
+
+ft_api = FTApiService()
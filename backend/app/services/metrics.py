@@ -0,0 +1,266 @@
+# 1337Jury - Request Metrics
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Per-route request counters and histograms in Prometheus text format
+
+import asyncio
+import bisect
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from app.config import settings
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+SIZE_BUCKETS = [256, 1024, 4096, 16384, 65536, 262144, 1048576]
+# Requests that matched no route share one label so 404 scans cannot blow up cardinality
+UNMATCHED = "<unmatched>"
+# Counters of workers that have exited, summed (see MetricsRegistry._retire)
+ARCHIVE = "metrics-archive.json"
+
+
+class RouteSeries:
+    __slots__ = ("statuses", "errors", "latency", "latency_sum", "size", "size_sum")
+
+    def __init__(self):
+        self.statuses: dict[str, int] = {}
+        self.errors = 0
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.size = [0] * (len(SIZE_BUCKETS) + 1)
+        self.size_sum = 0
+
+    def to_dict(self) -> dict:
+        return {s: getattr(self, s) for s in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RouteSeries":
+        series = cls()
+        for s in cls.__slots__:
+            setattr(series, s, data[s])
+        return series
+
+    def merge(self, other: "RouteSeries") -> None:
+        for status, n in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + n
+        self.errors += other.errors
+        self.latency = [a + b for a, b in zip(self.latency, other.latency)]
+        self.latency_sum += other.latency_sum
+        self.size = [a + b for a, b in zip(self.size, other.size)]
+        self.size_sum += other.size_sum
+
+
+class MetricsRegistry:
+    """Per-worker request metrics, labeled by method and route template.
+
+    Recording is a dict lookup and two bisects per request. With several
+    workers on one host, set METRICS_DIR: every worker writes its snapshot
+    there, and whichever worker gets scraped serves the sum of all of them.
+    So the directory does not grow with every restart, a stopping worker,
+    and aggregation for any worker that died without stopping, folds the
+    snapshot's counters and histograms into one archive and removes it.
+    The sum never goes down (Prometheus would read that as a counter
+    reset); only the in-flight gauges of exited workers are dropped. A
+    live worker's snapshot stays however long ago it was written.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory
+        self.series: dict[tuple[str, str], RouteSeries] = {}
+        self.in_flight: dict[str, int] = {}
+        self._task: asyncio.Task | None = None
+
+    def started(self, method: str) -> None:
+        self.in_flight[method] = self.in_flight.get(method, 0) + 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float, size: int) -> None:
+        self.in_flight[method] -= 1
+        series = self.series.get((method, route))
+        if series is None:
+            series = self.series[(method, route)] = RouteSeries()
+        code = str(status)
+        series.statuses[code] = series.statuses.get(code, 0) + 1
+        if status >= 500:
+            series.errors += 1
+        series.latency[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        series.latency_sum += seconds
+        series.size[bisect.bisect_left(SIZE_BUCKETS, size)] += 1
+        series.size_sum += size
+
+    # Multi-worker aggregation
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    @contextmanager
+    def _locked(self):
+        """Serializes folding into the archive with reading it"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".metrics.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_archive(self) -> dict[tuple[str, str], RouteSeries]:
+        try:
+            with open(os.path.join(self.directory, ARCHIVE)) as f:
+                return {(m, r): RouteSeries.from_dict(data) for m, r, data in json.load(f)["series"]}
+        except FileNotFoundError:
+            return {}
+
+    def _retire(self, snapshots: list[tuple[str, dict]]) -> dict[tuple[str, str], RouteSeries]:
+        """Fold exited workers' snapshots into the archive and remove them (lock held).
+
+        Returns the archive's series, updated.
+        """
+        archive = self._read_archive()
+        if not snapshots:
+            return archive
+        for _, snapshot in snapshots:
+            _merge_into(archive, snapshot["series"])
+        path = os.path.join(self.directory, ARCHIVE)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"series": [[m, r, s.to_dict()] for (m, r), s in archive.items()]}, f)
+        os.replace(path + ".tmp", path)
+        for snapshot_path, _ in snapshots:
+            try:
+                os.remove(snapshot_path)
+            except FileNotFoundError:
+                pass
+        return archive
+
+    def _snapshot(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "series": [[m, r, s.to_dict()] for (m, r), s in self.series.items()],
+            "in_flight": self.in_flight,
+        }
+
+    def flush(self) -> None:
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self._path(os.getpid()) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._snapshot(), f)
+        os.replace(tmp, self._path(os.getpid()))
+
+    async def start(self) -> None:
+        if self.directory:
+            self._task = asyncio.create_task(self._flush_forever())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self.directory:
+            try:
+                self.flush()
+                with self._locked():
+                    self._retire([(self._path(os.getpid()), self._snapshot())])
+            except OSError as e:
+                print(f"Metrics flush error: {e}")
+
+    async def _flush_forever(self) -> None:
+        while True:
+            await asyncio.sleep(settings.METRICS_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Metrics flush error: {e}")
+
+    def _collect(self) -> tuple[dict, dict]:
+        if not self.directory:
+            return self.series, self.in_flight
+        self.flush()
+        live: list[tuple[str, dict]] = []
+        exited: list[tuple[str, dict]] = []
+        with self._locked():
+            for name in os.listdir(self.directory):
+                if not (name.startswith("metrics-") and name.endswith(".json")) or name == ARCHIVE:
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    with open(path) as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                (live if _alive(snapshot["pid"]) else exited).append((path, snapshot))
+            series = self._retire(exited)
+        in_flight: dict[str, int] = {}
+        for _, snapshot in live:
+            _merge_into(series, snapshot["series"])
+            for method, n in snapshot["in_flight"].items():
+                in_flight[method] = in_flight.get(method, 0) + n
+        return series, in_flight
+
+    def render(self) -> str:
+        series, in_flight = self._collect()
+        lines = [
+            "# HELP http_requests_total Requests by route template and status",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route), s in sorted(series.items()):
+            for status, n in sorted(s.statuses.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {n}')
+        lines += [
+            "# HELP http_request_errors_total Requests answered with a 5xx",
+            "# TYPE http_request_errors_total counter",
+        ]
+        for (method, route), s in sorted(series.items()):
+            lines.append(f'http_request_errors_total{{method="{method}",route="{_escape(route)}"}} {s.errors}')
+        lines += _histogram(
+            "http_request_duration_seconds", "Request latency (use histogram_quantile for p50/p95/p99)",
+            series, LATENCY_BUCKETS, "latency", "latency_sum",
+        )
+        lines += _histogram(
+            "http_response_size_bytes", "Response body size",
+            series, SIZE_BUCKETS, "size", "size_sum",
+        )
+        lines += [
+            "# HELP http_requests_in_progress Requests currently being served",
+            "# TYPE http_requests_in_progress gauge",
+        ]
+        for method, n in sorted(in_flight.items()):
+            lines.append(f'http_requests_in_progress{{method="{method}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+def _histogram(name: str, help_text: str, series: dict, bounds: list, counts: str, total: str) -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, route), s in sorted(series.items()):
+        labels = f'method="{method}",route="{_escape(route)}"'
+        cumulative = 0
+        for bound, n in zip(bounds + ["+Inf"], getattr(s, counts)):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {getattr(s, total)}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+    return lines
+
+
+def _merge_into(series: dict, snapshot_series: list) -> None:
+    for method, route, data in snapshot_series:
+        merged = series.setdefault((method, route), RouteSeries())
+        merged.merge(RouteSeries.from_dict(data))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+metrics = MetricsRegistry(settings.METRICS_DIR)
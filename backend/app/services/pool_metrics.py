@@ -0,0 +1,67 @@
+# 1337Jury - Connection Pool Metrics
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Checkout wait-time histogram and timeout counter for the DB pools
+
+import bisect
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last one is +Inf
+WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.bucket_counts = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self.bucket_counts[bisect.bisect_left(WAIT_BUCKETS_MS, seconds * 1000)] += 1
+
+    def snapshot(self, pool) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(WAIT_BUCKETS_MS + ["+Inf"], self.bucket_counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "name": self.name,
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.timeouts,
+            "wait_ms_avg": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_ms_max": round(self.wait_max * 1000, 3),
+            "wait_ms_buckets": buckets,
+        }
+
+
+def metered_pool(metrics: PoolMetrics) -> type:
+    """Pool class that times every checkout into `metrics`.
+
+    Returned as a subclass (not an instance attribute) so pools recreated on
+    dispose keep reporting to the same metrics.
+    """
+
+    class MeteredPool(AsyncAdaptedQueuePool):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            except exc.TimeoutError:
+                metrics.timeouts += 1
+                raise
+            finally:
+                metrics.observe_wait(time.perf_counter() - start)
+
+    MeteredPool.metrics = metrics
+    return MeteredPool
@@ -0,0 +1,24 @@
+# 1337Jury - Resource Ranking
+# This file is for: ZERO (Backend Dev 2)
+# Description: SQL expression for the stored "hot" rank of resources
+
+from sqlalchemy import Float, cast, func
+
+# Ranks are counted from here so the stored values stay small
+HOT_EPOCH = 1704067200  # 2024-01-01 UTC
+# Seconds of age that weigh as much as a 10x net score. Changing it makes the
+# stored ranks stale: re-run the backfill from migration 0004.
+HOT_WINDOW = 45000
+
+
+def hot_rank(score, created_at):
+    """sign(score) * log10(max(|score|, 1)) + (created_at - HOT_EPOCH) / HOT_WINDOW
+
+    Newer resources start higher instead of old ones losing points, so a
+    resource's rank never changes while nobody votes on it: it is refreshed
+    by the same UPDATE that changes its score, never by a sweep over the table.
+    Takes column expressions, e.g. hot_rank(Resource.score, Resource.created_at).
+    """
+    magnitude = func.log(10, func.greatest(func.abs(score), 1))
+    age = (func.extract("epoch", created_at) - HOT_EPOCH) / HOT_WINDOW
+    return cast(func.sign(score) * magnitude + age, Float)
@@ -0,0 +1,159 @@
+# 1337Jury - Slow Query Log
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Logs statements over SLOW_QUERY_MS and samples their EXPLAIN plans
+
+import asyncio
+import contextvars
+import random
+import re
+from collections import deque
+from datetime import datetime, timezone
+from sqlalchemy import text
+from app.config import settings
+from app.database import engine, read_engine
+
+# Only plain reads are ever re-run under EXPLAIN ANALYZE (see explainable):
+# a single SELECT that calls nothing but these side-effect-free functions
+SAFE_FUNCTIONS = frozenset({
+    "count", "sum", "min", "max", "avg", "bool_and", "bool_or", "array_agg", "string_agg",
+    "json_agg", "jsonb_agg", "json_build_object", "jsonb_build_object",
+    "row_number", "rank", "dense_rank", "lag", "lead",
+    "coalesce", "nullif", "greatest", "least", "cast", "extract", "date_trunc", "now",
+    "abs", "sign", "log", "ln", "round", "floor", "ceil", "lower", "upper", "length", "unnest",
+})
+# Words that come right before "(" without being a function call
+_GRAMMAR = frozenset({
+    "select", "from", "where", "and", "or", "not", "in", "exists", "any", "all", "some", "as", "on",
+    "using", "join", "lateral", "over", "filter", "within", "by", "having", "case", "when", "then",
+    "else", "is", "distinct", "union", "intersect", "except", "array", "row", "between", "like",
+    "ilike", "limit", "offset", "varchar", "char", "character", "numeric", "decimal", "timestamp",
+    "time", "interval",
+})
+# Write forms a SELECT can still carry: data-modifying CTEs, SELECT INTO, row locks
+_WRITES = frozenset({"insert", "update", "delete", "merge", "into", "for"})
+# String literals, quoted identifiers, words, then any other single character
+_TOKEN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|[A-Za-z_][\w$]*|\S")
+EXPLAIN_TIMEOUT_MS = 5000
+MAX_EXPLAINED_SHAPES = 1000
+
+# Set inside the EXPLAIN task so its own statements are not logged again
+_explaining: contextvars.ContextVar[bool] = contextvars.ContextVar("explaining", default=False)
+
+
+def redact(parameters) -> list[str]:
+    """Parameter types and sizes only; values can be logins, tokens or comments"""
+    if isinstance(parameters, dict):
+        parameters = list(parameters.values())
+    redacted = []
+    for value in parameters or ():
+        if isinstance(value, (str, bytes)):
+            redacted.append(f"{type(value).__name__}({len(value)})")
+        elif isinstance(value, (list, tuple)):
+            redacted.append(f"{type(value).__name__}[{len(value)}]")
+        else:
+            redacted.append(type(value).__name__)
+    return redacted
+
+
+def explainable(statement: str) -> bool:
+    """Whether re-running `statement` under EXPLAIN ANALYZE is safe: one
+    SELECT (or WITH ... SELECT) whose every function call is in
+    SAFE_FUNCTIONS, with no data-modifying CTE, INTO or FOR UPDATE/SHARE.
+    Anything else, however harmless, is not explained."""
+    tokens = [t for t in _TOKEN.findall(statement) if t[0] != "'"]
+    if tokens and tokens[-1] == ";":
+        tokens.pop()
+    words = [t.lower() for t in tokens]
+    if not words or words[0] not in ("select", "with") or ";" in words:
+        return False
+    for i, word in enumerate(words):
+        if word in _WRITES:
+            return False
+        if i + 1 < len(words) and words[i + 1] == "(" and (word[0].isalpha() or word[0] in '_"'):
+            name = word.strip('"')
+            qualified = i > 0 and words[i - 1] == "."
+            if qualified and words[i - 2] != "pg_catalog":
+                return False
+            if name not in SAFE_FUNCTIONS and (qualified or word[0] == '"' or name not in _GRAMMAR):
+                return False
+    return True
+
+
+class SlowQueryLog:
+    """Keeps the last SLOW_QUERY_BUFFER slow statements for staff.
+
+    When SLOW_QUERY_EXPLAIN is on, a sampled share of slow reads is re-run
+    as EXPLAIN (ANALYZE, BUFFERS) on a separate read-only transaction, and
+    the plan is attached to the entry. A shape already explained is only
+    explained again if it got slower.
+    """
+
+    def __init__(self, size: int):
+        self.entries: deque[dict] = deque(maxlen=size)
+        self._explained: dict[str, float] = {}
+        self._pending: set[asyncio.Task] = set()
+        self.logged = 0
+
+    def record(self, conn, statement: str, parameters, seconds: float, route: str | None) -> None:
+        if _explaining.get():
+            return
+        self.logged += 1
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(seconds * 1000, 1),
+            "route": route,
+            "statement": " ".join(statement.split()),
+            "parameters": redact(parameters),
+            "plan": None,
+        }
+        self.entries.append(entry)
+        print(f"⚠️ Slow query {entry['duration_ms']} ms [{route or '-'}]: {entry['statement'][:500]} params={entry['parameters']}")
+        if self._should_explain(statement, seconds):
+            if len(self._explained) >= MAX_EXPLAINED_SHAPES:
+                self._explained.clear()
+            self._explained[statement] = seconds
+            on_replica = read_engine.sync_engine.pool is not engine.sync_engine.pool and conn.engine.pool is read_engine.sync_engine.pool
+            # Fresh context: the request's query stats must not count the EXPLAIN
+            task = asyncio.get_running_loop().create_task(
+                self._explain(read_engine if on_replica else engine, statement, parameters, entry),
+                context=contextvars.Context(),
+            )
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    def _should_explain(self, statement: str, seconds: float) -> bool:
+        if not settings.SLOW_QUERY_EXPLAIN or not explainable(statement):
+            return False
+        if seconds <= self._explained.get(statement, 0.0):
+            return False
+        return random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE
+
+    async def _explain(self, target, statement: str, parameters, entry: dict) -> None:
+        _explaining.set(True)
+        try:
+            async with target.connect() as conn:
+                # The replica engine runs in autocommit; this needs a transaction
+                await conn.execution_options(isolation_level="READ COMMITTED")
+                await conn.execute(text("SET TRANSACTION READ ONLY"))
+                await conn.execute(text(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}"))
+                result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", tuple(parameters or ()))
+                entry["plan"] = "\n".join(row[0] for row in result)
+                await conn.rollback()
+        except Exception as e:
+            entry["plan"] = f"EXPLAIN failed: {e}"
+            print(f"Slow query explain error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": settings.SLOW_QUERY_MS,
+            "explain": settings.SLOW_QUERY_EXPLAIN,
+            "logged": self.logged,
+            "entries": sorted(self.entries, key=lambda e: e["duration_ms"], reverse=True),
+        }
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self._explained.clear()
+
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_BUFFER)
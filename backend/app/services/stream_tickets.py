@@ -0,0 +1,47 @@
+# 1337Jury - Stream Tickets
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: One-time, short-lived tickets that authenticate EventSource streams
+
+import hashlib
+import secrets
+from datetime import timedelta
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.stream_ticket import StreamTicket
+from app.models.user import User
+
+
+def _digest(ticket: str) -> str:
+    return hashlib.sha256(ticket.encode()).hexdigest()
+
+
+async def issue(db: AsyncSession, user_id: int) -> str:
+    """New ticket for the user, in one statement that also drops the
+    expired ones. The caller commits."""
+    ticket = secrets.token_urlsafe(32)
+    purged = delete(StreamTicket).where(StreamTicket.expires_at < func.now()).cte("purged")
+    await db.execute(
+        insert(StreamTicket)
+        .values(
+            id=_digest(ticket),
+            user_id=user_id,
+            expires_at=func.now() + timedelta(seconds=settings.STREAM_TICKET_TTL),
+        )
+        .add_cte(purged)
+    )
+    return ticket
+
+
+async def redeem(db: AsyncSession, ticket: str) -> User | None:
+    """Spend the ticket and return its user, in one statement. None when it
+    is unknown, expired or already used. The caller commits."""
+    redeemed = (
+        delete(StreamTicket)
+        .where(StreamTicket.id == _digest(ticket), StreamTicket.expires_at > func.now())
+        .returning(StreamTicket.user_id)
+        .cte("redeemed")
+    )
+    result = await db.execute(select(User).join(redeemed, redeemed.c.user_id == User.id))
+    return result.scalar_one_or_none()
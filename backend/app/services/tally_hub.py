@@ -0,0 +1,201 @@
+# 1337Jury - Live Tally Hub
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: In-process pub/sub that feeds the vote and dispute SSE streams
+
+import asyncio
+import json
+from typing import Awaitable, Callable
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal
+
+# Loads the current tally of one vote/dispute, None once it is gone
+TallyLoader = Callable[[AsyncSession, int], Awaitable[dict | None]]
+
+
+class Subscription:
+    """One stream's mailbox. It only holds the newest frame, so a slow
+    client skips intermediate tallies instead of queueing them."""
+
+    __slots__ = ("topic", "frame", "final", "_ready")
+
+    def __init__(self, topic: str):
+        self.topic = topic
+        self.frame: bytes | None = None
+        self.final = False
+        self._ready = asyncio.Event()
+
+    def deliver(self, frame: bytes, final: bool) -> None:
+        self.frame = frame
+        self.final = final
+        self._ready.set()
+
+    async def next(self, timeout: float) -> bytes | None:
+        """The next frame, or None if nothing changed within timeout"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        frame, self.frame = self.frame, None
+        return frame
+
+
+class TallyHub:
+    """Topics are "vote:<id>" and "dispute:<id>".
+
+    Routes publish a topic after committing a change to it. Publishes are
+    coalesced: the first one opens a TALLY_COALESCE_MS window, and when it
+    ends every topic touched during it is loaded once and the same frame
+    goes to all its subscribers. A burst of casts is one query and one
+    frame, and topics nobody watches on this worker cost nothing.
+
+    Also attaches to the cache bus (invalidate/clear/publisher), so
+    publishes from the other workers reach this worker's streams too.
+    """
+
+    def __init__(self):
+        self.loaders: dict[str, TallyLoader] = {}
+        self.publisher = None
+        self._topics: dict[str, set[Subscription]] = {}
+        self._dirty: set[str] = set()
+        self._flush: asyncio.Task | None = None
+        self.subscribers = 0
+        self.published = 0
+        self.frames = 0
+
+    def register(self, kind: str, loader: TallyLoader) -> None:
+        self.loaders[kind] = loader
+
+    @property
+    def full(self) -> bool:
+        return self.subscribers >= settings.TALLY_MAX_SUBSCRIBERS
+
+    def subscribe(self, topic: str) -> Subscription:
+        sub = Subscription(topic)
+        self._topics.setdefault(topic, set()).add(sub)
+        self.subscribers += 1
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._topics.get(sub.topic)
+        if subs is None or sub not in subs:
+            return
+        subs.discard(sub)
+        self.subscribers -= 1
+        if not subs:
+            del self._topics[sub.topic]
+
+    async def load(self, topic: str) -> dict | None:
+        kind, _, key = topic.partition(":")
+        async with AsyncSessionLocal() as db:
+            return await self.loaders[kind](db, int(key))
+
+    def publish(self, *topics: str, broadcast: bool = True) -> None:
+        """Call after commit: the frame is loaded from the primary"""
+        self.published += 1
+        if broadcast and self.publisher:
+            self.publisher(list(topics))
+        watched = [t for t in topics if t in self._topics]
+        if not watched:
+            return
+        self._dirty.update(watched)
+        if self._flush is None:
+            self._flush = asyncio.create_task(self._send_after_window())
+
+    # Cache bus interface: remote publishes arrive as invalidated tags
+    def invalidate(self, *tags: str, publish: bool = True) -> None:
+        self.publish(*tags, broadcast=publish)
+
+    def clear(self, publish: bool = True) -> None:
+        # The bus reconnected and may have missed publishes: resend everything
+        self.publish(*self._topics, broadcast=False)
+
+    async def _send_after_window(self) -> None:
+        try:
+            await asyncio.sleep(settings.TALLY_COALESCE_MS / 1000)
+        finally:
+            # Publishes from here on open the next window
+            topics, self._dirty, self._flush = self._dirty, set(), None
+        for topic in topics:
+            subs = self._topics.get(topic)
+            if not subs:
+                continue
+            try:
+                tally = await self.load(topic)
+            except Exception as e:
+                print(f"Tally load error for {topic}: {e}")
+                continue
+            frame = encode_frame(tally)
+            self.frames += 1
+            for sub in list(subs):
+                sub.deliver(frame, is_final(tally))
+
+    def stats(self) -> dict:
+        return {
+            "topics": len(self._topics),
+            "subscribers": self.subscribers,
+            "published": self.published,
+            "frames": self.frames,
+        }
+
+
+def is_final(tally: dict | None) -> bool:
+    """Closed, decided or deleted: nothing will move any more"""
+    return tally is None or tally["status"] != "open"
+
+
+def encode_frame(tally: dict | None) -> bytes:
+    if tally is None:
+        return b"event: gone\ndata: {}\n\n"
+    return b"event: tally\ndata: " + json.dumps(tally, separators=(",", ":")).encode() + b"\n\n"
+
+
+async def event_stream(hub: TallyHub, sub: Subscription, tally: dict):
+    """SSE body: the current tally, then one frame per coalesced change.
+
+    Comment lines keep idle connections (and proxies) alive. The stream ends
+    after the final frame, and the subscription is dropped however it ends,
+    including a client disconnect.
+    """
+    try:
+        yield b"retry: 5000\n" + encode_frame(tally)
+        if is_final(tally):
+            return
+        while True:
+            frame = await sub.next(settings.TALLY_KEEPALIVE)
+            if frame is None:
+                yield b": keepalive\n\n"
+                continue
+            yield frame
+            if sub.final:
+                return
+    finally:
+        hub.unsubscribe(sub)
+
+
+async def open_stream(topic: str, missing: str) -> StreamingResponse:
+    """Route helper: subscribe first, then read the starting tally, so no
+    change lands between the two unseen"""
+    if tally_hub.full:
+        raise HTTPException(status_code=503, detail="Too many live streams, try again later")
+    sub = tally_hub.subscribe(topic)
+    try:
+        tally = await tally_hub.load(topic)
+    except BaseException:
+        tally_hub.unsubscribe(sub)
+        raise
+    if tally is None:
+        tally_hub.unsubscribe(sub)
+        raise HTTPException(status_code=404, detail=missing)
+    return StreamingResponse(
+        event_stream(tally_hub, sub, tally),
+        media_type="text/event-stream",
+        # No proxy buffering, or frames would sit in nginx until it fills
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+tally_hub = TallyHub()
@@ -0,0 +1,70 @@
+# 1337Jury - User Loader
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Per-request batched User lookups (one IN query per batch)
+
+from typing import Iterable
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_read_db
+from app.models.user import User
+
+
+class UserLoader:
+    """Collects user ids (or logins) and resolves them in a single query.
+
+    Routes call want() for every id a response needs, then load_many() once;
+    users already seen in the request are served from memory.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._by_id: dict[int, User | None] = {}
+        self._pending: set[int] = set()
+
+    def prime(self, *users: User) -> None:
+        for user in users:
+            self._by_id[user.id] = user
+
+    def want(self, *user_ids: int | None) -> None:
+        for user_id in user_ids:
+            if user_id is not None and user_id not in self._by_id:
+                self._pending.add(user_id)
+
+    async def load_many(self, user_ids: Iterable[int | None] = ()) -> dict[int, User | None]:
+        self.want(*user_ids)
+        if self._pending:
+            ids, self._pending = self._pending, set()
+            result = await self.db.execute(select(User).where(User.id.in_(ids)))
+            found = {u.id: u for u in result.scalars().all()}
+            for user_id in ids:
+                self._by_id[user_id] = found.get(user_id)
+        return self._by_id
+
+    async def load(self, user_id: int | None) -> User | None:
+        if user_id is None:
+            return None
+        users = await self.load_many([user_id])
+        return users.get(user_id)
+
+    async def load_by_logins(self, logins: Iterable[str]) -> dict[str, User]:
+        """Resolve logins to users in one query; unknown logins are left out."""
+        wanted = set(logins)
+        known = {u.login: u for u in self._by_id.values() if u is not None and u.login in wanted}
+        missing = wanted - known.keys()
+        if missing:
+            result = await self.db.execute(select(User).where(User.login.in_(missing)))
+            for user in result.scalars().all():
+                self._by_id[user.id] = user
+                known[user.login] = user
+        return known
+
+
+async def get_user_loader(db: AsyncSession = Depends(get_db)) -> UserLoader:
+    return UserLoader(db)
+
+
+async def get_read_user_loader(db: AsyncSession = Depends(get_read_db)) -> UserLoader:
+    """For read-only routes: lookups go to the read session (the replica when
+    there is one), like the rest of the route's queries"""
+    return UserLoader(db)
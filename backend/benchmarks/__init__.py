@@ -0,0 +1,8 @@
+# 1337Jury - Benchmarks
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Synthetic dataset seeder and in-process load scenarios
+#
+#   python -m benchmarks.seed --reset --scale 0.1
+#   python -m benchmarks.run --out bench.json
+#
+# Point DATABASE_URL at a throwaway database: --reset truncates every table.
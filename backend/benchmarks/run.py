@@ -0,0 +1,273 @@
+# 1337Jury - Benchmark Runner
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Drives the real app in-process and reports latency per scenario as JSON
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+import httpx
+from sqlalchemy import select, func, text
+from app.config import settings
+from app.database import AsyncSessionLocal, ReadSessionLocal, engine
+from app.main import app
+from app.models.dispute import Dispute, DisputeStatus
+from app.models.subject_vote import SubjectVote, VoteStatus
+from app.models.user import User
+from app.models.vote_option import VoteOption
+from app.schemas.rows import VoteRow
+from app.services.cache import encode_json, response_cache
+from app.services.jwt_service import create_access_token
+
+
+@dataclass
+class Scenario:
+    """One workload. `request` issues a single HTTP call (or, for micro
+    scenarios, does one unit of in-process work) and returns the status."""
+
+    name: str
+    request: Callable[["Context", random.Random], Awaitable[int]]
+    # Statuses that count as success besides 2xx (e.g. a 409 under contention)
+    expected: tuple[int, ...] = ()
+    concurrency: Optional[int] = None
+
+
+class Context:
+    """Ids and tokens sampled from whatever dataset is loaded"""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self._tokens: dict[int, dict] = {}
+
+    async def load(self) -> None:
+        async with AsyncSessionLocal() as db:
+            self.max_user = await db.scalar(select(func.max(User.id))) or 1
+            self.vote_ids = list(await db.scalars(select(SubjectVote.id).order_by(SubjectVote.id).limit(5000)))
+            self.dispute_ids = list(await db.scalars(select(Dispute.id).order_by(Dispute.id).limit(5000)))
+            self.staff_id = await db.scalar(select(User.id).where(User.is_staff.is_(True)).limit(1))
+            # Hot targets for the contention scenarios
+            self.hot_vote = await db.scalar(
+                select(SubjectVote.id).where(SubjectVote.status == VoteStatus.OPEN).order_by(SubjectVote.id).limit(1)
+            )
+            self.hot_options = list(await db.scalars(
+                select(VoteOption.id).where(VoteOption.subject_vote_id == self.hot_vote).order_by(VoteOption.id)
+            ))
+            self.hot_dispute = await db.scalar(
+                select(Dispute.id).where(Dispute.status == DisputeStatus.OPEN).order_by(Dispute.id).limit(1)
+            )
+        if not (self.vote_ids and self.dispute_ids and self.hot_vote and self.hot_dispute):
+            raise SystemExit("No data to benchmark: run python -m benchmarks.seed first")
+
+    def auth(self, user_id: int) -> dict:
+        headers = self._tokens.get(user_id)
+        if headers is None:
+            headers = self._tokens[user_id] = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+        return headers
+
+    def any_user(self, rng: random.Random) -> dict:
+        return self.auth(rng.randint(1, self.max_user))
+
+    async def get(self, path: str, headers: dict | None = None) -> int:
+        return (await self.client.get(path, headers=headers)).status_code
+
+    async def post(self, path: str, body: dict, headers: dict) -> int:
+        return (await self.client.post(path, json=body, headers=headers)).status_code
+
+
+async def _read_session(ctx: Context, rng: random.Random) -> int:
+    async with ReadSessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+    return 200
+
+
+async def _write_session(ctx: Context, rng: random.Random) -> int:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+        await db.commit()
+    return 200
+
+
+async def _serialize_votes(ctx: Context, rng: random.Random) -> int:
+    # Cost of turning one full page of votes into a JSON body, DB excluded
+    if not hasattr(ctx, "vote_page"):
+        async with AsyncSessionLocal() as db:
+            ctx.vote_page = list(await db.scalars(select(SubjectVote).order_by(SubjectVote.id).limit(200)))
+    json.dumps([v.to_dict() for v in ctx.vote_page], default=str).encode()
+    return 200
+
+
+async def _serialize_vote_rows(ctx: Context, rng: random.Random) -> int:
+    # Same page read as column-only rows, as list_votes does now
+    if not hasattr(ctx, "vote_rows"):
+        async with AsyncSessionLocal() as db:
+            ctx.vote_rows = VoteRow.from_result(await db.execute(VoteRow.select().order_by(SubjectVote.id).limit(200)))
+    encode_json([v.to_dict() for v in ctx.vote_rows])
+    return 200
+
+
+SCENARIOS = [
+    Scenario("list_votes", lambda c, r: c.get("/api/votes?limit=50")),
+    Scenario("list_votes_open", lambda c, r: c.get("/api/votes?status=open&limit=50")),
+    Scenario("list_votes_200", lambda c, r: c.get("/api/votes?limit=200")),
+    Scenario("get_vote", lambda c, r: c.get(f"/api/votes/{r.choice(c.vote_ids)}")),
+    Scenario("list_disputes", lambda c, r: c.get("/api/disputes?limit=50", c.any_user(r))),
+    Scenario("get_dispute", lambda c, r: c.get(f"/api/disputes/{r.choice(c.dispute_ids)}", c.any_user(r))),
+    Scenario("list_resources", lambda c, r: c.get("/api/resources?limit=50")),
+    Scenario("list_resources_200", lambda c, r: c.get("/api/resources?sort=hot&limit=200")),
+    Scenario("list_tests", lambda c, r: c.get("/api/tests?limit=50")),
+    Scenario("list_recodes", lambda c, r: c.get("/api/recodes?limit=50")),
+    Scenario("list_comments", lambda c, r: c.get(f"/api/comments?vote_id={r.choice(c.vote_ids)}&limit=50")),
+    Scenario("comment_counts", lambda c, r: c.get(
+        "/api/comments/count?vote_ids=" + ",".join(str(v) for v in r.sample(c.vote_ids, min(20, len(c.vote_ids))))
+    )),
+    # Many users casting on one vote / one dispute at once
+    Scenario("cast_contention", lambda c, r: c.post(
+        f"/api/votes/{c.hot_vote}/cast", {"option_id": r.choice(c.hot_options)}, c.any_user(r)
+    ), expected=(409,)),
+    Scenario("dispute_contention", lambda c, r: c.post(
+        f"/api/disputes/{c.hot_dispute}/vote", {"vote_for": r.choice(["corrector", "corrected"])}, c.any_user(r)
+    ), expected=(400,)),
+    Scenario("read_session", _read_session),
+    Scenario("write_session", _write_session),
+    Scenario("serialize_votes", _serialize_votes, concurrency=1),
+    Scenario("serialize_vote_rows", _serialize_vote_rows, concurrency=1),
+]
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+async def run_scenario(scenario: Scenario, ctx: Context, requests: int, concurrency: int, seed: int) -> dict:
+    concurrency = scenario.concurrency or concurrency
+    latencies: list[float] = []
+    errors = 0
+    statuses: dict[str, int] = {}
+    remaining = requests
+
+    async def worker(worker_id: int):
+        nonlocal remaining, errors
+        rng = random.Random(seed * 1000 + worker_id)
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                status = await scenario.request(ctx, rng)
+            except Exception as e:
+                print(f"  {scenario.name} error: {e}", file=sys.stderr)
+                status = 599
+            latencies.append(time.perf_counter() - started)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if not (200 <= status < 300 or status in scenario.expected):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "statuses": statuses,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(names: list[str], requests: int, concurrency: int, warmup: int, seed: int, cache: bool, strict: bool) -> dict:
+    response_cache.enabled = cache
+    settings.QUERY_BUDGET_STRICT = strict
+    selected = [s for s in SCENARIOS if not names or s.name in names]
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            ctx = Context(client)
+            await ctx.load()
+            for scenario in selected:
+                if warmup:
+                    await run_scenario(scenario, ctx, warmup, concurrency, seed)
+                results[scenario.name] = await run_scenario(scenario, ctx, requests, concurrency, seed)
+                r = results[scenario.name]
+                print(f"  {scenario.name:20} {r['throughput_rps']:8.1f} rps  p50 {r['p50_ms']:7.2f} ms  "
+                      f"p99 {r['p99_ms']:7.2f} ms  errors {r['errors']}", file=sys.stderr)
+    await engine.dispose()
+    return {
+        "meta": {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "pid": os.getpid(),
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "seed": seed,
+            "cache": cache,
+            "strict_budgets": strict,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the in-process load scenarios")
+    parser.add_argument("--scenario", action="append", default=[], help="run only these (repeatable); default all")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on (off by default to measure the DB path)")
+    parser.add_argument("--strict", action="store_true", help="fail requests that exceed their @query_budget")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--list", action="store_true", help="list the scenarios and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(s.name for s in SCENARIOS))
+        return
+    unknown = set(args.scenario) - {s.name for s in SCENARIOS}
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    # stdout carries only the report: anything the app prints goes to stderr
+    with redirect_stdout(sys.stderr):
+        report = asyncio.run(run(args.scenario, args.requests, args.concurrency, args.warmup, args.seed, args.cache, args.strict))
+    body = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(body + "\n")
+        print(f"Report written to {args.out}", file=sys.stderr)
+    else:
+        print(body)
+    if args.strict and any(r["errors"] for r in report["scenarios"].values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# 1337Jury - Benchmark Seeder
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Loads a realistic synthetic dataset with COPY
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+import asyncpg
+from sqlalchemy import column
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import make_url
+from app.config import settings
+from app.database import engine, Base
+from app.migrations import upgrade
+from app.services.ranking import hot_rank
+import app.models.user, app.models.project, app.models.subject_vote, app.models.vote_option  # noqa: F401
+import app.models.user_vote, app.models.dispute, app.models.dispute_vote, app.models.comment  # noqa: F401
+import app.models.resource, app.models.resource_vote, app.models.test, app.models.recode_request  # noqa: F401
+
+# Row counts at --scale 1
+VOLUMES = {
+    "users": 100_000,
+    "projects": 60,
+    "subject_votes": 10_000,
+    "user_votes": 1_000_000,
+    "disputes": 50_000,
+    "dispute_votes": 250_000,
+    "comments": 200_000,
+    "resources": 20_000,
+    "resource_votes": 200_000,
+    "tests": 10_000,
+    "recodes": 20_000,
+}
+OPTIONS_PER_VOTE = (2, 5)
+CAMPUSES = ["Khouribga", "Benguerir", "Tetouan", "Rabat", "Paris", "Lyon"]
+PLATFORMS = ["Discord", "Google Meet", "Zoom", "In Person"]
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+SPAN = timedelta(days=365)
+# The app's hot-rank expression, rendered for the raw asyncpg connection
+HOT_RANK = hot_rank(column("score"), column("created_at")).compile(
+    dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+)
+
+
+def dsn() -> str:
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class Seeder:
+    """Deterministic for a given seed and scale, so runs can be compared"""
+
+    def __init__(self, conn: asyncpg.Connection, scale: float, seed: int):
+        self.conn = conn
+        self.rng = random.Random(seed)
+        self.n = {table: max(1, int(count * scale)) for table, count in VOLUMES.items()}
+        self.n["projects"] = VOLUMES["projects"]
+
+    def when(self) -> datetime:
+        return EPOCH + SPAN * self.rng.random()
+
+    def user(self) -> int:
+        # Activity is skewed: a small share of users does most of the voting
+        return min(int(self.rng.paretovariate(1.2)), self.n["users"])
+
+    async def copy(self, table: str, columns: list[str], records) -> None:
+        started = time.perf_counter()
+        await self.conn.copy_records_to_table(table, columns=columns, records=records)
+        print(f"  {table:16} {time.perf_counter() - started:6.1f}s")
+
+    async def run(self) -> None:
+        rng, n = self.rng, self.n
+        await self.copy("users", ["id", "ft_id", "login", "email", "display_name", "is_staff", "is_active", "created_at"], (
+            (i, 100000 + i, f"user{i}", f"user{i}@student.1337.ma", f"User {i}", i <= 20, True, self.when())
+            for i in range(1, n["users"] + 1)
+        ))
+        await self.copy("projects", ["id", "name", "slug", "description"], (
+            (i, f"Project {i}", f"project-{i}", "Synthetic project") for i in range(1, n["projects"] + 1)
+        ))
+
+        options: list[list[int]] = []
+        option_rows = []
+        for vote_id in range(1, n["subject_votes"] + 1):
+            ids = []
+            for k in range(rng.randint(*OPTIONS_PER_VOTE)):
+                option_rows.append((len(option_rows) + 1, vote_id, f"Option {k + 1}", 0))
+                ids.append(len(option_rows))
+            options.append(ids)
+        await self.copy("subject_votes", ["id", "title", "description", "project_id", "user_id", "status", "created_at", "comment_count"], (
+            (i, f"Subject vote {i}", "Is this evaluation subject ambiguous?", rng.randint(1, n["projects"]),
+             self.user(), rng.choices(["OPEN", "CLOSED", "STAFF_DECIDED"], [6, 3, 1])[0], self.when(), 0)
+            for i in range(1, n["subject_votes"] + 1)
+        ))
+        await self.copy("vote_options", ["id", "subject_vote_id", "text", "vote_count"], option_rows)
+
+        def user_votes():
+            row_id = 0
+            per_vote = max(1, n["user_votes"] // n["subject_votes"])
+            for vote_id, ids in enumerate(options, start=1):
+                for user_id in rng.sample(range(1, n["users"] + 1), min(per_vote, n["users"])):
+                    row_id += 1
+                    yield row_id, vote_id, rng.choice(ids), user_id, self.when()
+        await self.copy("user_votes", ["id", "subject_vote_id", "option_id", "user_id", "created_at"], user_votes())
+
+        def disputes():
+            for i in range(1, n["disputes"] + 1):
+                corrector, corrected = rng.sample(range(1, n["users"] + 1), 2)
+                yield (i, f"Dispute {i}", "The corrector and I disagree", rng.randint(1, n["projects"]),
+                       corrector, corrected, corrected, rng.choices(["OPEN", "CLOSED", "STAFF_DECIDED"], [6, 3, 1])[0],
+                       0, 0, self.when(), 0)
+        await self.copy("disputes", ["id", "title", "description", "project_id", "corrector_id", "corrected_id", "created_by",
+                                     "status", "corrector_votes", "corrected_votes", "created_at", "comment_count"], disputes())
+
+        def dispute_votes():
+            row_id = 0
+            per_dispute = max(1, n["dispute_votes"] // n["disputes"])
+            for dispute_id in range(1, n["disputes"] + 1):
+                for user_id in rng.sample(range(1, n["users"] + 1), per_dispute):
+                    row_id += 1
+                    yield row_id, dispute_id, user_id, rng.choice(["CORRECTOR", "CORRECTED"]), self.when()
+        await self.copy("dispute_votes", ["id", "dispute_id", "user_id", "vote_for", "created_at"], dispute_votes())
+
+        def comments():
+            for i in range(1, n["comments"] + 1):
+                on_vote = rng.random() < 0.6
+                target = rng.randint(1, n["subject_votes"] if on_vote else n["disputes"])
+                yield (i, f"Comment {i}", self.user(), target if on_vote else None, None if on_vote else target, None, self.when())
+        await self.copy("comments", ["id", "content", "user_id", "vote_id", "dispute_id", "parent_id", "created_at"], comments())
+
+        await self.copy("resources", ["id", "title", "url", "description", "resource_type", "project_id", "user_id", "upvotes", "downvotes", "created_at"], (
+            (i, f"Resource {i}", f"https://example.com/r/{i}", None,
+             rng.choice(["VIDEO", "ARTICLE", "DOCUMENTATION", "TUTORIAL", "OTHER"]),
+             rng.randint(1, n["projects"]), self.user(), 0, 0, self.when())
+            for i in range(1, n["resources"] + 1)
+        ))
+
+        def resource_votes():
+            row_id = 0
+            per_resource = max(1, n["resource_votes"] // n["resources"])
+            for resource_id in range(1, n["resources"] + 1):
+                for user_id in rng.sample(range(1, n["users"] + 1), per_resource):
+                    row_id += 1
+                    yield row_id, resource_id, user_id, rng.random() < 0.8, self.when()
+        await self.copy("resource_votes", ["id", "resource_id", "user_id", "is_upvote", "created_at"], resource_votes())
+
+        await self.copy("tests", ["id", "title", "description", "github_url", "project_id", "user_id", "is_approved", "downloads", "created_at"], (
+            (i, f"Tester {i}", None, f"https://github.com/user/tester-{i}", rng.randint(1, n["projects"]),
+             self.user(), rng.random() < 0.9, int(rng.paretovariate(1.1)), self.when())
+            for i in range(1, n["tests"] + 1)
+        ))
+        await self.copy("recode_requests", ["id", "user_id", "project_id", "campus", "meeting_platform", "status", "matched_user_id", "created_at"], (
+            (i, self.user(), rng.randint(1, n["projects"]), rng.choice(CAMPUSES), rng.choice(PLATFORMS),
+             status, rng.randint(1, n["users"]) if status != "open" else None, self.when())
+            for i, status in ((i, rng.choices(["open", "matched", "completed", "cancelled"], [5, 2, 2, 1])[0])
+                              for i in range(1, n["recodes"] + 1))
+        ))
+
+    async def finish(self) -> None:
+        """Recompute the denormalized counters, move sequences past the ids, ANALYZE"""
+        started = time.perf_counter()
+        await self.conn.execute(f"""
+            UPDATE vote_options o SET vote_count = c.n
+            FROM (SELECT option_id, count(*) AS n FROM user_votes GROUP BY option_id) c WHERE c.option_id = o.id;
+            UPDATE disputes d SET corrector_votes = c.a, corrected_votes = c.b
+            FROM (SELECT dispute_id, count(*) FILTER (WHERE vote_for = 'CORRECTOR') AS a,
+                         count(*) FILTER (WHERE vote_for = 'CORRECTED') AS b
+                  FROM dispute_votes GROUP BY dispute_id) c WHERE c.dispute_id = d.id;
+            UPDATE resources r SET upvotes = c.up, downvotes = c.down
+            FROM (SELECT resource_id, count(*) FILTER (WHERE is_upvote) AS up,
+                         count(*) FILTER (WHERE NOT is_upvote) AS down
+                  FROM resource_votes GROUP BY resource_id) c WHERE c.resource_id = r.id;
+            UPDATE resources SET score = upvotes - downvotes;
+            UPDATE resources SET hot_rank = {HOT_RANK};
+            UPDATE subject_votes v SET comment_count = c.n
+            FROM (SELECT vote_id, count(*) AS n FROM comments WHERE vote_id IS NOT NULL GROUP BY vote_id) c WHERE c.vote_id = v.id;
+            UPDATE disputes d SET comment_count = c.n
+            FROM (SELECT dispute_id, count(*) AS n FROM comments WHERE dispute_id IS NOT NULL GROUP BY dispute_id) c WHERE c.dispute_id = d.id;
+        """)
+        for table in ["users", "projects", "subject_votes", "vote_options", "user_votes", "disputes", "dispute_votes",
+                      "comments", "resources", "resource_votes", "tests", "recode_requests"]:
+            await self.conn.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce((SELECT max(id) FROM {table}), 0) + 1, false)"
+            )
+        await self.conn.execute("ANALYZE")
+        print(f"  {'counters':16} {time.perf_counter() - started:6.1f}s")
+
+
+async def seed(scale: float, seed_value: int, reset: bool) -> None:
+    await upgrade()
+    await engine.dispose()
+    conn = await asyncpg.connect(dsn())
+    try:
+        if reset:
+            tables = ", ".join(Base.metadata.tables)
+            await conn.execute(f"TRUNCATE {tables} RESTART IDENTITY CASCADE")
+        seeder = Seeder(conn, scale, seed_value)
+        print(f"Seeding at scale {scale}:")
+        started = time.perf_counter()
+        async with conn.transaction():
+            await seeder.run()
+        await seeder.finish()
+        print(f"Done in {time.perf_counter() - started:.1f}s")
+    finally:
+        await conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load the synthetic benchmark dataset")
+    parser.add_argument("--scale", type=float, default=1.0, help="fraction of the full volumes (1.0 = 100k users, 1M ballots)")
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("--reset", action="store_true", help="truncate every table first")
+    args = parser.parse_args()
+    asyncio.run(seed(args.scale, args.seed, args.reset))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# 1337Jury - Cache Bus Test Worker
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: One app worker process for the multi-process bus tests, driven line by line over stdin
+#
+#   put <key> <tag>...   cache a response under the tags
+#   has <key>            "yes" while the response is cached, else "no"
+#   invalidate <tag>...  invalidate locally (and, through the bus, everywhere)
+#   clear                clear locally (and everywhere)
+#   stats                the bus counters as JSON
+
+import asyncio
+import json
+import sys
+from app.services.cache import response_cache
+from app.services.cache_bus import cache_bus
+
+
+def handle(command: str, args: list[str]) -> str:
+    if command == "put":
+        response_cache.put(args[0], {"key": args[0]}, tags=args[1:])
+    elif command == "has":
+        return "yes" if response_cache.get(args[0]) is not None else "no"
+    elif command == "invalidate":
+        response_cache.invalidate(*args)
+    elif command == "clear":
+        response_cache.clear()
+    elif command == "stats":
+        return json.dumps(cache_bus.stats())
+    else:
+        return f"unknown command {command}"
+    return "ok"
+
+
+async def main() -> None:
+    await cache_bus.start()
+    while not cache_bus.connected:
+        await asyncio.sleep(0.01)
+    print("ready", flush=True)
+    while line := await asyncio.to_thread(sys.stdin.readline):
+        command, *args = line.split()
+        print(handle(command, args), flush=True)
+    await cache_bus.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+# 1337Jury - Test Fixtures
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Throwaway Postgres (pytest-postgresql), migrated and seeded once per session
+
+import os
+from datetime import datetime, timedelta, timezone
+import port_for
+import pytest
+from pytest_postgresql import factories
+from pytest_postgresql.janitor import DatabaseJanitor
+
+# app.database builds its engines from the settings at import time, so the
+# server's address is fixed before anything under app/ is imported
+PORT = port_for.select_random()
+DBNAME = "jury_test"
+os.environ["DATABASE_URL"] = f"postgresql+asyncpg://postgres@127.0.0.1:{PORT}/{DBNAME}"
+os.environ["DATABASE_READ_URL"] = ""
+os.environ["CACHE_BUS_ENABLED"] = "false"
+os.environ["ARCHIVE_ENABLED"] = "false"
+for name, value in {
+    "FT_CLIENT_ID": "test-client",
+    "FT_CLIENT_SECRET": "test-secret",
+    "FT_REDIRECT_URI": "http://testserver/api/auth/callback",
+    "FT_AUTH_REDIRECT": "http://testserver/api/auth/login",
+    "JWT_SECRET": "test-secret",
+    "FRONTEND_URL": "http://localhost:5173",
+}.items():
+    os.environ.setdefault(name, value)
+
+import httpx  # noqa: E402
+from sqlalchemy import update  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.database import engine, read_engine  # noqa: E402
+from app.services.archiver import KINDS, move_batch  # noqa: E402
+from app.services.auth_cache import auth_cache  # noqa: E402
+from app.services.cache import response_cache  # noqa: E402
+from app.services.ft_api import ft_api  # noqa: E402
+from app.services.jwt_service import create_access_token  # noqa: E402
+from benchmarks.seed import seed  # noqa: E402
+
+postgresql_proc = factories.postgresql_proc(port=PORT)
+
+# Enough rows that every list fills a MAX_LIMIT page (300 votes, 1500 disputes ...)
+SEED_SCALE = 0.03
+# Seeded users up to this id are staff
+STAFF_ID = 1
+STUDENT_ID = 500
+
+
+def auth(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+# Older than anything seeded, so only the rows a test backdates get archived
+LONG_AGO = datetime(1980, 1, 1, tzinfo=timezone.utc)
+
+
+async def archive(kind: str, row_id: int) -> None:
+    """Move one closed vote/dispute ("votes"/"disputes") to the archive tables"""
+    parent, finished, children = KINDS[kind]
+    async with engine.begin() as conn:
+        await conn.execute(update(parent).where(parent.id == row_id).values(closed_at=LONG_AGO))
+        moved = await conn.scalar(move_batch(parent, finished, children, LONG_AGO + timedelta(days=1), 10))
+    assert moved == 1
+
+
+class FakeIntra:
+    """Stands in for the 42 API: every code is a login for the profile it names"""
+
+    def __init__(self):
+        self.profiles: dict[str, dict] = {}
+        self.requests: list[httpx.Request] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.path.endswith("/oauth/token"):
+            code = dict(httpx.QueryParams(request.content.decode())).get("code")
+            if code not in self.profiles:
+                return httpx.Response(401, json={"error": "invalid_grant"})
+            return httpx.Response(200, json={"access_token": code, "token_type": "bearer"})
+        if request.url.path.endswith("/me"):
+            token = request.headers["Authorization"].removeprefix("Bearer ")
+            return httpx.Response(200, json=self.profiles[token])
+        return httpx.Response(404)
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    # One event loop for the whole session: the engines' pooled connections
+    # belong to the loop that opened them
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def intra() -> FakeIntra:
+    return FakeIntra()
+
+
+@pytest.fixture(scope="session")
+async def app(postgresql_proc, intra):
+    """The real app over a migrated, seeded database, lifespan running"""
+    from app.main import app as fastapi_app
+
+    janitor = DatabaseJanitor(
+        user=postgresql_proc.user,
+        host=postgresql_proc.host,
+        port=postgresql_proc.port,
+        password=postgresql_proc.password,
+        dbname=DBNAME,
+    )
+    janitor.init()
+    try:
+        await seed(SEED_SCALE, 1337, reset=False)
+        ft_api._client = httpx.AsyncClient(transport=httpx.MockTransport(intra.handler))
+        async with fastapi_app.router.lifespan_context(fastapi_app):
+            yield fastapi_app
+    finally:
+        await engine.dispose()
+        await read_engine.dispose()
+        janitor.drop()
+
+
+@pytest.fixture
+async def client(app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        yield client
+
+
+@pytest.fixture
+async def budget_client(app, monkeypatch):
+    """A client for budget checks: over-budget requests answer 500 instead of
+    only logging, and every request starts cold (no cached response or user),
+    on the path that costs the most queries"""
+    monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", True)
+
+    async def cold(request: httpx.Request) -> None:
+        response_cache.clear(publish=False)
+        auth_cache.clear(publish=False)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://testserver",
+        event_hooks={"request": [cold]},
+    ) as client:
+        yield client
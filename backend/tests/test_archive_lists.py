@@ -0,0 +1,53 @@
+# 1337Jury - Archive Listing Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Closed and unfiltered lists keep showing votes and disputes once they are archived
+
+import pytest
+from sqlalchemy import select
+from app.database import engine
+from app.models.user import User
+from tests.conftest import STAFF_ID, STUDENT_ID, archive, auth
+
+pytestmark = pytest.mark.anyio
+
+STAFF = auth(STAFF_ID)
+STUDENT = auth(STUDENT_ID)
+PROJECT_ID = 2
+
+
+async def _ids(client, path: str, **params) -> list[int]:
+    response = await client.get(path, params={"project_id": PROJECT_ID, "limit": 50, **params}, headers=STUDENT)
+    assert response.status_code == 200, response.text
+    return [item["id"] for item in response.json()["items"]]
+
+
+async def test_archived_vote_stays_listed(budget_client):
+    body = {"title": "Archived", "description": "Listed", "project_id": PROJECT_ID, "options": ["a", "b"]}
+    vote = (await budget_client.post("/api/votes", json=body, headers=STUDENT)).json()
+    options = (await budget_client.get(f"/api/votes/{vote['id']}")).json()["options"]
+    decision = {"winning_option_id": options[0]["id"]}
+    assert (await budget_client.post(f"/api/votes/{vote['id']}/staff-decision", json=decision, headers=STAFF)).status_code == 200
+    await archive("votes", vote["id"])
+
+    # Newest first, so it heads every list it belongs to
+    assert (await _ids(budget_client, "/api/votes"))[0] == vote["id"]
+    assert (await _ids(budget_client, "/api/votes", status="staff_decided"))[0] == vote["id"]
+    assert vote["id"] not in await _ids(budget_client, "/api/votes", status="open")
+    listed = (await budget_client.get("/api/votes", params={"project_id": PROJECT_ID, "limit": 1})).json()["items"][0]
+    assert listed["status"] == "staff_decided" and listed["winning_option_id"] == options[0]["id"]
+
+
+async def test_archived_dispute_stays_listed(budget_client):
+    async with engine.connect() as conn:
+        logins = list(await conn.scalars(select(User.login).where(User.id > STAFF_ID).order_by(User.id).limit(2)))
+    body = {
+        "title": "Archived", "description": "Listed", "project_id": PROJECT_ID,
+        "corrector_username": logins[0], "corrected_username": logins[1],
+    }
+    dispute = (await budget_client.post("/api/disputes", json=body, headers=STUDENT)).json()
+    assert (await budget_client.post(f"/api/disputes/{dispute['id']}/close", headers=STUDENT)).status_code == 200
+    await archive("disputes", dispute["id"])
+
+    assert (await _ids(budget_client, "/api/disputes"))[0] == dispute["id"]
+    assert (await _ids(budget_client, "/api/disputes", status="closed"))[0] == dispute["id"]
+    assert dispute["id"] not in await _ids(budget_client, "/api/disputes", status="open")
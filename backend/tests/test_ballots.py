@@ -0,0 +1,83 @@
+# 1337Jury - Ballot Concurrency Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Parallel casts and option switches keep vote_count equal to the ballots behind it
+
+import asyncio
+import random
+import pytest
+from sqlalchemy import select, func
+from app.database import AsyncSessionLocal
+from app.models.user_vote import UserVote
+from app.models.vote_option import VoteOption
+from tests.conftest import STUDENT_ID, auth
+
+pytestmark = pytest.mark.anyio
+
+VOTERS = 40
+CASTS_PER_VOTER = 6
+
+
+async def _new_vote(client, options: int) -> tuple[int, list[int]]:
+    body = {"title": "Race", "description": "Parallel ballots", "project_id": 1, "options": [f"o{i}" for i in range(options)]}
+    response = await client.post("/api/votes", json=body, headers=auth(STUDENT_ID))
+    assert response.status_code == 200, response.text
+    vote_id = response.json()["id"]
+    async with AsyncSessionLocal() as db:
+        option_ids = list(await db.scalars(
+            select(VoteOption.id).where(VoteOption.subject_vote_id == vote_id).order_by(VoteOption.id)
+        ))
+    return vote_id, option_ids
+
+
+async def _counts(vote_id: int) -> tuple[dict[int, int], dict[int, int]]:
+    """(vote_count per option, ballots per option)"""
+    async with AsyncSessionLocal() as db:
+        counters = dict((await db.execute(
+            select(VoteOption.id, VoteOption.vote_count).where(VoteOption.subject_vote_id == vote_id)
+        )).all())
+        ballots = dict((await db.execute(
+            select(UserVote.option_id, func.count()).where(UserVote.subject_vote_id == vote_id).group_by(UserVote.option_id)
+        )).all())
+    return counters, {option_id: ballots.get(option_id, 0) for option_id in counters}
+
+
+async def test_parallel_casts_and_switches_keep_counts_exact(client):
+    vote_id, options = await _new_vote(client, 3)
+    rng = random.Random(1337)
+    # Every voter fires all of their casts at once: first ballots race each
+    # other (same user included) and switches race across the same options
+    casts = [
+        (auth(STUDENT_ID + voter), rng.choice(options))
+        for voter in range(VOTERS)
+        for _ in range(CASTS_PER_VOTER)
+    ]
+    rng.shuffle(casts)
+    responses = await asyncio.gather(*(
+        client.post(f"/api/votes/{vote_id}/cast", json={"option_id": option_id}, headers=headers)
+        for headers, option_id in casts
+    ))
+
+    statuses = [response.status_code for response in responses]
+    assert 500 not in statuses
+    # 409 is the documented answer when a cast keeps losing its race
+    assert set(statuses) <= {200, 409}, [r.text for r in responses if r.status_code not in (200, 409)]
+
+    counters, ballots = await _counts(vote_id)
+    assert counters == ballots
+    assert sum(ballots.values()) == VOTERS
+
+
+async def test_switching_back_and_forth_in_parallel(client):
+    vote_id, (first, second) = await _new_vote(client, 2)
+    headers = [auth(STUDENT_ID + voter) for voter in range(10)]
+    for round_ in range(4):
+        responses = await asyncio.gather(*(
+            client.post(f"/api/votes/{vote_id}/cast", json={"option_id": first if (i + round_) % 2 else second}, headers=h)
+            for i, h in enumerate(headers)
+            for _ in range(2)
+        ))
+        assert all(r.status_code in (200, 409) for r in responses), [r.text for r in responses]
+
+    counters, ballots = await _counts(vote_id)
+    assert counters == ballots
+    assert sum(ballots.values()) == len(headers)
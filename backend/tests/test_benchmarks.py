@@ -0,0 +1,27 @@
+# 1337Jury - Benchmark Runner Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: The runner's stdout is the JSON report alone, so it can be redirected to a file
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+async def test_stdout_is_only_the_report(app):
+    # Every query is "slow", so the app prints while the scenarios run
+    env = {**os.environ, "SLOW_QUERY_MS": "0.001"}
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--scenario", "list_votes", "--requests", "3", "--warmup", "0"],
+        cwd=BACKEND, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    assert report["scenarios"]["list_votes"]["errors"] == 0
+    assert "list_votes" in result.stderr and "Slow query" in result.stderr
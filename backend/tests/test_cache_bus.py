@@ -0,0 +1,143 @@
+# 1337Jury - Cache Bus Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Invalidations cross worker processes over LISTEN/NOTIFY on the test database
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+import asyncpg
+import pytest
+from app.services.cache import response_cache
+from app.services.cache_bus import CHANNEL, cache_bus
+from app.services.tally_hub import tally_hub
+from tests.conftest import STAFF_ID, STUDENT_ID, auth
+
+pytestmark = pytest.mark.anyio
+
+BACKEND = Path(__file__).resolve().parent.parent
+TIMEOUT = 10
+
+
+class Worker:
+    """A separate Python process running the app's cache and bus (tests/bus_worker.py)"""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+
+    @classmethod
+    async def spawn(cls) -> "Worker":
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "tests.bus_worker",
+            cwd=BACKEND, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+        )
+        worker = cls(process)
+        assert await worker.read() == "ready"
+        return worker
+
+    async def read(self) -> str:
+        line = await asyncio.wait_for(self.process.stdout.readline(), TIMEOUT)
+        return line.decode().strip()
+
+    async def call(self, *args: str) -> str:
+        self.process.stdin.write((" ".join(args) + "\n").encode())
+        await self.process.stdin.drain()
+        return await self.read()
+
+    async def eventually_has(self, key: str, expected: str) -> None:
+        deadline = time.monotonic() + TIMEOUT
+        while (answer := await self.call("has", key)) != expected:
+            assert time.monotonic() < deadline, f"{key}: still {answer}"
+            await asyncio.sleep(0.02)
+
+    async def stop(self) -> None:
+        self.process.stdin.close()
+        await asyncio.wait_for(self.process.wait(), TIMEOUT)
+
+
+@pytest.fixture(scope="module")
+async def workers(app):
+    spawned = await asyncio.gather(Worker.spawn(), Worker.spawn(), Worker.spawn())
+    yield spawned
+    await asyncio.gather(*(w.stop() for w in spawned))
+
+
+async def test_invalidation_reaches_every_other_process(workers):
+    before = [json.loads(await w.call("stats")) for w in workers]
+    for w in workers:
+        assert await w.call("put", "vote-7", "vote:7") == "ok"
+        assert await w.call("put", "vote-8", "vote:8") == "ok"
+
+    first, *others = workers
+    assert await first.call("invalidate", "vote:7") == "ok"
+    assert await first.call("has", "vote-7") == "no"
+    for w in others:
+        await w.eventually_has("vote-7", "no")
+    # Untouched tags stay cached everywhere
+    for w in workers:
+        assert await w.call("has", "vote-8") == "yes"
+
+    after = [json.loads(await w.call("stats")) for w in workers]
+    published = [a["published"] - b["published"] for a, b in zip(after, before)]
+    received = [a["received"] - b["received"] for a, b in zip(after, before)]
+    # A worker ignores its own message
+    assert published == [1, 0, 0]
+    assert received == [0, 1, 1]
+
+
+async def test_clear_reaches_every_other_process(workers):
+    for w in workers:
+        await w.call("put", "projects", "projects")
+    last = workers[-1]
+    assert await last.call("clear") == "ok"
+    for w in workers:
+        await w.eventually_has("projects", "no")
+
+
+@pytest.fixture
+async def notifications(app):
+    """This process's bus running, plus every message on the channel"""
+    received: list[dict] = []
+    listener = await asyncpg.connect(cache_bus.dsn)
+    await listener.add_listener(CHANNEL, lambda conn, pid, channel, payload: received.append(json.loads(payload)))
+    await cache_bus.start()
+    try:
+        yield received
+    finally:
+        await cache_bus.stop()
+        await listener.close()
+
+
+async def _settled(received: list) -> list:
+    # Publishes are fire-and-forget: wait until nothing new arrives
+    count = -1
+    while count != len(received):
+        count = len(received)
+        await asyncio.sleep(0.2)
+    return received
+
+
+async def test_one_notify_per_commit(client, notifications):
+    body = {"title": "Bus", "description": "One message", "project_id": 1, "options": ["a", "b"]}
+    vote = (await client.post("/api/votes", json=body, headers=auth(STUDENT_ID))).json()
+    options = (await client.get(f"/api/votes/{vote['id']}")).json()["options"]
+    (await _settled(notifications)).clear()
+
+    # The cast invalidates the cached vote and publishes its tally topic
+    response = await client.post(f"/api/votes/{vote['id']}/cast", json={"option_id": options[0]["id"]}, headers=auth(STAFF_ID))
+    assert response.status_code == 200
+    assert [m["t"] for m in await _settled(notifications)] == [[f"vote:{vote['id']}"]]
+
+    notifications.clear()
+    body = {"winning_option_id": options[1]["id"]}
+    response = await client.post(f"/api/votes/{vote['id']}/staff-decision", json=body, headers=auth(STAFF_ID))
+    assert response.status_code == 200
+    assert [m["t"] for m in await _settled(notifications)] == [[f"vote:{vote['id']}", "votes"]]
+
+
+async def test_clear_supersedes_queued_tags(notifications):
+    response_cache.invalidate("votes")
+    response_cache.clear()
+    tally_hub.publish("vote:1")
+    assert [m["t"] for m in await _settled(notifications)] == [None]
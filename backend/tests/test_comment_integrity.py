@@ -0,0 +1,109 @@
+# 1337Jury - Comment Integrity Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Comments never outlive their vote or dispute, hot or archived (revision 0008)
+
+import pytest
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from app.database import engine
+from app.models.archive import archived_subject_votes, archived_vote_options
+from app.models.comment import Comment
+from app.models.dispute import Dispute
+from app.models.user import User
+from tests.conftest import STAFF_ID, STUDENT_ID, archive, auth
+
+pytestmark = pytest.mark.anyio
+
+STAFF = auth(STAFF_ID)
+STUDENT = auth(STUDENT_ID)
+
+
+async def _vote(client, decided: bool = False) -> dict:
+    body = {"title": "Integrity", "description": "Comments", "project_id": 1, "options": ["a", "b"]}
+    vote = (await client.post("/api/votes", json=body, headers=STUDENT)).json()
+    vote["options"] = (await client.get(f"/api/votes/{vote['id']}")).json()["options"]
+    await client.post(f"/api/votes/{vote['id']}/cast", json={"option_id": vote["options"][0]["id"]}, headers=STAFF)
+    if decided:
+        body = {"winning_option_id": vote["options"][1]["id"]}
+        response = await client.post(f"/api/votes/{vote['id']}/staff-decision", json=body, headers=STAFF)
+        assert response.status_code == 200, response.text
+    return vote
+
+
+async def _dispute(client) -> dict:
+    async with engine.connect() as conn:
+        logins = list(await conn.scalars(
+            select(User.login).where(User.id > STAFF_ID).order_by(User.id).limit(2)
+        ))
+    body = {
+        "title": "Integrity", "description": "Comments", "project_id": 1,
+        "corrector_username": logins[0], "corrected_username": logins[1],
+    }
+    return (await client.post("/api/disputes", json=body, headers=STUDENT)).json()
+
+
+async def _thread(client, **parent) -> list[int]:
+    """A comment and a reply to it"""
+    first = (await client.post("/api/comments", json={"content": "First", **parent}, headers=STUDENT)).json()
+    body = {"content": "Reply", "parent_id": first["id"], **parent}
+    reply = (await client.post("/api/comments", json=body, headers=STAFF)).json()
+    return [first["id"], reply["id"]]
+
+
+async def _comments(ids: list[int]) -> int:
+    async with engine.connect() as conn:
+        return await conn.scalar(select(func.count()).where(Comment.id.in_(ids)))
+
+
+async def test_deleting_a_decided_vote_removes_its_comments(budget_client):
+    vote = await _vote(budget_client, decided=True)
+    ids = await _thread(budget_client, vote_id=vote["id"])
+    response = await budget_client.delete(f"/api/votes/{vote['id']}", headers=STAFF)
+    assert response.status_code == 200, response.text
+    assert await _comments(ids) == 0
+    assert (await budget_client.get(f"/api/votes/{vote['id']}")).status_code == 404
+
+
+async def test_deleting_an_archived_vote_removes_it_and_its_comments(budget_client):
+    vote = await _vote(budget_client, decided=True)
+    ids = await _thread(budget_client, vote_id=vote["id"])
+    await archive("votes", vote["id"])
+    # Archiving keeps the comments
+    assert await _comments(ids) == 2
+
+    response = await budget_client.delete(f"/api/votes/{vote['id']}", headers=STAFF)
+    assert response.status_code == 200, response.text
+    assert await _comments(ids) == 0
+    async with engine.connect() as conn:
+        assert await conn.scalar(select(func.count()).where(archived_subject_votes.c.id == vote["id"])) == 0
+        assert await conn.scalar(select(func.count()).where(archived_vote_options.c.subject_vote_id == vote["id"])) == 0
+    assert (await budget_client.delete(f"/api/votes/{vote['id']}", headers=STAFF)).status_code == 404
+
+
+async def test_deleting_a_dispute_removes_its_comments(budget_client):
+    dispute = await _dispute(budget_client)
+    ids = await _thread(budget_client, dispute_id=dispute["id"])
+    response = await budget_client.delete(f"/api/disputes/{dispute['id']}", headers=STAFF)
+    assert response.status_code == 200, response.text
+    assert await _comments(ids) == 0
+
+
+async def test_comment_needs_an_existing_parent(app):
+    for parent in ({"vote_id": 10**9}, {"dispute_id": 10**9}):
+        with pytest.raises(IntegrityError, match="does not exist"):
+            async with engine.begin() as conn:
+                await conn.execute(insert(Comment).values(content="Orphan", user_id=STUDENT_ID, **parent))
+
+
+async def test_parent_with_comments_cannot_be_deleted_directly(client):
+    # A ballot-less dispute and an archived vote (no foreign keys there), so
+    # only the comment check can object
+    dispute = await _dispute(client)
+    await _thread(client, dispute_id=dispute["id"])
+    vote = await _vote(client, decided=True)
+    await _thread(client, vote_id=vote["id"])
+    await archive("votes", vote["id"])
+    for table, row_id in ((Dispute.__table__, dispute["id"]), (archived_subject_votes, vote["id"])):
+        with pytest.raises(IntegrityError, match="still has comments"):
+            async with engine.begin() as conn:
+                await conn.execute(delete(table).where(table.c.id == row_id))
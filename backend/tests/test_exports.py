@@ -0,0 +1,38 @@
+# 1337Jury - Export Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: A streamed export holds only its own cursor connection, not the auth session's
+
+import pytest
+from app.api.routes import exports
+from app.database import engine, read_engine
+from tests.conftest import STAFF_ID, STUDENT_ID, auth
+
+pytestmark = pytest.mark.anyio
+
+
+def _checked_out() -> int:
+    pools = {engine.sync_engine.pool, read_engine.sync_engine.pool}
+    return sum(pool.checkedout() for pool in pools)
+
+
+async def test_stream_holds_no_auth_connection(budget_client, monkeypatch):
+    # Connections in use once the body starts, before the export opens its cursor
+    in_use = []
+    export_chunks = exports.export_chunks
+
+    def spy(*args):
+        in_use.append(_checked_out())
+        return export_chunks(*args)
+
+    monkeypatch.setattr(exports, "export_chunks", spy)
+    # The budget client starts with a cold auth cache, so the user is loaded
+    response = await budget_client.get("/api/exports/votes", params={"gzip": "false"}, headers=auth(STAFF_ID))
+    assert response.status_code == 200, response.text
+    assert response.text.count("\n") > 1
+    assert in_use == [0]
+
+
+async def test_students_cannot_export(client):
+    response = await client.get("/api/exports/votes", headers=auth(STUDENT_ID))
+    assert response.status_code == 403
+    assert (await client.get("/api/exports/votes")).status_code == 401
@@ -0,0 +1,61 @@
+# 1337Jury - 42 API Client Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: The one-time code exchange is only retried when the 42 API says it did not process it
+
+import httpx
+import pytest
+from app.services.ft_api import FTApiService
+
+pytestmark = pytest.mark.anyio
+
+
+class Replies:
+    """Answers each request with the next status in line, then 200"""
+
+    def __init__(self, *statuses: int):
+        self.statuses = list(statuses)
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status != 200:
+            # Retry-After: 0 keeps retries from sleeping
+            return httpx.Response(status, headers={"Retry-After": "0"})
+        if request.method == "POST":
+            return httpx.Response(200, json={"access_token": "token"})
+        return httpx.Response(200, json={"login": "someone"})
+
+
+async def _service(replies: Replies) -> FTApiService:
+    service = FTApiService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(replies))
+    return service
+
+
+@pytest.mark.parametrize("status", [502, 504])
+async def test_exchange_is_not_retried_after_a_gateway_error(status):
+    # The gateway may have forwarded it: a second try would spend the code twice
+    replies = Replies(status)
+    service = await _service(replies)
+    assert await service.exchange_code_for_token("code") is None
+    assert len(replies.requests) == 1
+    await service.close()
+
+
+@pytest.mark.parametrize("status", [429, 503])
+async def test_exchange_is_retried_when_refused(status):
+    replies = Replies(status)
+    service = await _service(replies)
+    assert await service.exchange_code_for_token("code") == {"access_token": "token"}
+    assert len(replies.requests) == 2
+    await service.close()
+
+
+@pytest.mark.parametrize("status", [429, 502, 503, 504])
+async def test_reads_are_retried(status):
+    replies = Replies(status)
+    service = await _service(replies)
+    assert await service.get_user_info("token") == {"login": "someone"}
+    assert len(replies.requests) == 2
+    await service.close()
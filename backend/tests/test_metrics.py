@@ -0,0 +1,79 @@
+# 1337Jury - Metrics Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Worker snapshots in METRICS_DIR go away with their worker, their counters kept in the archive
+
+import json
+import os
+import subprocess
+import sys
+import time
+import pytest
+from app.services.metrics import ARCHIVE, MetricsRegistry
+
+pytestmark = pytest.mark.anyio
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _snapshot(directory, pid: int, requests: int, age: float = 0.0) -> str:
+    """A worker's snapshot with `requests` GET /api/x, last written `age` seconds ago"""
+    series = {
+        "statuses": {"200": requests}, "errors": 0,
+        "latency": [requests] + [0] * 11, "latency_sum": 0.0,
+        "size": [requests] + [0] * 7, "size_sum": 0,
+    }
+    path = os.path.join(directory, f"metrics-{pid}.json")
+    with open(path, "w") as f:
+        json.dump({"pid": pid, "series": [["GET", "/api/x", series]], "in_flight": {"GET": 1}}, f)
+    then = time.time() - age
+    os.utime(path, (then, then))
+    return path
+
+
+def _total(text: str) -> int:
+    line = next(l for l in text.splitlines() if l.startswith('http_requests_total{method="GET",route="/api/x"'))
+    return int(line.rsplit(" ", 1)[1])
+
+
+def _in_flight(text: str) -> list[str]:
+    return [l for l in text.splitlines() if l.startswith("http_requests_in_progress{")]
+
+
+async def test_stop_folds_the_workers_snapshot_into_the_archive(tmp_path):
+    registry = MetricsRegistry(str(tmp_path))
+    await registry.start()
+    registry.started("GET")
+    registry.finished("GET", "/api/x", 200, 0.01, 10)
+    registry.flush()
+    assert f"metrics-{os.getpid()}.json" in os.listdir(tmp_path)
+    await registry.stop()
+    assert f"metrics-{os.getpid()}.json" not in os.listdir(tmp_path)
+
+    # Another worker still serves the stopped one's counts
+    text = MetricsRegistry(str(tmp_path)).render()
+    assert _total(text) == 1
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/x"} 1' in text
+
+
+def test_exited_workers_keep_their_counters(tmp_path):
+    live = _snapshot(tmp_path, os.getppid(), 5)
+    dead = _snapshot(tmp_path, _dead_pid(), 7)
+    # Alive, but has not flushed for a day (a blocked loop, or a reused pid)
+    quiet = _snapshot(tmp_path, 1, 11, age=86400)
+
+    registry = MetricsRegistry(str(tmp_path))
+    text = registry.render()
+    assert _total(text) == 5 + 7 + 11
+    # Only the live workers' requests are in flight
+    assert _in_flight(text) == ['http_requests_in_progress{method="GET"} 2']
+    assert os.path.exists(live) and os.path.exists(quiet) and not os.path.exists(dead)
+    assert os.path.exists(tmp_path / ARCHIVE)
+
+    # The folded counts are not lost, nor counted twice, on the next scrape
+    assert _total(registry.render()) == 23
+    _snapshot(tmp_path, _dead_pid(), 2)
+    assert _total(registry.render()) == 25
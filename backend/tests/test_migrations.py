@@ -0,0 +1,65 @@
+# 1337Jury - Migration Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: The revisions, applied to an empty database, build the schema the models describe
+
+import pytest
+from sqlalchemy import inspect
+from app.database import Base, engine
+from app.migrations import applied_versions, revisions, upgrade
+
+pytestmark = pytest.mark.anyio
+
+# Postgres stores a bare FLOAT as DOUBLE PRECISION
+_SPELLINGS = {"FLOAT": "DOUBLE PRECISION"}
+
+
+def _schema(sync_conn) -> dict:
+    inspector = inspect(sync_conn)
+    schema = {}
+    for table in inspector.get_table_names():
+        if table == "schema_migrations":
+            continue
+        schema[table] = {
+            "columns": {
+                c["name"]: (c["type"].compile(sync_conn.dialect), c["nullable"]) for c in inspector.get_columns(table)
+            },
+            "indexes": {i["name"] for i in inspector.get_indexes(table)},
+            "references": sorted(fk["referred_table"] for fk in inspector.get_foreign_keys(table)),
+        }
+    return schema
+
+
+def _models() -> dict:
+    schema = {}
+    for table in Base.metadata.tables.values():
+        columns = {}
+        for c in table.columns:
+            if c.system:
+                continue
+            kind = c.type.compile(engine.dialect)
+            columns[c.name] = (_SPELLINGS.get(kind, kind), c.nullable)
+        schema[table.name] = {
+            "columns": columns,
+            "indexes": {i.name for i in table.indexes},
+            "references": sorted(fk.column.table.name for fk in table.foreign_keys),
+        }
+    return schema
+
+
+async def test_every_revision_is_applied(app):
+    async with engine.connect() as conn:
+        assert await applied_versions(conn) == {m.revision for m in revisions()}
+    # and upgrading again is a no-op
+    assert await upgrade() == []
+
+
+async def test_migrated_schema_matches_the_models(app):
+    async with engine.connect() as conn:
+        migrated = await conn.run_sync(_schema)
+    models = _models()
+    assert set(migrated) == set(models)
+    for name, table in models.items():
+        assert migrated[name]["columns"] == table["columns"], name
+        # Migrations may keep extra indexes (unique constraints, primary keys)
+        assert table["indexes"] <= migrated[name]["indexes"], name
+        assert migrated[name]["references"] == table["references"], name
@@ -0,0 +1,64 @@
+# 1337Jury - Pagination Tests
+# This file is for: ADMIRAL (Backend Dev 1) & ZERO (Backend Dev 2)
+# Description: Cursors are client input: every value must fit its keyset column or the list answers 400
+
+import base64
+import json
+import pytest
+from tests.conftest import STUDENT_ID, auth
+
+pytestmark = pytest.mark.anyio
+
+# Listing -> a cursor of the right shape (created_at/rank/downloads, id)
+LISTINGS = {
+    "/api/votes": ["2024-01-01T00:00:00+00:00", 10],
+    "/api/disputes": ["2024-01-01T00:00:00+00:00", 10],
+    "/api/recodes": ["2024-01-01T00:00:00+00:00", 10],
+    "/api/resources?sort=top": [3, 10],
+    "/api/resources?sort=hot": [1.5, 10],
+    "/api/tests": [3, 10],
+    "/api/projects": [10],
+}
+# Values no keyset column accepts, whatever its type
+INVALID = [[1], {"a": 1}, True]
+
+
+def cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+async def _get(client, listing: str, values) -> int:
+    path, _, query = listing.partition("?")
+    params = dict(p.split("=") for p in query.split("&") if p)
+    response = await client.get(path, params={**params, "limit": 5, "cursor": cursor(values)}, headers=auth(STUDENT_ID))
+    return response.status_code
+
+
+@pytest.mark.parametrize("listing", LISTINGS)
+async def test_well_typed_cursor_pages(client, listing):
+    assert await _get(client, listing, LISTINGS[listing]) == 200
+
+
+@pytest.mark.parametrize("listing", LISTINGS)
+async def test_mistyped_cursor_is_a_400(client, listing):
+    valid = LISTINGS[listing]
+    for position in range(len(valid)):
+        for wrong in [*INVALID, "not a value" if not isinstance(valid[position], str) else 12]:
+            values = list(valid)
+            values[position] = wrong
+            assert await _get(client, listing, values) == 400, (position, wrong)
+
+
+@pytest.mark.parametrize("values", [
+    ["2024-01-01T00:00:00+00:00", 2**31],     # beyond INTEGER
+    ["2024-01-01T00:00:00+00:00", 1.5],       # not integral
+    ["yesterday", 10],                        # not a timestamp
+    ["2024-01-01T00:00:00+00:00"],            # wrong length
+])
+async def test_out_of_range_values_are_a_400(client, values):
+    assert await _get(client, "/api/votes", values) == 400
+
+
+async def test_non_finite_rank_is_a_400(client):
+    # json.dumps writes NaN, which json.loads reads back as a float
+    assert await _get(client, "/api/resources?sort=hot", [float("nan"), 10]) == 400
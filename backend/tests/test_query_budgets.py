@@ -0,0 +1,406 @@
+# 1337Jury - Query Budget Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Every route is exercised cold against the seeded database, within its @query_budget
+
+import itertools
+from dataclasses import dataclass
+import httpx
+import pytest
+from fastapi.routing import APIRoute
+from sqlalchemy import select, func
+from app.api.pagination import MAX_LIMIT
+from app.database import AsyncSessionLocal
+from app.models.dispute import Dispute, DisputeStatus
+from app.models.project import Project
+from app.models.resource_vote import ResourceVote
+from app.models.subject_vote import SubjectVote, VoteStatus
+from app.models.test import Test as UploadedTest
+from app.models.user import User
+from app.services.jwt_service import create_access_token
+from tests.conftest import STAFF_ID, STUDENT_ID, auth
+
+pytestmark = pytest.mark.anyio
+
+STAFF = auth(STAFF_ID)
+STUDENT = auth(STUDENT_ID)
+OTHER = auth(STUDENT_ID + 1)
+_unique = itertools.count(1)
+
+
+@dataclass
+class Targets:
+    """Seeded rows the scenarios act on"""
+
+    project_id: int
+    open_vote: int
+    closed_vote: int
+    open_dispute: int
+    closed_dispute: int
+    approved_test: int
+    voted_resource: int
+    logins: list[str]
+
+
+@pytest.fixture(scope="module")
+async def targets(app) -> Targets:
+    async with AsyncSessionLocal() as db:
+        return Targets(
+            project_id=await db.scalar(select(func.min(Project.id))),
+            open_vote=await db.scalar(
+                select(SubjectVote.id).where(SubjectVote.status == VoteStatus.OPEN).order_by(SubjectVote.id).limit(1)
+            ),
+            closed_vote=await db.scalar(
+                select(SubjectVote.id).where(SubjectVote.status == VoteStatus.CLOSED).order_by(SubjectVote.id).limit(1)
+            ),
+            open_dispute=await db.scalar(
+                select(Dispute.id).where(Dispute.status == DisputeStatus.OPEN).order_by(Dispute.id).limit(1)
+            ),
+            closed_dispute=await db.scalar(
+                select(Dispute.id).where(Dispute.status == DisputeStatus.CLOSED).order_by(Dispute.id).limit(1)
+            ),
+            approved_test=await db.scalar(select(UploadedTest.id).where(UploadedTest.is_approved.is_(True)).order_by(UploadedTest.id).limit(1)),
+            voted_resource=await db.scalar(select(func.min(ResourceVote.resource_id))),
+            logins=list(await db.scalars(select(User.login).where(User.id > STAFF_ID).order_by(User.id).limit(2))),
+        )
+
+
+def ok(response: httpx.Response, status: int = 200) -> dict:
+    assert response.status_code == status, response.text
+    return response.json() if status == 200 and "json" in response.headers.get("content-type", "") else {}
+
+
+async def new_vote(client: httpx.AsyncClient, t: Targets) -> dict:
+    body = {"title": "Budget", "description": "Budget check", "project_id": t.project_id, "options": ["a", "b"]}
+    vote = ok(await client.post("/api/votes", json=body, headers=STUDENT))
+    vote["options"] = ok(await client.get(f"/api/votes/{vote['id']}"))["options"]
+    return vote
+
+
+async def new_dispute(client: httpx.AsyncClient, t: Targets) -> dict:
+    body = {
+        "title": "Budget", "description": "Budget check", "project_id": t.project_id,
+        "corrector_username": t.logins[0], "corrected_username": t.logins[1],
+    }
+    return ok(await client.post("/api/disputes", json=body, headers=STUDENT))
+
+
+async def new_test(client: httpx.AsyncClient, t: Targets, headers: dict = STUDENT) -> dict:
+    body = {"title": "Budget", "github_url": "https://github.com/x/y", "project_id": t.project_id}
+    return ok(await client.post("/api/tests", json=body, headers=headers))
+
+
+async def new_recode(client: httpx.AsyncClient, t: Targets) -> dict:
+    body = {"project_id": t.project_id, "campus": "khouribga", "meeting_platform": "discord"}
+    return ok(await client.post("/api/recodes", json=body, headers=STUDENT))
+
+
+SCENARIOS = {}
+
+
+def covers(*routes: str):
+    """Register a scenario for routes ("GET /api/votes/{vote_id}", as routed)"""
+
+    def register(scenario):
+        for route in routes:
+            SCENARIOS[route] = scenario
+        return scenario
+
+    return register
+
+
+# --- Auth -----------------------------------------------------------------
+
+@covers("GET /api/auth/login")
+async def login(client, t):
+    ok(await client.get("/api/auth/login"), 307)
+
+
+@covers("GET /api/auth/callback")
+async def callback(client, t, intra):
+    # First login inserts the user, the next one (changed profile) updates it
+    n = next(_unique)
+    profile = {"id": 900_000 + n, "login": f"budget{n}", "email": f"budget{n}@42.fr", "displayname": "First"}
+    intra.profiles[f"first-{n}"] = profile
+    intra.profiles[f"again-{n}"] = {**profile, "displayname": "Second"}
+    ok(await client.get("/api/auth/callback", params={"code": f"first-{n}"}), 307)
+    ok(await client.get("/api/auth/callback", params={"code": f"again-{n}"}), 307)
+
+
+@covers("GET /api/auth/me", "GET /api/auth/verify")
+async def me(client, t):
+    token = create_access_token({"sub": str(STUDENT_ID)})
+    ok(await client.get("/api/auth/me", params={"token": token}))
+    ok(await client.get("/api/auth/verify", params={"token": token}))
+
+
+# --- Projects -------------------------------------------------------------
+
+@covers("GET /api/projects", "GET /api/projects/{project_id}")
+async def projects(client, t):
+    ok(await client.get("/api/projects", params={"limit": MAX_LIMIT}))
+    response = await client.get(f"/api/projects/{t.project_id}")
+    ok(response)
+    ok(await client.get(f"/api/projects/{t.project_id}", headers={"If-None-Match": response.headers["etag"]}), 304)
+
+
+@covers("POST /api/projects")
+async def create_project(client, t):
+    n = next(_unique)
+    ok(await client.post("/api/projects", json={"name": f"budget{n}", "slug": f"budget-{n}"}, headers=STAFF))
+
+
+# --- Resources ------------------------------------------------------------
+
+@covers("GET /api/resources", "POST /api/resources", "POST /api/resources/{resource_id}/vote")
+async def resources(client, t):
+    ok(await client.get("/api/resources", params={"limit": MAX_LIMIT}))
+    ok(await client.get("/api/resources", params={"limit": MAX_LIMIT, "sort": "hot"}))
+    body = {"title": "Budget", "url": "https://example.com", "project_id": t.project_id}
+    resource = ok(await client.post("/api/resources", json=body, headers=STUDENT))
+    # New vote, switched vote, withdrawn vote
+    for is_upvote in (True, False, False):
+        ok(await client.post(f"/api/resources/{resource['id']}/vote", json={"is_upvote": is_upvote}, headers=OTHER))
+
+
+@covers("DELETE /api/resources/{resource_id}")
+async def delete_resource(client, t):
+    ok(await client.delete(f"/api/resources/{t.voted_resource}", headers=STAFF))
+
+
+# --- Subject votes --------------------------------------------------------
+
+@covers("GET /api/votes", "GET /api/votes/{vote_id}")
+async def votes(client, t):
+    ok(await client.get("/api/votes", params={"limit": MAX_LIMIT}))
+    ok(await client.get("/api/votes", params={"limit": MAX_LIMIT, "status": "closed"}))
+    response = await client.get(f"/api/votes/{t.open_vote}")
+    ok(response)
+    ok(await client.get(f"/api/votes/{t.open_vote}", headers={"If-None-Match": response.headers["etag"]}), 304)
+
+
+@covers("GET /api/votes/{vote_id}/stream")
+async def stream_vote(client, t):
+    # A closed vote's stream ends after its final frame
+    response = await client.get(f"/api/votes/{t.closed_vote}/stream")
+    ok(response)
+    assert "event: tally" in response.text
+
+
+@covers("POST /api/votes", "PUT /api/votes/{vote_id}")
+async def edit_vote(client, t):
+    vote = await new_vote(client, t)
+    ok(await client.put(f"/api/votes/{vote['id']}", json={"title": "Edited"}, headers=STUDENT))
+
+
+@covers("POST /api/votes/{vote_id}/cast")
+async def cast_vote(client, t):
+    # First ballot, then a switch
+    vote = await new_vote(client, t)
+    for option in vote["options"]:
+        ok(await client.post(f"/api/votes/{vote['id']}/cast", json={"option_id": option["id"]}, headers=OTHER))
+
+
+@covers("POST /api/votes/{vote_id}/close")
+async def close_vote(client, t):
+    vote = await new_vote(client, t)
+    ok(await client.post(f"/api/votes/{vote['id']}/cast", json={"option_id": vote["options"][0]["id"]}, headers=OTHER))
+    ok(await client.post(f"/api/votes/{vote['id']}/close", headers=STUDENT))
+
+
+@covers("POST /api/votes/{vote_id}/staff-decision")
+async def vote_staff_decision(client, t):
+    vote = await new_vote(client, t)
+    body = {"winning_option_id": vote["options"][1]["id"], "reason": "Budget"}
+    ok(await client.post(f"/api/votes/{vote['id']}/staff-decision", json=body, headers=STAFF))
+
+
+@covers("DELETE /api/votes/{vote_id}")
+async def delete_vote(client, t):
+    # Decided (winning option set), with a ballot and a comment
+    vote = await new_vote(client, t)
+    ok(await client.post(f"/api/votes/{vote['id']}/cast", json={"option_id": vote["options"][0]["id"]}, headers=OTHER))
+    ok(await client.post("/api/comments", json={"content": "Budget", "vote_id": vote["id"]}, headers=OTHER))
+    body = {"winning_option_id": vote["options"][0]["id"]}
+    ok(await client.post(f"/api/votes/{vote['id']}/staff-decision", json=body, headers=STAFF))
+    ok(await client.delete(f"/api/votes/{vote['id']}", headers=STAFF))
+
+
+# --- Disputes -------------------------------------------------------------
+
+@covers("GET /api/disputes", "GET /api/disputes/{dispute_id}")
+async def disputes(client, t):
+    ok(await client.get("/api/disputes", params={"limit": MAX_LIMIT}, headers=STUDENT))
+    ok(await client.get("/api/disputes", params={"limit": MAX_LIMIT, "status": "closed"}, headers=STUDENT))
+    response = await client.get(f"/api/disputes/{t.open_dispute}", headers=STUDENT)
+    ok(response)
+    headers = {**STUDENT, "If-None-Match": response.headers["etag"]}
+    ok(await client.get(f"/api/disputes/{t.open_dispute}", headers=headers), 304)
+
+
+@covers("POST /api/auth/stream-ticket", "GET /api/disputes/{dispute_id}/stream")
+async def stream_dispute(client, t):
+    ticket = ok(await client.post("/api/auth/stream-ticket", headers=STUDENT))["ticket"]
+    response = await client.get(f"/api/disputes/{t.closed_dispute}/stream", params={"ticket": ticket})
+    ok(response)
+    assert "event: tally" in response.text
+
+
+@covers("POST /api/disputes", "PUT /api/disputes/{dispute_id}")
+async def edit_dispute(client, t):
+    dispute = await new_dispute(client, t)
+    ok(await client.put(f"/api/disputes/{dispute['id']}", json={"title": "Edited"}, headers=STUDENT))
+
+
+@covers("POST /api/disputes/{dispute_id}/vote")
+async def vote_dispute(client, t):
+    # First ballot, then a switch
+    dispute = await new_dispute(client, t)
+    for side in ("corrector", "corrected"):
+        ok(await client.post(f"/api/disputes/{dispute['id']}/vote", json={"vote_for": side}, headers=OTHER))
+
+
+@covers("POST /api/disputes/{dispute_id}/close")
+async def close_dispute(client, t):
+    dispute = await new_dispute(client, t)
+    ok(await client.post(f"/api/disputes/{dispute['id']}/close", headers=STUDENT))
+
+
+@covers("POST /api/disputes/{dispute_id}/staff-decision")
+async def dispute_staff_decision(client, t):
+    dispute = await new_dispute(client, t)
+    body = {"winner": "corrected", "reason": "Budget"}
+    ok(await client.post(f"/api/disputes/{dispute['id']}/staff-decision", json=body, headers=STAFF))
+
+
+@covers("DELETE /api/disputes/{dispute_id}")
+async def delete_dispute(client, t):
+    dispute = await new_dispute(client, t)
+    ok(await client.post(f"/api/disputes/{dispute['id']}/vote", json={"vote_for": "corrector"}, headers=OTHER))
+    ok(await client.post("/api/comments", json={"content": "Budget", "dispute_id": dispute["id"]}, headers=OTHER))
+    ok(await client.delete(f"/api/disputes/{dispute['id']}", headers=STAFF))
+
+
+# --- Tests ----------------------------------------------------------------
+
+@covers("GET /api/tests", "GET /api/tests/pending", "POST /api/tests/{test_id}/download")
+async def list_tests(client, t):
+    ok(await client.get("/api/tests", params={"limit": MAX_LIMIT}))
+    ok(await client.get("/api/tests/pending", headers=STAFF))
+    ok(await client.post(f"/api/tests/{t.approved_test}/download"))
+
+
+@covers("POST /api/tests", "POST /api/tests/{test_id}/approve", "DELETE /api/tests/{test_id}")
+async def approve_test(client, t):
+    test = await new_test(client, t)
+    ok(await client.post(f"/api/tests/{test['id']}/approve", headers=STAFF))
+    ok(await client.delete(f"/api/tests/{test['id']}", headers=STUDENT))
+
+
+@covers("POST /api/tests/{test_id}/reject")
+async def reject_test(client, t):
+    test = await new_test(client, t)
+    ok(await client.post(f"/api/tests/{test['id']}/reject", headers=STAFF))
+
+
+# --- Comments -------------------------------------------------------------
+
+@covers("GET /api/comments", "GET /api/comments/count")
+async def comments(client, t):
+    ok(await client.get("/api/comments", params={"limit": MAX_LIMIT}))
+    ok(await client.get("/api/comments", params={"vote_id": t.open_vote, "limit": MAX_LIMIT}))
+    ok(await client.get("/api/comments/count", params={"vote_ids": f"{t.open_vote},{t.closed_vote}"}))
+
+
+@covers("POST /api/comments", "DELETE /api/comments/{comment_id}")
+async def comment(client, t):
+    for parent in ({"vote_id": t.open_vote}, {"dispute_id": t.open_dispute}):
+        created = ok(await client.post("/api/comments", json={"content": "Budget", **parent}, headers=STUDENT))
+        ok(await client.delete(f"/api/comments/{created['id']}", headers=STUDENT))
+
+
+# --- Recodes --------------------------------------------------------------
+
+@covers("GET /api/recodes", "GET /api/recodes/my", "GET /api/recodes/campuses", "GET /api/recodes/platforms")
+async def recodes(client, t):
+    ok(await client.get("/api/recodes", params={"limit": MAX_LIMIT, "status": "all"}))
+    ok(await client.get("/api/recodes/my", headers=STUDENT))
+    ok(await client.get("/api/recodes/campuses"))
+    ok(await client.get("/api/recodes/platforms"))
+
+
+@covers("POST /api/recodes", "GET /api/recodes/{recode_id}", "PUT /api/recodes/{recode_id}")
+async def edit_recode(client, t):
+    recode = await new_recode(client, t)
+    response = await client.get(f"/api/recodes/{recode['id']}")
+    ok(response)
+    ok(await client.get(f"/api/recodes/{recode['id']}", headers={"If-None-Match": response.headers["etag"]}), 304)
+    ok(await client.put(f"/api/recodes/{recode['id']}", json={"campus": "rabat"}, headers=STUDENT))
+
+
+@covers("POST /api/recodes/{recode_id}/accept", "POST /api/recodes/{recode_id}/complete")
+async def match_recode(client, t):
+    recode = await new_recode(client, t)
+    accepted = ok(await client.post(f"/api/recodes/{recode['id']}/accept", headers=OTHER))
+    assert accepted["recode"]["status"] == "matched"
+    ok(await client.post(f"/api/recodes/{recode['id']}/complete", headers=OTHER))
+
+
+@covers("POST /api/recodes/{recode_id}/cancel", "DELETE /api/recodes/{recode_id}")
+async def cancel_recode(client, t):
+    recode = await new_recode(client, t)
+    ok(await client.post(f"/api/recodes/{recode['id']}/cancel", headers=STUDENT))
+    ok(await client.delete(f"/api/recodes/{recode['id']}", headers=STUDENT))
+
+
+# --- Staff and operations -------------------------------------------------
+
+@covers(
+    "GET /api/internal/cache", "POST /api/internal/cache/clear", "GET /api/internal/pool",
+    "GET /api/internal/slow-queries", "POST /api/internal/slow-queries/clear", "GET /api/internal/counters",
+    "GET /api/internal/streams", "GET /api/internal/archive",
+)
+async def internal(client, t):
+    for path in ("cache", "pool", "slow-queries", "counters", "streams", "archive"):
+        ok(await client.get(f"/api/internal/{path}", headers=STAFF))
+    for path in ("cache/clear", "slow-queries/clear"):
+        ok(await client.post(f"/api/internal/{path}", headers=STAFF))
+
+
+@covers("GET /api/exports", "GET /api/exports/{kind}")
+async def exports(client, t):
+    kinds = ok(await client.get("/api/exports", headers=STAFF))
+    for kind in kinds:
+        response = await client.get(f"/api/exports/{kind}", params={"gzip": "false"}, headers=STAFF)
+        assert response.status_code == 200, response.text
+        assert response.text
+
+
+@covers("GET /metrics", "GET /")
+async def operations(client, t):
+    ok(await client.get("/metrics"))
+    ok(await client.get("/"))
+
+
+def _routes(app) -> set[str]:
+    return {f"{method} {route.path}" for route in app.routes if isinstance(route, APIRoute) for method in route.methods}
+
+
+async def test_every_route_is_budgeted_and_exercised(app):
+    unbudgeted = sorted(
+        f"{method} {route.path}"
+        for route in app.routes if isinstance(route, APIRoute) and not hasattr(route.endpoint, "query_budget")
+        for method in route.methods
+    )
+    assert not unbudgeted, f"routes without a @query_budget: {unbudgeted}"
+    assert sorted(_routes(app) - SCENARIOS.keys()) == [], "routes no scenario exercises"
+    assert sorted(SCENARIOS.keys() - _routes(app)) == [], "scenarios for routes that no longer exist"
+
+
+@pytest.mark.parametrize("scenario", sorted(set(SCENARIOS.values()), key=lambda s: s.__name__), ids=lambda s: s.__name__)
+async def test_scenario_within_budget(scenario, budget_client, targets, intra, capsys):
+    kwargs = {"intra": intra} if "intra" in scenario.__code__.co_varnames else {}
+    await scenario(budget_client, targets, **kwargs)
+    # Streamed bodies query after the status line went out: the middleware
+    # can only report those breaches, so look for its report too
+    reported = [line for line in capsys.readouterr().out.splitlines() if "Query budget exceeded" in line]
+    assert not reported, reported
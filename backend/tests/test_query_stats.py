@@ -0,0 +1,39 @@
+# 1337Jury - Query Stats Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Fetched rows are counted from the asyncpg adapter, and only from it
+
+from types import SimpleNamespace
+import pytest
+from sqlalchemy.dialects.postgresql.asyncpg import AsyncAdapt_asyncpg_ss_cursor
+from app.api.budgets import QueryBudget
+from app.middleware.query_stats import _fetched_rows
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("limit", [1, 7, 50])
+async def test_rows_are_counted(budget_client, limit):
+    # One query, the page plus the look-ahead row
+    response = await budget_client.get("/api/votes", params={"limit": limit})
+    assert response.status_code == 200
+    assert response.headers["x-db-queries"] == "1"
+    assert response.headers["x-db-rows"] == str(limit + 1)
+
+
+def test_server_side_cursor_rows_are_unknown():
+    # A subclass of the plain cursor, holding only the batch it fetched last
+    cursor = object.__new__(AsyncAdapt_asyncpg_ss_cursor)
+    cursor._rows = [1, 2, 3]
+    assert _fetched_rows(cursor) is None
+
+
+def test_other_cursors_are_not_read():
+    assert _fetched_rows(SimpleNamespace(_rows=[1, 2, 3])) is None
+
+
+def test_row_budget_needs_counted_rows():
+    budget = QueryBudget(queries=1, rows=10)
+    stats = SimpleNamespace(queries=1, rows=50, paged=True, rows_counted=True)
+    assert budget.violations(stats) == ["50 rows > 10"]
+    stats.rows_counted = False
+    assert budget.violations(stats) == []
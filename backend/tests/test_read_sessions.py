@@ -0,0 +1,50 @@
+# 1337Jury - Read Session Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Read routes run their queries on the read session (autocommit, the replica when configured)
+
+import pytest
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from app.database import engine, get_read_db
+from app.services.user_loader import get_read_user_loader, get_user_loader
+from tests.conftest import STAFF_ID, STUDENT_ID
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def isolation():
+    """The isolation level of every statement run while the test does"""
+    levels = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        levels.append(conn.get_execution_options().get("isolation_level", "transaction"))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield levels
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+def _calls(dependant) -> set:
+    calls = set()
+    for sub in dependant.dependencies:
+        calls.add(sub.call)
+        calls |= _calls(sub)
+    return calls
+
+
+async def test_read_loader_queries_the_read_session(app, isolation):
+    async for db in get_read_db():
+        loader = await get_read_user_loader(db)
+        users = await loader.load_many([STAFF_ID, STUDENT_ID])
+        by_login = await loader.load_by_logins(["nobody-at-all"])
+    assert users[STAFF_ID] and users[STUDENT_ID] and by_login == {}
+    assert isolation and set(isolation) == {"AUTOCOMMIT"}, isolation
+
+
+def test_get_routes_use_the_read_loader(app):
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or route.methods != {"GET"}:
+            continue
+        calls = _calls(route.dependant)
+        assert get_user_loader not in calls, route.path
@@ -0,0 +1,45 @@
+# 1337Jury - Recode Listing Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Requester, project and matched user come from the same query, whatever the page size
+
+import pytest
+from app.api.pagination import MAX_LIMIT
+from app.services.auth_cache import auth_cache
+from tests.conftest import STUDENT_ID, auth
+
+pytestmark = pytest.mark.anyio
+
+
+def _queries(response) -> int:
+    # Counted by QueryStatsMiddleware (development settings)
+    return int(response.headers["x-db-queries"])
+
+
+@pytest.mark.parametrize("status", ["all", "open", "matched"])
+async def test_list_query_count_does_not_grow_with_the_page(client, status):
+    counts, sizes = {}, {}
+    for limit in (1, 10, 50, MAX_LIMIT):
+        response = await client.get("/api/recodes", params={"limit": limit, "status": status})
+        assert response.status_code == 200, response.text
+        body = response.json()
+        sizes[limit] = len(body["items"])
+        assert all(item["user_login"] != "Unknown" and item["project_name"] != "Unknown Project" for item in body["items"])
+        if status == "matched":
+            assert all(item["matched_user_login"] for item in body["items"])
+        counts[limit] = _queries(response)
+    assert sizes[MAX_LIMIT] > 50 and sizes[1] == 1
+    assert set(counts.values()) == {1}, counts
+
+
+async def test_my_recodes_query_count_does_not_grow(client):
+    body = {"project_id": 1, "campus": "khouribga", "meeting_platform": "discord"}
+    headers = auth(STUDENT_ID + 100)
+    counts = []
+    for _ in range(3):
+        assert (await client.post("/api/recodes", json=body, headers=headers)).status_code == 200
+        auth_cache.clear(publish=False)
+        response = await client.get("/api/recodes/my", headers=headers)
+        counts.append(_queries(response))
+    assert len(response.json()) >= 3
+    # The user lookup, then one enriched query
+    assert counts == [2, 2, 2]
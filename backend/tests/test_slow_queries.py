@@ -0,0 +1,73 @@
+# 1337Jury - Slow Query Log Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Only plain reads are re-run under EXPLAIN ANALYZE
+
+import asyncio
+import pytest
+from sqlalchemy import func, select, text
+from app.api.pagination import Page
+from app.config import settings
+from app.database import engine
+from app.models.archive import AnySubjectVote
+from app.models.stream_ticket import StreamTicket
+from app.models.user import User
+from app.schemas.rows import VoteRow
+from app.services.archiver import lock_either, move_batch, purge, KINDS
+from app.services.slow_queries import SlowQueryLog, explainable
+
+pytestmark = pytest.mark.anyio
+
+
+def sql(statement) -> str:
+    """The statement as the driver receives it"""
+    return str(statement.compile(dialect=engine.dialect))
+
+
+def _redeem():
+    redeemed = StreamTicket.__table__.delete().returning(StreamTicket.user_id).cte("redeemed")
+    return select(User).join(redeemed, redeemed.c.user_id == User.id)
+
+
+READS = {
+    "vote page": lambda: Page(limit=20).apply(VoteRow.select(VoteRow.any_columns), AnySubjectVote.created_at, AnySubjectVote.id),
+    "aggregate": lambda: select(func.count(), func.coalesce(func.max(User.id), 0)).where(User.login.like("a%")),
+    "literal": lambda: text("SELECT id FROM comments WHERE content = 'delete from users; select pg_sleep(9)'"),
+    "pg_catalog": lambda: text("SELECT pg_catalog.now()"),
+}
+NOT_READS = {
+    "row lock": lambda: lock_either("votes", 1),
+    "delete with ctes": lambda: purge("votes", 1, archived=False),
+    "data-modifying cte": _redeem,
+    "archive move": lambda: move_batch(*KINDS["votes"], func.now(), 10),
+    "side effect": lambda: select(func.pg_notify("channel", "payload")),
+    "sleep": lambda: text("SELECT pg_sleep(10)"),
+    "sequence": lambda: text("SELECT nextval('comments_id_seq')"),
+    "quoted function": lambda: text('SELECT "pg_advisory_lock"(1)'),
+    "schema function": lambda: text("SELECT public.anything(1)"),
+    "select into": lambda: text("SELECT * INTO copied FROM users"),
+    "two statements": lambda: text("SELECT 1; DELETE FROM users"),
+    "not a select": lambda: text("VACUUM users"),
+}
+
+
+@pytest.mark.parametrize("name", READS)
+def test_reads_are_explainable(name):
+    assert explainable(sql(READS[name]()))
+
+
+@pytest.mark.parametrize("name", NOT_READS)
+def test_anything_else_is_not(name):
+    assert not explainable(sql(NOT_READS[name]()))
+
+
+async def test_only_reads_get_a_plan(app, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN", True)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN_SAMPLE", 1.0)
+    log = SlowQueryLog(10)
+    async with engine.connect() as conn:
+        log.record(conn.sync_connection, "SELECT count(*) FROM users WHERE id > $1", (1,), 1.0, "test")
+        log.record(conn.sync_connection, "SELECT pg_sleep($1)", (5,), 1.0, "test")
+    await asyncio.gather(*log._pending)
+    read, sleep = log.entries
+    assert read["plan"].startswith("Aggregate")
+    assert sleep["plan"] is None
@@ -0,0 +1,64 @@
+# 1337Jury - Stream Ticket Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Dispute streams take a one-time, short-lived ticket instead of the JWT
+
+import pytest
+from sqlalchemy import select, update, func
+from app.database import AsyncSessionLocal
+from app.models.dispute import Dispute, DisputeStatus
+from app.models.stream_ticket import StreamTicket
+from app.services.jwt_service import create_access_token
+from tests.conftest import STUDENT_ID, auth
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def closed_dispute(app) -> int:
+    # A closed dispute's stream ends after its first frame
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(Dispute.id).where(Dispute.status == DisputeStatus.CLOSED).limit(1))
+
+
+async def _ticket(client) -> str:
+    response = await client.post("/api/auth/stream-ticket", headers=auth(STUDENT_ID))
+    assert response.status_code == 200, response.text
+    assert response.json()["expires_in"] > 0
+    return response.json()["ticket"]
+
+
+async def test_ticket_opens_one_stream(client, closed_dispute):
+    ticket = await _ticket(client)
+    response = await client.get(f"/api/disputes/{closed_dispute}/stream", params={"ticket": ticket})
+    assert response.status_code == 200
+    assert "event: tally" in response.text
+
+    # Spent: a leaked URL is worthless
+    response = await client.get(f"/api/disputes/{closed_dispute}/stream", params={"ticket": ticket})
+    assert response.status_code == 401
+
+
+async def test_expired_ticket_is_refused(client, closed_dispute):
+    ticket = await _ticket(client)
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(StreamTicket).values(expires_at=func.now()))
+        await db.commit()
+    response = await client.get(f"/api/disputes/{closed_dispute}/stream", params={"ticket": ticket})
+    assert response.status_code == 401
+
+
+async def test_jwt_in_the_url_is_refused(client, closed_dispute):
+    token = create_access_token({"sub": str(STUDENT_ID)})
+    for params in ({"token": token}, {"ticket": token}, {}):
+        response = await client.get(f"/api/disputes/{closed_dispute}/stream", params=params)
+        assert response.status_code == 401
+
+
+async def test_issuing_drops_expired_tickets(client):
+    await _ticket(client)
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(StreamTicket).values(expires_at=func.now() - func.make_interval(0, 0, 0, 0, 0, 1)))
+        await db.commit()
+    await _ticket(client)
+    async with AsyncSessionLocal() as db:
+        assert await db.scalar(select(func.count()).select_from(StreamTicket)) == 1
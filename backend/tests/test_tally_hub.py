@@ -0,0 +1,121 @@
+# 1337Jury - Tally Hub Tests
+# This file is for: ADMIRAL (Backend Dev 1)
+# Description: Thousands of idle SSE subscribers cost bounded memory and one load per change
+
+import asyncio
+import gc
+import tracemalloc
+import pytest
+from app.config import settings
+from app.services.tally_hub import TallyHub, event_stream
+
+pytestmark = pytest.mark.anyio
+
+# Bytes one idle stream may hold: its subscription, generator, waiting task
+# and timeout (about 4.5 KiB on CPython 3.11)
+MAX_BYTES_PER_STREAM = 8192
+
+
+class FakeTallies:
+    """A loader for topic "vote:<id>" that counts its calls"""
+
+    def __init__(self):
+        self.status = "open"
+        self.loads = 0
+
+    async def __call__(self, db, vote_id: int) -> dict:
+        self.loads += 1
+        return {"id": vote_id, "status": self.status, "options": [{"id": 1, "vote_count": self.loads}]}
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    monkeypatch.setattr(settings, "TALLY_COALESCE_MS", 10)
+    # Idle streams stay idle: no keepalive fires during the test
+    monkeypatch.setattr(settings, "TALLY_KEEPALIVE", 3600)
+    hub = TallyHub()
+    hub.register("vote", FakeTallies())
+    return hub
+
+
+async def _open_streams(hub: TallyHub, count: int, topic: str) -> tuple[list[asyncio.Task], list[list[bytes]]]:
+    received = [[] for _ in range(count)]
+
+    async def consume(stream, frames: list[bytes]) -> None:
+        async for frame in stream:
+            frames.append(frame)
+
+    tally = await hub.load(topic)
+    tasks = [
+        asyncio.create_task(consume(event_stream(hub, hub.subscribe(topic), tally), frames))
+        for frames in received
+    ]
+    # Let every stream send its first frame and park on its subscription
+    await asyncio.sleep(0.05)
+    return tasks, received
+
+
+def _traced_bytes() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def test_idle_subscribers_hold_bounded_memory(hub):
+    tracemalloc.start()
+    try:
+        baseline = _traced_bytes()
+        small, _ = await _open_streams(hub, 1_000, "vote:1")
+        after_small = _traced_bytes()
+        large, _ = await _open_streams(hub, 4_000, "vote:2")
+        after_large = _traced_bytes()
+        assert hub.subscribers == 5_000
+
+        # Linear in the number of streams, at a small constant per stream
+        per_stream_small = (after_small - baseline) / 1_000
+        per_stream_large = (after_large - after_small) / 4_000
+        assert per_stream_small < MAX_BYTES_PER_STREAM, per_stream_small
+        assert per_stream_large < MAX_BYTES_PER_STREAM, per_stream_large
+
+        # Ending the streams releases everything they held
+        hub.loaders["vote"].status = "closed"
+        hub.publish("vote:1", "vote:2")
+        await asyncio.wait_for(asyncio.gather(*small, *large), 5)
+        assert hub.subscribers == 0 and hub.stats()["topics"] == 0
+        del small, large, _
+        # Only the event loop's own bookkeeping is left (its grown task
+        # registry, cancelled timers it purges lazily)
+        assert _traced_bytes() - baseline < (after_large - baseline) / 4
+    finally:
+        tracemalloc.stop()
+
+
+async def test_one_load_and_frame_per_burst(hub):
+    loader = hub.loaders["vote"]
+    tasks, received = await _open_streams(hub, 2_000, "vote:7")
+    loads = loader.loads
+
+    # A burst of publishes inside one coalescing window
+    for _ in range(50):
+        hub.publish("vote:7")
+    await asyncio.sleep(0.1)
+    assert loader.loads == loads + 1
+    assert hub.frames == 1
+    assert all(len(frames) == 2 and frames[1] == received[0][1] for frames in received)
+
+    # Topics nobody watches cost nothing
+    hub.publish("vote:8")
+    await asyncio.sleep(0.05)
+    assert loader.loads == loads + 1
+
+    loader.status = "closed"
+    hub.publish("vote:7")
+    await asyncio.wait_for(asyncio.gather(*tasks), 5)
+    assert all(b'"status":"closed"' in frames[-1] for frames in received)
+
+
+async def test_disconnect_unsubscribes(hub):
+    tasks, _ = await _open_streams(hub, 100, "vote:9")
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert hub.subscribers == 0
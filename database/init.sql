@@ -1,6 +1,8 @@
 -- 1337Jury Database Initialization Script
 -- This file is for: YASSINE (Backend Dev 3)
 -- Run this entire script in Supabase SQL Editor
+-- Later schema changes ship as revisions in backend/app/migrations/versions
+-- (applied at startup or with: python -m app.migrations upgrade)
 
 -- Users table
 CREATE TABLE IF NOT EXISTS users (
@@ -73,7 +75,8 @@ CREATE TABLE IF NOT EXISTS subject_votes (
     staff_decision_by INTEGER REFERENCES users(id),
     staff_decision_reason TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    closed_at TIMESTAMP WITH TIME ZONE
+    closed_at TIMESTAMP WITH TIME ZONE,
+    comment_count INTEGER DEFAULT 0
 );
 
 -- Vote options
@@ -115,7 +118,8 @@ CREATE TABLE IF NOT EXISTS disputes (
     staff_decision_by INTEGER REFERENCES users(id),
     staff_decision_reason TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    closed_at TIMESTAMP WITH TIME ZONE
+    closed_at TIMESTAMP WITH TIME ZONE,
+    comment_count INTEGER DEFAULT 0
 );
 
 -- Dispute votes
@@ -132,4 +136,15 @@ CREATE TABLE IF NOT EXISTS dispute_votes (
 CREATE INDEX IF NOT EXISTS idx_resources_project ON resources(project_id);
 CREATE INDEX IF NOT EXISTS idx_tests_project ON tests(project_id);
 CREATE INDEX IF NOT EXISTS idx_subject_votes_project ON subject_votes(project_id);
-CREATE INDEX IF NOT EXISTS idx_disputes_project ON disputes(project_id);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_disputes_project ON disputes(project_id);
+
+-- Denormalized comment counters (for databases created before they existed)
+ALTER TABLE subject_votes ADD COLUMN IF NOT EXISTS comment_count INTEGER DEFAULT 0;
+ALTER TABLE disputes ADD COLUMN IF NOT EXISTS comment_count INTEGER DEFAULT 0;
+DO $$
+BEGIN
+    IF to_regclass('comments') IS NOT NULL THEN
+        UPDATE subject_votes v SET comment_count = (SELECT COUNT(*) FROM comments c WHERE c.vote_id = v.id);
+        UPDATE disputes d SET comment_count = (SELECT COUNT(*) FROM comments c WHERE c.dispute_id = d.id);
+    END IF;
+END $$;
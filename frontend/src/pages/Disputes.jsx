@@ -19,6 +19,37 @@ export default function Disputes() {
     loadProjects()
   }, [])
 
+  // Live tallies while the selected dispute is open
+  useEffect(() => {
+    if (!selectedDispute?.id || selectedDispute.status !== 'open') return
+    let source = null
+    let stopped = false
+    // A ticket opens one connection, so reconnects fetch a new one instead
+    // of letting EventSource retry the spent URL
+    const connect = async () => {
+      if (stopped) return
+      try {
+        source = await disputesApi.stream(selectedDispute.id)
+      } catch (e) { return console.error(e) }
+      if (stopped) return source.close()
+      source.addEventListener('tally', (e) => {
+        const tally = JSON.parse(e.data)
+        setSelectedDispute(d => d?.id !== tally.id ? d : { ...d, ...tally })
+        if (tally.status !== 'open') source.close()
+      })
+      source.addEventListener('gone', () => source.close())
+      source.onerror = () => {
+        source.close()
+        setTimeout(connect, 5000)
+      }
+    }
+    connect()
+    return () => {
+      stopped = true
+      source?.close()
+    }
+  }, [selectedDispute?.id, selectedDispute?.status])
+
   const loadProjects = async () => {
     try {
       const { data } = await projectsApi.list()
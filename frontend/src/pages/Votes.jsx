@@ -19,6 +19,24 @@ export default function Votes() {
     loadProjects()
   }, [])
 
+  // Live tallies while the selected vote is open
+  useEffect(() => {
+    if (!selectedVote?.id || selectedVote.status !== 'open') return
+    const source = votesApi.stream(selectedVote.id)
+    source.addEventListener('tally', (e) => {
+      const tally = JSON.parse(e.data)
+      setSelectedVote(v => v?.id !== tally.id ? v : {
+        ...v,
+        status: tally.status,
+        winning_option_id: tally.winning_option_id,
+        options: v.options?.map(o => ({ ...o, vote_count: tally.options.find(t => t.id === o.id)?.vote_count ?? o.vote_count })),
+      })
+      if (tally.status !== 'open') source.close()
+    })
+    source.addEventListener('gone', () => source.close())
+    return () => source.close()
+  }, [selectedVote?.id, selectedVote?.status])
+
   const loadProjects = async () => {
     try {
       const { data } = await projectsApi.list()
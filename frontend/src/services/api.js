@@ -21,6 +21,7 @@ export const authApi = {
   getLoginUrl: () => `${API_URL}/auth/login`,
   getMe: (token) => api.get(`/auth/me?token=${token}`),
   verify: (token) => api.get(`/auth/verify?token=${token}`),
+  streamTicket: () => api.post('/auth/stream-ticket'),
 }
 
 export const projectsApi = {
@@ -45,6 +46,7 @@ export const votesApi = {
   cast: (id, optionId) => api.post(`/votes/${id}/cast`, { option_id: optionId }),
   staffDecision: (id, optionId, reason) => api.post(`/votes/${id}/staff-decision`, { winning_option_id: optionId, reason }),
   close: (id) => api.post(`/votes/${id}/close`),
+  stream: (id) => new EventSource(`${API_URL}/votes/${id}/stream`),
 }
 
 export const disputesApi = {
@@ -56,6 +58,12 @@ export const disputesApi = {
   vote: (id, voteFor) => api.post(`/disputes/${id}/vote`, { vote_for: voteFor }),
   staffDecision: (id, winner, reason) => api.post(`/disputes/${id}/staff-decision`, { winner, reason }),
   close: (id) => api.post(`/disputes/${id}/close`),
+  // EventSource cannot send headers: each connection spends a one-time
+  // ticket, so the token itself never appears in a URL
+  stream: async (id) => {
+    const { data } = await authApi.streamTicket()
+    return new EventSource(`${API_URL}/disputes/${id}/stream?ticket=${data.ticket}`)
+  },
 }
 
 export const testsApi = {